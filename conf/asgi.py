@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "conf.settings")
 
 application = get_asgi_application()
+
+from station.geo import warm_station_grid  # noqa: E402
+from station.matcher import warm_station_matcher  # noqa: E402
+from station.timetable import warm_timetable  # noqa: E402
+
+warm_timetable()
+warm_station_matcher()
+warm_station_grid()
@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "rest_framework",
     "rest_framework_simplejwt",
@@ -98,6 +101,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Response caches, cache versions, the timetable version and seat maps
+# are shared by all web workers and commands through this cache. The
+# per-process default only stays consistent with a single process, so it
+# is refused outside DEBUG and tests.
+
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+elif not DEBUG and sys.argv[1:2] != ["test"]:
+    raise ImproperlyConfigured(
+        "Set REDIS_URL, the local memory cache is not shared between "
+        "processes"
+    )
+
+# Serve GET responses of the cached viewsets from the cache
+RESPONSE_CACHE = True
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -144,12 +173,48 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "user.User"
 
+# Seats held for a passenger stay out of sale until they are ordered
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+# Retried POST /order/ with the same Idempotency-Key replays the first
+# response while the key is younger than this
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# Journey plans only take legs departing within this after the departure
+JOURNEY_PLAN_HORIZON = timedelta(days=2)
+
+# Timetable deltas are served since versions younger than this, older
+# clients get a full snapshot
+TIMETABLE_DELETION_TTL = timedelta(days=30)
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
 
 # DRF SETTINGS
+# FAST_JSON=1 renders and parses JSON with orjson, same output bytes
+FAST_JSON = os.getenv("FAST_JSON") == "1"
+
 REST_FRAMEWORK = {
+    "DEFAULT_RENDERER_CLASSES": [
+        (
+            "station.renderers.ORJSONRenderer"
+            if FAST_JSON
+            else "rest_framework.renderers.JSONRenderer"
+        ),
+        "station.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        (
+            "station.renderers.ORJSONParser"
+            if FAST_JSON
+            else "rest_framework.parsers.JSONParser"
+        ),
+        "station.renderers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
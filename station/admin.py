@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db import transaction
 
 from station.models import (
     TrainTypeModel,
@@ -9,6 +10,7 @@ from station.models import (
     JourneyModel,
     OrderModel,
     TicketModel,
+    SeatHoldModel,
 )
 
 admin.site.register(TrainTypeModel)
@@ -54,6 +56,33 @@ class JourneyAdmin(admin.ModelAdmin):
     list_filter = ["route", "train"]
 
 
+@admin.register(SeatHoldModel)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ["id", "journey", "cargo", "seat", "user", "expires_at"]
+    list_filter = ["journey"]
+    readonly_fields = ["journey", "cargo", "seat", "user", "expires_at"]
+    actions = ["release"]
+
+    # Holds move journey seats_held, only SeatHoldModel.release may
+    # remove them and nothing but the hold endpoint may add them
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Release selected holds")
+    def release(self, request, queryset):
+        with transaction.atomic():
+            JourneyModel.lock(
+                set(queryset.values_list("journey_id", flat=True))
+            )
+            released = SeatHoldModel.release(
+                queryset.values_list("id", "journey_id")
+            )
+        self.message_user(request, f"Released {released} holds")
+
+
 class TicketInline(admin.TabularInline):
     model = TicketModel
     fields = ["cargo", "seat", "journey", "order"]
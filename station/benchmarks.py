@@ -0,0 +1,131 @@
+import random
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from station.models import (
+    TrainTypeModel,
+    TrainModel,
+    CrewModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+    OrderModel,
+    TicketModel,
+)
+
+CARGO_NUM = 20
+PLACES_IN_CARGO = 50
+
+
+def seed_dataset(
+    journeys: int, tickets: int, rng: random.Random, orders: int = 3
+) -> dict:
+    """
+    Bulk insert journeys on a chain of stations and a staff user holding
+    orders with tickets seats each. Sends no signals.
+    """
+    stations = StationModel.objects.bulk_create(
+        StationModel(
+            name=f"Station {number}",
+            latitude=48 + rng.random() * 3,
+            longitude=24 + rng.random() * 14,
+        )
+        for number in range(max(10, journeys // 10))
+    )
+    routes = RouteModel.objects.bulk_create(
+        RouteModel(
+            source=source,
+            destination=destination,
+            distance=rng.randint(50, 900),
+        )
+        for source, destination in zip(stations, stations[1:])
+    )
+    train_type = TrainTypeModel.objects.create(name="Benchmark")
+    trains = TrainModel.objects.bulk_create(
+        TrainModel(
+            name=f"Benchmark {number}",
+            cargo_num=CARGO_NUM,
+            places_in_cargo=PLACES_IN_CARGO,
+            train_type=train_type,
+        )
+        for number in range(5)
+    )
+    crews = CrewModel.objects.bulk_create(
+        CrewModel(first_name=f"Crew {number}", last_name="Benchmark")
+        for number in range(10)
+    )
+
+    start = timezone.make_aware(datetime(2024, 1, 1))
+    journey_rows = []
+    for number in range(journeys + 1):
+        departure = start + timedelta(minutes=rng.randint(0, 525_600))
+        journey_rows.append(
+            JourneyModel(
+                route=routes[number % len(routes)],
+                train=trains[number % len(trains)],
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=6),
+                seats_capacity=CARGO_NUM * PLACES_IN_CARGO,
+            )
+        )
+    journey_rows = JourneyModel.objects.bulk_create(
+        journey_rows, batch_size=5000
+    )
+    JourneyModel.crews.through.objects.bulk_create(
+        (
+            JourneyModel.crews.through(
+                journeymodel_id=journey.id,
+                crewmodel_id=crews[number % len(crews)].id,
+            )
+            for number, journey in enumerate(journey_rows)
+        ),
+        batch_size=5000,
+    )
+
+    user = get_user_model().objects.create_user(
+        # Never one of the bench-<n> addresses user_create signs up
+        email=f"bench-seed-{journey_rows[0].id}@example.com",
+        password="benchmark",
+        is_staff=True,
+    )
+    # The last journey is kept free for holds and new orders
+    sold, free_journey = journey_rows[:-1], journey_rows[-1]
+    order_rows = OrderModel.objects.bulk_create(
+        OrderModel(user=user) for _ in range(orders)
+    )
+    per_journey = CARGO_NUM * PLACES_IN_CARGO
+    TicketModel.objects.bulk_create(
+        (
+            TicketModel(
+                order=order,
+                journey=sold[index // per_journey % len(sold)],
+                cargo=index % per_journey // PLACES_IN_CARGO + 1,
+                seat=index % PLACES_IN_CARGO + 1,
+            )
+            for index, order in (
+                (number * len(order_rows) + position, order)
+                for number in range(tickets)
+                for position, order in enumerate(order_rows)
+            )
+        ),
+        batch_size=5000,
+    )
+
+    refresh = RefreshToken.for_user(user)
+    return {
+        "user": user,
+        "refresh": str(refresh),
+        "access": str(refresh.access_token),
+        "station_ids": [station.id for station in stations],
+        "route_id": routes[0].id,
+        "train_type_id": train_type.id,
+        "train_id": trains[0].id,
+        "crew_id": crews[0].id,
+        "journey_ids": [journey.id for journey in journey_rows],
+        "order_journey_id": sold[0].id,
+        "free_journey_id": free_journey.id,
+        "order_id": order_rows[0].id,
+    }
@@ -0,0 +1,32 @@
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+
+
+def copy_rows(model, columns: list[str], rows) -> int:
+    """Stream rows into model's table with COPY, return the number written"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(name).column)
+        for name in columns
+    )
+    written = 0
+    with connection.cursor() as cursor:
+        with cursor.copy(f"COPY {table} ({names}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+                written += 1
+    return written
+
+
+def next_ids(model, count: int) -> range:
+    """Ids for rows written with explicit keys, see reset_sequences()"""
+    first = (model.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+    return range(first, first + count)
+
+
+def reset_sequences(models) -> None:
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,233 @@
+from datetime import UTC, datetime, time, timedelta
+
+import zstandard
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from station.models import (
+    TrainModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+    TimetableBulkImportModel,
+    TimetableDeletionModel,
+)
+from station.renderers import NDJSONRenderer
+
+BUNDLE_FORMAT = 1
+BUNDLE_CHUNK_SIZE = 2000
+BUNDLE_COMPRESSION_LEVEL = 10
+# Rows saved in a transaction that commits after a bundle was cut carry
+# updated_at before its version, so deltas look back this much further
+DELTA_OVERLAP = timedelta(minutes=5)
+
+# Referenced rows come first, so a client can apply records in order
+BUNDLE_TABLES = {
+    StationModel: (
+        "station",
+        {
+            "id": "id",
+            "name": "name",
+            "latitude": "latitude",
+            "longitude": "longitude",
+        },
+    ),
+    TrainModel: (
+        "train",
+        {
+            "id": "id",
+            "name": "name",
+            "cargo_num": "cargo_num",
+            "places_in_cargo": "places_in_cargo",
+            "train_type": "train_type__name",
+        },
+    ),
+    RouteModel: (
+        "route",
+        {
+            "id": "id",
+            "source": "source_id",
+            "destination": "destination_id",
+            "distance": "distance",
+        },
+    ),
+    JourneyModel: (
+        "journey",
+        {
+            "id": "id",
+            "route": "route_id",
+            "train": "train_id",
+            "departure_time": "departure_time",
+            "arrival_time": "arrival_time",
+        },
+    ),
+}
+
+
+def to_version(moment: datetime) -> int:
+    return int(moment.timestamp() * 1000)
+
+
+def from_version(version: int) -> datetime:
+    return datetime.fromtimestamp(version / 1000, tz=UTC)
+
+
+def database_now() -> datetime:
+    """The database clock, the same for every web worker"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT clock_timestamp()")
+        return cursor.fetchone()[0]
+
+
+def record_deletion(model, object_id: int) -> None:
+    TimetableDeletionModel.objects.create(
+        kind=BUNDLE_TABLES[model][0], object_id=object_id
+    )
+
+
+def record_bulk_import() -> None:
+    """
+    Send a full snapshot for every version cut before now, call once a
+    bulk import was committed
+    """
+    TimetableBulkImportModel.objects.create()
+
+
+def last_bulk_import() -> datetime | None:
+    return TimetableBulkImportModel.objects.aggregate(
+        latest=Max("imported_at")
+    )["latest"]
+
+
+def purge_timetable_deletions(batch_size: int = 1000) -> int:
+    """
+    Delete up to batch_size deletions older than TIMETABLE_DELETION_TTL,
+    and the bulk imports older than it, which no delta can start before
+    """
+    expires_at = timezone.now() - settings.TIMETABLE_DELETION_TTL
+    TimetableBulkImportModel.objects.filter(
+        imported_at__lte=expires_at
+    ).delete()
+    expired = TimetableDeletionModel.objects.filter(
+        deleted_at__lte=expires_at
+    ).values_list("id", flat=True)[:batch_size]
+    deleted, _ = TimetableDeletionModel.objects.filter(
+        pk__in=list(expired)
+    ).delete()
+    return deleted
+
+
+def compress(chunks, level: int = BUNDLE_COMPRESSION_LEVEL):
+    """chunks as a single zstd frame, compressed on the fly"""
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class TimetableBundle:
+    """
+    Stations, trains, routes and journeys from today on as NDJSON records,
+    after a header line with the bundle version.
+
+    Given the version of an earlier bundle, only rows saved since and the
+    ids of deleted rows are included, journeys saved since that now depart
+    before today count as deleted. A version older than the kept
+    deletions or cut before the last bulk import gets a full snapshot, its
+    header has "since": null.
+    """
+
+    def __init__(self, since: int | None = None):
+        now = database_now()
+        self.version = to_version(now)
+        if since is not None and from_version(since) <= self.oldest_delta(
+            now
+        ):
+            since = None
+        self.since = since
+        self.departures_from = timezone.make_aware(
+            datetime.combine(timezone.localdate(now), time.min)
+        )
+
+    @staticmethod
+    def oldest_delta(now: datetime) -> datetime:
+        """Versions up to this moment cannot be sent a delta"""
+        oldest = now - settings.TIMETABLE_DELETION_TTL
+        bulk_import = last_bulk_import()
+        if bulk_import is not None:
+            oldest = max(oldest, bulk_import + DELTA_OVERLAP)
+        return oldest
+
+    @property
+    def filename(self) -> str:
+        if self.since:
+            return f"timetable-{self.since}-{self.version}.ndjson"
+        return f"timetable-{self.version}.ndjson"
+
+    def changed_after(self) -> datetime | None:
+        if self.since is None:
+            return None
+        return from_version(self.since) - DELTA_OVERLAP
+
+    def records(self):
+        yield {
+            "type": "header",
+            "format": BUNDLE_FORMAT,
+            "version": self.version,
+            "since": self.since,
+            "departures_from": self.departures_from,
+        }
+        changed_after = self.changed_after()
+        for model, (kind, columns) in BUNDLE_TABLES.items():
+            queryset = model.objects.order_by("id")
+            if model is JourneyModel:
+                queryset = queryset.filter(
+                    departure_time__gte=self.departures_from
+                )
+            if changed_after:
+                queryset = queryset.filter(updated_at__gt=changed_after)
+            names = list(columns)
+            for row in queryset.values_list(*columns.values()).iterator(
+                chunk_size=BUNDLE_CHUNK_SIZE
+            ):
+                yield {"type": kind, **dict(zip(names, row))}
+
+        if changed_after:
+            departed = (
+                JourneyModel.objects.filter(
+                    updated_at__gt=changed_after,
+                    departure_time__lt=self.departures_from,
+                )
+                .order_by("id")
+                .values_list("id", flat=True)
+            )
+            kind = BUNDLE_TABLES[JourneyModel][0]
+            for object_id in departed.iterator(chunk_size=BUNDLE_CHUNK_SIZE):
+                yield {"type": "deleted", "kind": kind, "id": object_id}
+
+            deletions = TimetableDeletionModel.objects.filter(
+                deleted_at__gt=changed_after
+            ).order_by("id")
+            for kind, object_id in deletions.values_list(
+                "kind", "object_id"
+            ).iterator(chunk_size=BUNDLE_CHUNK_SIZE):
+                yield {"type": "deleted", "kind": kind, "id": object_id}
+
+    def chunks(self):
+        """NDJSON bytes, BUNDLE_CHUNK_SIZE records at a time"""
+        renderer = NDJSONRenderer()
+        chunk = []
+        for record in self.records():
+            chunk.append(record)
+            if len(chunk) == BUNDLE_CHUNK_SIZE:
+                yield renderer.render(chunk)
+                chunk = []
+        if chunk:
+            yield renderer.render(chunk)
+
+    def compressed_chunks(self, level: int = BUNDLE_COMPRESSION_LEVEL):
+        return compress(self.chunks(), level)
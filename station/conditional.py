@@ -0,0 +1,131 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_vary_headers
+from django.utils.http import (
+    http_date,
+    parse_etags,
+    parse_http_date_safe,
+    quote_etag,
+)
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified for GET requests of conditional_actions.
+
+    Validators come from one aggregate over the rows the response is built
+    from: the latest of etag_fields (updated_at stamps of the row and of
+    everything it nests) and the row count, which catches deletes. A
+    matching If-None-Match or If-Modified-Since is answered with 304
+    before anything is serialized.
+
+    Only last_modified_actions send Last-Modified: a row deleted from a
+    list leaves the latest stamp of the others unchanged, so lists are
+    validated by their ETag alone.
+    """
+
+    conditional_actions = ("list", "retrieve")
+    last_modified_actions = ("retrieve",)
+    etag_fields = ("updated_at",)
+
+    def validators(self, request, kwargs) -> tuple[str, float | None]:
+        if not (
+            settings.RESPONSE_CACHE and hasattr(self, "response_cache_key")
+        ):
+            return self.compute_validators(request, kwargs)
+        # Cached viewsets keep validators next to the response, under the
+        # same model versions, so a 304 costs no query either
+        key = f"conditional:{self.response_cache_key(request, kwargs)}"
+        validators = cache.get(key)
+        if validators is None:
+            validators = self.compute_validators(request, kwargs)
+            cache.set(key, validators, self.cache_timeout)
+        return validators
+
+    def compute_validators(self, request, kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        if lookup in kwargs:
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup]})
+        stamps = queryset.order_by().aggregate(
+            rows=Count("pk"),
+            **{
+                f"latest_{position}": Max(field)
+                for position, field in enumerate(self.etag_fields)
+            },
+        )
+        latest = max(
+            (
+                stamp
+                for name, stamp in stamps.items()
+                if name != "rows" and stamp is not None
+            ),
+            default=None,
+        )
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        digest = hashlib.sha1(
+            repr(
+                (
+                    self.basename,
+                    self.action,
+                    sorted(kwargs.items()),
+                    params,
+                    sorted(stamps.items()),
+                )
+            ).encode()
+        ).hexdigest()
+        return digest, latest.timestamp() if latest else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == "GET" and self.action in self.conditional_actions:
+            # dispatch() looks the handler up after initial()
+            self.get = partial(self.conditional_response, self.get)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        digest, last_modified = self.validators(request, kwargs)
+        if self.action not in self.last_modified_actions:
+            last_modified = None
+        # JSON and MessagePack bodies of the same rows differ, and so do
+        # their strong ETags
+        etag = quote_etag(f"{digest}.{request.accepted_renderer.format}")
+        headers = {"ETag": etag}
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = parse_http_date_safe(
+            request.headers.get("If-Modified-Since")
+        )
+        if if_none_match:
+            # If-None-Match uses the weak comparison
+            tags = {
+                tag.removeprefix("W/") for tag in parse_etags(if_none_match)
+            }
+            not_modified = etag in tags or "*" in tags
+        else:
+            not_modified = (
+                if_modified_since is not None
+                and last_modified is not None
+                and int(last_modified) <= if_modified_since
+            )
+        if not_modified:
+            response = Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                for name, value in headers.items():
+                    response[name] = value
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,74 @@
+from itertools import islice
+
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000
+
+JOURNEY_EXPORT_COLUMNS = {
+    "id": "id",
+    "departure_time": "departure_time",
+    "arrival_time": "arrival_time",
+    "route_from": "route__source__name",
+    "route_to": "route__destination__name",
+    "train_name": "train__name",
+    "seats_capacity": "seats_capacity",
+    "seats_sold": "seats_sold",
+    "seats_held": "seats_held",
+    "tickets_available": "tickets_available",
+}
+
+TICKET_EXPORT_COLUMNS = {
+    "id": "id",
+    "journey": "journey_id",
+    "departure_time": "journey__departure_time",
+    "route_from": "journey__route__source__name",
+    "route_to": "journey__route__destination__name",
+    "train_name": "journey__train__name",
+    "cargo": "cargo",
+    "seat": "seat",
+    "order": "order_id",
+    "ordered_at": "order__created_at",
+    "passenger": "order__user__email",
+}
+
+
+def stream_rows(renderer, columns: dict, queryset, chunk_size):
+    """
+    Outside a transaction Django declares the server-side cursor WITH
+    HOLD, which makes PostgreSQL materialize the whole result before the
+    first row. Reading inside atomic() keeps it a plain cursor that is
+    fetched as the response is sent.
+    """
+    names = list(columns)
+    header = renderer.render_header(names)
+    if header:
+        yield header
+    with transaction.atomic():
+        rows = queryset.values_list(*columns.values()).iterator(
+            chunk_size=chunk_size
+        )
+        while chunk := list(islice(rows, chunk_size)):
+            yield renderer.render_rows(names, chunk)
+
+
+def export_response(
+    renderer, columns: dict, queryset, filename: str
+) -> StreamingHttpResponse:
+    """
+    Stream queryset as renderer's format, chunk by chunk. On PostgreSQL
+    iterator() reads through a server-side cursor, so memory use does not
+    depend on the number of rows and the first chunk is sent right away.
+    """
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type += f"; charset={renderer.charset}"
+    return StreamingHttpResponse(
+        stream_rows(renderer, columns, queryset, EXPORT_CHUNK_SIZE),
+        content_type=content_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{filename}.{renderer.format}"'
+            ),
+        },
+    )
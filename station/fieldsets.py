@@ -0,0 +1,278 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_paths(value: str) -> dict:
+    """"a,b.c,b.d" as {"a": {}, "b": {"c": {}, "d": {}}}"""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in filter(None, path.strip().split(".")):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def fields_of(serializer):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    return serializer.fields
+
+
+def model_field(model, name: str):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def slug_path(field) -> list[str]:
+    return field.slug_field.replace("__", ".").split(".")
+
+
+class Fieldset:
+    """
+    Parsed ?fields= and ?expand= of a request.
+
+    fields keeps the listed fields, dotted paths pick fields of nested
+    objects (?fields=id,route.source). Once ?expand= is given, nested
+    objects it does not list are sent as primary keys
+    (?expand=route,route.source).
+    """
+
+    def __init__(self, fields: str | None, expand: str | None):
+        self.fields = parse_paths(fields) if fields is not None else None
+        self.expand = parse_paths(expand) if expand is not None else None
+
+    def prune(self, serializer) -> None:
+        self.prune_fields(fields_of(serializer), self.fields, self.expand)
+
+    def prune_fields(self, fields, selected, expand, path="") -> None:
+        if selected:
+            unknown = [name for name in selected if name not in fields]
+            if unknown:
+                raise ValidationError(
+                    {"fields": [f"Unknown field {path}{unknown[0]}"]}
+                )
+            for name in list(fields):
+                if name not in selected:
+                    fields.pop(name)
+
+        nested = {
+            name: field
+            for name, field in fields.items()
+            if isinstance(field, serializers.BaseSerializer)
+        }
+        for name in expand or ():
+            if name not in nested:
+                raise ValidationError(
+                    {"expand": [f"{path}{name} cannot be expanded"]}
+                )
+
+        for name, field in fields.items():
+            narrowed = selected.get(name) if selected else None
+            if name not in nested:
+                if narrowed:
+                    raise ValidationError(
+                        {"fields": [f"{path}{name} has no fields"]}
+                    )
+                continue
+            if expand is not None and name not in expand:
+                if narrowed:
+                    raise ValidationError(
+                        {"fields": [f"{path}{name} is not expanded"]}
+                    )
+                fields[name] = self.primary_key(name, field)
+                continue
+            self.prune_fields(
+                fields_of(field),
+                narrowed,
+                expand[name] if expand is not None else None,
+                f"{path}{name}.",
+            )
+
+    @staticmethod
+    def primary_key(name: str, field):
+        options = {"read_only": True}
+        if isinstance(field, serializers.ListSerializer):
+            options["many"] = True
+        if field.source != name:
+            options["source"] = field.source
+        return serializers.PrimaryKeyRelatedField(**options)
+
+
+class QueryPlan:
+    """
+    select_related(), prefetch_related() and only() of a queryset for the
+    fields of a serializer. Columns behind anything but model fields
+    (properties, methods) are all loaded, prefetches given as Prefetch
+    keep their queryset, annotations included.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+        self.select = []
+        self.columns = []
+        self.prefetches = []
+        self.prefetched = {
+            lookup.prefetch_to: lookup.queryset
+            for lookup in queryset._prefetch_related_lookups
+            if isinstance(lookup, Prefetch) and lookup.queryset is not None
+        }
+
+    def all_columns(self, model, prefix: str) -> None:
+        self.columns.extend(
+            prefix + field.name for field in model._meta.concrete_fields
+        )
+
+    def join(self, model, attrs: list[str], prefix: str):
+        """
+        Follow forward relations along attrs with select_related(), the
+        model and column prefix reached, None for anything else
+        """
+        for name in attrs:
+            field = model_field(model, name)
+            if field is None or not field.concrete or not field.is_relation:
+                return None, prefix
+            self.columns.append(prefix + name)
+            prefix += f"{name}__"
+            self.select.append(prefix[:-2])
+            model = field.related_model
+        return model, prefix
+
+    def column(self, model, attrs: list[str], prefix: str) -> None:
+        related, prefix_reached = self.join(model, attrs[:-1], prefix)
+        if related is None:
+            self.all_columns(model, prefix)
+            return
+        field = model_field(related, attrs[-1])
+        if field is None or not field.concrete:
+            self.all_columns(related, prefix_reached)
+        else:
+            self.columns.append(prefix_reached + attrs[-1])
+
+    def prefetch(
+        self, model, name: str, prefix: str, fields=None, slug=None
+    ) -> None:
+        """
+        Prefetch the relation with the columns of fields, or of the slug
+        path of a many related field, or just primary keys
+        """
+        relation = model._meta.get_field(name)
+        related = relation.related_model
+        plan = QueryPlan(
+            self.prefetched.get(
+                prefix + name, related._default_manager.all()
+            )
+        )
+        if fields is not None:
+            plan.add(related, fields)
+        elif slug is not None:
+            plan.column(related, slug, "")
+        if relation.concrete:
+            self.columns.append(prefix + name)
+        elif relation.one_to_many:
+            # Rows are matched to their parent by this column
+            plan.columns.append(relation.field.name)
+        self.prefetches.append(
+            Prefetch(prefix + name, queryset=plan.apply())
+        )
+
+    def add(self, model, fields, prefix: str = "") -> None:
+        annotations = self.queryset.query.annotations if not prefix else {}
+        for field in fields.values():
+            if field.source == "*":
+                self.all_columns(model, prefix)
+                continue
+            attrs = field.source_attrs
+            if attrs[0] in annotations:
+                continue
+            related, joined = self.join(model, attrs[:-1], prefix)
+            if related is None:
+                self.all_columns(model, prefix)
+                continue
+            name = attrs[-1]
+            relation = model_field(related, name)
+            many = relation is not None and (
+                relation.many_to_many or relation.one_to_many
+            )
+
+            if isinstance(field, serializers.ListSerializer) and many:
+                self.prefetch(related, name, joined, fields=fields_of(field))
+            elif isinstance(field, serializers.ManyRelatedField) and many:
+                child = field.child_relation
+                self.prefetch(
+                    related,
+                    name,
+                    joined,
+                    slug=(
+                        slug_path(child)
+                        if isinstance(child, serializers.SlugRelatedField)
+                        else None
+                    ),
+                )
+            elif (
+                isinstance(field, serializers.BaseSerializer)
+                and joined + name in self.prefetched
+            ):
+                self.prefetch(related, name, joined, fields=fields_of(field))
+            elif isinstance(field, serializers.BaseSerializer):
+                nested, nested_prefix = self.join(related, [name], joined)
+                if nested is None:
+                    self.all_columns(related, joined)
+                else:
+                    self.add(nested, fields_of(field), nested_prefix)
+            elif isinstance(field, serializers.SlugRelatedField):
+                self.column(related, [name, *slug_path(field)], joined)
+            else:
+                self.column(related, [name], joined)
+
+    def apply(self):
+        queryset = self.queryset.select_related(None).prefetch_related(None)
+        if self.select:
+            queryset = queryset.select_related(*dict.fromkeys(self.select))
+        if self.prefetches:
+            queryset = queryset.prefetch_related(*self.prefetches)
+        return queryset.only(
+            self.queryset.model._meta.pk.name, *dict.fromkeys(self.columns)
+        )
+
+
+class FieldsetMixin:
+    """
+    ?fields= and ?expand= for GET requests of fieldset_actions: fields
+    left out are dropped from the serializer and the queryset only joins,
+    prefetches and loads what the remaining fields read.
+    """
+
+    fieldset_actions = ("list", "retrieve")
+
+    def get_fieldset(self) -> Fieldset | None:
+        if not hasattr(self, "_fieldset"):
+            params = self.request.query_params
+            self._fieldset = None
+            if (
+                self.request.method == "GET"
+                and self.action in self.fieldset_actions
+                and ("fields" in params or "expand" in params)
+            ):
+                self._fieldset = Fieldset(
+                    params.get("fields"), params.get("expand")
+                )
+        return self._fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            fieldset.prune(serializer)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_fieldset() is None:
+            return queryset
+        plan = QueryPlan(queryset)
+        plan.add(queryset.model, self.get_serializer().fields)
+        return plan.apply()
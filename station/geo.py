@@ -0,0 +1,124 @@
+import logging
+import threading
+from math import asin, cos, floor, radians, sin, sqrt
+
+from django.db import DatabaseError
+
+from station.models import StationModel
+from station.response_cache import cache_versions
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195
+
+
+def haversine(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(radians, (lat1, lon1, lat2, lon2))
+    a = (
+        sin((lat2 - lat1) / 2) ** 2
+        + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+class StationGrid:
+    """
+    Stations bucketed into fixed latitude/longitude cells.
+
+    A radius query only visits the cells overlapping the bounding box of
+    the circle, so distances are computed for nearby stations only.
+    """
+
+    def __init__(self, stations, cell_size: float = 0.25):
+        self.cell_size = cell_size
+        self.columns = round(360 / cell_size)
+        self.cells = {}
+        self.count = 0
+        self.version = None
+        for station in stations:
+            self.cells.setdefault(
+                self.cell(station[2], station[3]), []
+            ).append(station)
+            self.count += 1
+
+    @classmethod
+    def from_db(cls) -> "StationGrid":
+        return cls(
+            StationModel.objects.values_list(
+                "id", "name", "latitude", "longitude"
+            ).iterator(chunk_size=5000)
+        )
+
+    def __len__(self):
+        return self.count
+
+    def cell(self, latitude, longitude) -> tuple[int, int]:
+        return (
+            floor(latitude / self.cell_size),
+            floor(longitude / self.cell_size) % self.columns,
+        )
+
+    def nearby(
+        self, latitude, longitude, radius: float, limit: int = 10
+    ) -> list[tuple[float, tuple]]:
+        """(distance in km, station row) pairs within radius, closest first"""
+        lat_delta = radius / KM_PER_DEGREE
+        lon_scale = cos(radians(min(abs(latitude) + lat_delta, 89.9)))
+        lon_delta = min(radius / (KM_PER_DEGREE * lon_scale), 180)
+
+        low_row, low_column = self.cell(
+            latitude - lat_delta, longitude - lon_delta
+        )
+        high_row, _ = self.cell(latitude + lat_delta, longitude + lon_delta)
+        width = min(
+            floor((longitude + lon_delta) / self.cell_size)
+            - floor((longitude - lon_delta) / self.cell_size) + 1,
+            self.columns,
+        )
+
+        found = []
+        for row in range(low_row, high_row + 1):
+            for offset in range(width):
+                column = (low_column + offset) % self.columns
+                for station in self.cells.get((row, column), ()):
+                    distance = haversine(
+                        latitude, longitude, station[2], station[3]
+                    )
+                    if distance <= radius:
+                        found.append((distance, station))
+        found.sort(key=lambda item: (item[0], item[1][0]))
+        return found[:limit]
+
+
+logger = logging.getLogger(__name__)
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def get_station_grid() -> StationGrid:
+    """
+    The grid, rebuilt once a station write of any process moved the
+    shared station cache version
+    """
+    global _grid
+    version = cache_versions([StationModel])[0]
+    grid = _grid
+    if grid is None or grid.version != version:
+        with _grid_lock:
+            if _grid is grid:
+                _grid = StationGrid.from_db()
+                _grid.version = version
+            grid = _grid
+    return grid
+
+
+def warm_station_grid() -> None:
+    try:
+        get_station_grid()
+    except DatabaseError:
+        logger.warning("Station grid is not built yet")
+
+
+def invalidate_station_grid() -> None:
+    global _grid
+    _grid = None
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from station.models import JourneyModel, SeatHoldModel, TicketModel
+
+
+def seats_filter(seats: set) -> dict:
+    journey_ids, cargos, places = (set(column) for column in zip(*seats))
+    return {
+        "journey_id__in": journey_ids,
+        "cargo__in": cargos,
+        "seat__in": places,
+    }
+
+
+def check_seats_free(seats: set, field: str) -> None:
+    """Raise if any (journey_id, cargo, seat) already has a ticket"""
+    taken = seats & set(
+        TicketModel.objects.filter(**seats_filter(seats)).values_list(
+            "journey_id", "cargo", "seat"
+        )
+    )
+    if taken:
+        raise ValidationError(
+            {
+                field: [
+                    f"Journey {journey_id}: cargo {cargo}, "
+                    f"seat {seat} is already taken"
+                    for journey_id, cargo, seat in sorted(taken)
+                ]
+            }
+        )
+
+
+def claim_holds(seats: set, user, field: str = "tickets") -> list:
+    """
+    (id, journey_id) of holds to release for seats: the user's own on them
+    and every expired hold of their journeys, so seats_held stops counting
+    expired holds once a journey is written instead of when the sweeper
+    runs. Raise if another passenger holds one of the seats. Callers must
+    hold the journey locks.
+    """
+    now = timezone.now()
+    claimed, blocked = [], []
+    holds = SeatHoldModel.objects.filter(
+        Q(**seats_filter(seats))
+        | Q(
+            journey_id__in={journey_id for journey_id, _, _ in seats},
+            expires_at__lte=now,
+        )
+    ).values_list("id", "journey_id", "cargo", "seat", "user_id", "expires_at")
+    for hold_id, journey_id, cargo, seat, user_id, expires_at in holds:
+        if expires_at <= now:
+            claimed.append((hold_id, journey_id))
+        elif (journey_id, cargo, seat) not in seats:
+            continue
+        elif user_id == user.id:
+            claimed.append((hold_id, journey_id))
+        else:
+            blocked.append((journey_id, cargo, seat))
+    if blocked:
+        raise ValidationError(
+            {
+                field: [
+                    f"Journey {journey_id}: cargo {cargo}, "
+                    f"seat {seat} is held by another passenger"
+                    for journey_id, cargo, seat in sorted(blocked)
+                ]
+            }
+        )
+    return claimed
+
+
+def hold_seats(journey: JourneyModel, user, seats: list) -> list:
+    """Reserve (cargo, seat) pairs for user until SEAT_HOLD_TTL passes"""
+    expires_at = timezone.now() + settings.SEAT_HOLD_TTL
+    requested = {(journey.id, cargo, seat) for cargo, seat in seats}
+    with transaction.atomic():
+        JourneyModel.lock([journey.id])
+        check_seats_free(requested, "seats")
+        SeatHoldModel.release(claim_holds(requested, user, "seats"))
+        holds = SeatHoldModel.objects.bulk_create(
+            SeatHoldModel(
+                journey=journey,
+                cargo=cargo,
+                seat=seat,
+                user=user,
+                expires_at=expires_at,
+            )
+            for cargo, seat in seats
+        )
+        JourneyModel.hold_seats(journey.id, len(holds))
+    return holds
+
+
+def release_holds(journey: JourneyModel, user) -> int:
+    with transaction.atomic():
+        JourneyModel.lock([journey.id])
+        return SeatHoldModel.release(
+            SeatHoldModel.objects.filter(journey=journey, user=user)
+            .values_list("id", "journey_id")
+        )
+
+
+def sweep_expired_holds(batch_size: int = 1000) -> int:
+    """Release up to batch_size expired holds, oldest first"""
+    now = timezone.now()
+    journey_ids = set(
+        SeatHoldModel.objects.filter(expires_at__lte=now)
+        .order_by("expires_at")
+        .values_list("journey_id", flat=True)[:batch_size]
+    )
+    if not journey_ids:
+        return 0
+    with transaction.atomic():
+        JourneyModel.lock(journey_ids)
+        return SeatHoldModel.release(
+            SeatHoldModel.objects.filter(
+                journey_id__in=journey_ids, expires_at__lte=now
+            )
+            .order_by("expires_at")
+            .values_list("id", "journey_id")[:batch_size]
+        )
@@ -0,0 +1,87 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from station.models import IdempotencyKeyModel
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(request) -> str:
+    body = json.dumps(
+        request.data, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(
+        f"{request.method} {request.path}\n{body}".encode()
+    ).hexdigest()
+
+
+def idempotent(request, handler) -> Response:
+    """
+    Run handler once per (user, Idempotency-Key) and replay its successful
+    response to retries.
+
+    The key row is inserted in the same transaction as the handler's
+    writes, so a concurrent duplicate waits on the unique index until the
+    first request commits and then replays its result. Failed attempts roll
+    back together with the key and may be retried.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return handler()
+    if len(key) > 255:
+        raise ValidationError(
+            {IDEMPOTENCY_HEADER: ["Ensure it has no more than 255 characters"]}
+        )
+
+    fingerprint = request_fingerprint(request)
+    with transaction.atomic():
+        IdempotencyKeyModel.objects.filter(
+            user=request.user,
+            key=key,
+            created_at__lte=timezone.now() - settings.IDEMPOTENCY_KEY_TTL,
+        ).delete()
+        record, created = IdempotencyKeyModel.objects.get_or_create(
+            user=request.user, key=key, defaults={"fingerprint": fingerprint}
+        )
+        if not created:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {
+                        IDEMPOTENCY_HEADER: [
+                            "The key was already used for a different request"
+                        ]
+                    },
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return Response(
+                record.response,
+                status=record.status_code,
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        response = handler()
+        if status.is_success(response.status_code):
+            record.status_code = response.status_code
+            record.response = response.data
+            record.save(update_fields=["status_code", "response"])
+        else:
+            transaction.set_rollback(True)
+        return response
+
+
+def purge_idempotency_keys(batch_size: int = 1000) -> int:
+    """Delete up to batch_size keys older than IDEMPOTENCY_KEY_TTL"""
+    expired = IdempotencyKeyModel.objects.filter(
+        created_at__lte=timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    ).values_list("id", flat=True)[:batch_size]
+    deleted, _ = IdempotencyKeyModel.objects.filter(
+        pk__in=list(expired)
+    ).delete()
+    return deleted
@@ -0,0 +1,125 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from statistics import quantiles
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from station.models import (
+    TrainTypeModel,
+    TrainModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+)
+from station.serializers import OrderSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Book seats of one journey from many threads at once and report "
+        "bookings per second and the conflict rate. Creates its own "
+        "journey and removes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--attempts", type=int, default=50)
+        parser.add_argument("--cargo-num", type=int, default=20)
+        parser.add_argument("--places-in-cargo", type=int, default=30)
+        parser.add_argument("--seats-per-order", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        train_type = TrainTypeModel.objects.create(name="Benchmark")
+        train = TrainModel.objects.create(
+            name="Benchmark",
+            cargo_num=options["cargo_num"],
+            places_in_cargo=options["places_in_cargo"],
+            train_type=train_type,
+        )
+        station = StationModel.objects.create(
+            name="Benchmark", latitude=0, longitude=0
+        )
+        route = RouteModel.objects.create(
+            source=station, destination=station, distance=1
+        )
+        journey = JourneyModel.objects.create(
+            route=route,
+            train=train,
+            departure_time=timezone.now() + timedelta(days=1),
+            arrival_time=timezone.now() + timedelta(days=2),
+        )
+        user = get_user_model().objects.create_user(
+            email=f"benchmark-{journey.id}@example.com", password="benchmark"
+        )
+
+        booked, conflicts, latencies = [], [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(options["threads"])
+
+        def buyer(number):
+            rng = random.Random(options["seed"] + number)
+            barrier.wait()
+            try:
+                for _ in range(options["attempts"]):
+                    tickets = [
+                        {
+                            "journey": journey.id,
+                            "cargo": rng.randint(1, options["cargo_num"]),
+                            "seat": rng.randint(
+                                1, options["places_in_cargo"]
+                            ),
+                        }
+                        for _ in range(options["seats_per_order"])
+                    ]
+                    started = time.perf_counter()
+                    serializer = OrderSerializer(data={"tickets": tickets})
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save(user=user)
+                        result = booked
+                    except ValidationError:
+                        result = conflicts
+                    with lock:
+                        result.append(1)
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=buyer, args=(number,))
+            for number in range(options["threads"])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        journey.refresh_from_db()
+        sold = journey.tickets.count()
+        attempts = len(booked) + len(conflicts)
+        p50, p99 = (
+            quantiles(latencies, n=100)[index] * 1000 for index in (49, 98)
+        )
+        self.stdout.write(
+            f"{options['threads']} threads, {attempts} attempts in "
+            f"{elapsed:.2f} s\n"
+            f"bookings: {len(booked) / elapsed:,.1f}/s, "
+            f"conflict rate: {len(conflicts) / attempts:.1%}\n"
+            f"latency p50 {p50:.1f} ms, p99 {p99:.1f} ms\n"
+            f"tickets sold: {sold}, seats_sold counter: {journey.seats_sold}"
+        )
+        if sold != journey.seats_sold:
+            self.stderr.write("Seat counter drifted from the ticket table")
+
+        user.delete()
+        train_type.delete()
+        station.delete()
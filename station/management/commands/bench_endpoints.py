@@ -0,0 +1,427 @@
+import json
+import random
+import time
+import tracemalloc
+from collections import deque
+from itertools import count
+from statistics import median
+from typing import Callable, NamedTuple
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from station.benchmarks import CARGO_NUM, PLACES_IN_CARGO, seed_dataset
+from station.geo import invalidate_station_grid
+from station.matcher import invalidate_station_matcher
+from station.models import (
+    TrainTypeModel,
+    CrewModel,
+    StationModel,
+    RouteModel,
+)
+from station.response_cache import bump_cache_version
+from station.seatmap import seat_map_key
+from station.timetable import set_timetable
+from station.urls import router
+from user.urls import urlpatterns as user_urlpatterns
+
+# Writing uploaded images to MEDIA_ROOT would outlive the rollback
+SKIPPED = {"train-upload-image", "station-upload-image"}
+
+BENCH_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "bench-endpoints",
+    }
+}
+
+
+class Case(NamedTuple):
+    name: str
+    method: str
+    url: Callable
+    data: Callable = dict
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed datasets of growing size and request every station and user "
+        "endpoint against each, reporting queries, median wall time and "
+        "peak Python memory. Fails when an endpoint's query count grows "
+        "with the data or its latency regresses past --baseline. Runs on "
+        "a throwaway test database and a private local memory cache, every "
+        "dataset is seeded in a transaction that is rolled back and "
+        "responses are never served from the response cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            nargs="+",
+            default=["10:1", "100:10", "1000:100", "10000:1000"],
+            help="journeys:tickets_per_order pairs, smallest first",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--baseline",
+            help="JSON file with median milliseconds per endpoint and scale",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write this run's timings to --baseline instead of "
+                 "comparing with it",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Allowed slowdown against the baseline, 0.5 is +50%%",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Drop a leftover test database without asking",
+        )
+
+    def handle(self, *args, **options):
+        scales = []
+        for scale in options["scales"]:
+            try:
+                journeys, tickets = map(int, scale.split(":"))
+            except ValueError:
+                raise CommandError(f"Invalid scale {scale!r}")
+            scales.append((journeys, tickets))
+
+        for journeys, tickets in scales:
+            if tickets * 3 > journeys * CARGO_NUM * PLACES_IN_CARGO:
+                raise CommandError(
+                    f"{journeys} journeys cannot hold 3 orders of {tickets} "
+                    f"tickets"
+                )
+
+        results = {}
+        # Only the seeded rows are measured, and the shared cache of the
+        # running site is neither read nor written
+        database = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options["interactive"]
+        )
+        try:
+            # Every measured request runs its queries
+            with (
+                override_settings(CACHES=BENCH_CACHES, RESPONSE_CACHE=False),
+                # Throttling would stop the run after a few hundred requests
+                mock.patch.object(APIView, "throttle_classes", ()),
+            ):
+                for journeys, tickets in scales:
+                    label = f"{journeys}:{tickets}"
+                    results[label] = self.run_scale(
+                        journeys, tickets, options["repeat"], options["seed"]
+                    )
+        finally:
+            connection.creation.destroy_test_db(database, verbosity=0)
+
+        self.report_uncovered()
+        problems = self.query_growth(results)
+        if options["baseline"]:
+            if options["save_baseline"]:
+                self.save_baseline(options["baseline"], results)
+            else:
+                problems += self.regressions(
+                    options["baseline"], results, options["tolerance"]
+                )
+        if problems:
+            raise CommandError("\n".join(problems))
+        self.stdout.write(self.style.SUCCESS("No regressions found"))
+
+    def run_scale(self, journeys, tickets, repeat, seed) -> dict:
+        results = {}
+        with transaction.atomic():
+            self.reset_memory_structures()
+            self.dataset = seed_dataset(
+                journeys, tickets, random.Random(seed)
+            )
+            # Not in INTERNAL_IPS, so the debug toolbar stays out of timings
+            self.client = APIClient(
+                SERVER_NAME="localhost", REMOTE_ADDR="192.0.2.1"
+            )
+            self.client.force_authenticate(self.dataset["user"])
+
+            self.stdout.write(
+                f"\n{journeys} journeys, {tickets} tickets per order\n"
+                f"{'endpoint':32} {'queries':>8} {'median ms':>10} "
+                f"{'peak KiB':>9}"
+            )
+            for case in self.cases():
+                self.request(case)
+                timings, queries, peak = [], 0, 0
+                for _ in range(repeat):
+                    tracemalloc.start()
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        response = self.request(case)
+                        timings.append(time.perf_counter() - started)
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    queries = max(queries, len(captured))
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f"{case.name} returned {response.status_code}: "
+                        f"{getattr(response, 'data', '')}"
+                    )
+                results[case.name] = {
+                    "queries": queries,
+                    "ms": round(median(timings) * 1000, 3),
+                    "peak_kib": round(peak / 1024, 1),
+                }
+                self.stdout.write(
+                    f"{case.name:32} {queries:>8} "
+                    f"{results[case.name]['ms']:>10} "
+                    f"{results[case.name]['peak_kib']:>9}"
+                )
+            cache.delete_many(
+                [
+                    seat_map_key(journey_id)
+                    for journey_id in self.dataset["journey_ids"]
+                ]
+            )
+            transaction.set_rollback(True)
+        self.reset_memory_structures()
+        return results
+
+    @staticmethod
+    def reset_memory_structures():
+        set_timetable(None)
+        invalidate_station_matcher()
+        invalidate_station_grid()
+        # bulk_create sends no signals
+        for model in (TrainTypeModel, CrewModel, StationModel, RouteModel):
+            bump_cache_version(model)
+
+    def request(self, case: Case):
+        method = getattr(self.client, case.method.lower())
+        data = case.data()
+        if case.method == "GET":
+            response = method(case.url(), data)
+            if response.streaming:
+                # Rows are only read from the database while streaming
+                deque(response.streaming_content, maxlen=0)
+            return response
+        return method(case.url(), data, format="json")
+
+    def cases(self) -> list[Case]:
+        data = self.dataset
+        numbers = count()
+        seats = count()
+
+        def free_seat():
+            index = next(seats)
+            return {
+                "cargo": index // PLACES_IN_CARGO + 1,
+                "seat": index % PLACES_IN_CARGO + 1,
+            }
+
+        def url(name, *args):
+            return lambda: reverse(name, args=args)
+
+        return [
+            Case("api-root", "GET", url("station:api-root")),
+            Case("train_type-list", "GET", url("station:train_type-list")),
+            Case(
+                "train_type-detail",
+                "GET",
+                url("station:train_type-detail", data["train_type_id"]),
+            ),
+            Case("train-list", "GET", url("station:train-list")),
+            Case(
+                "train-detail",
+                "GET",
+                url("station:train-detail", data["train_id"]),
+            ),
+            Case("crew-list", "GET", url("station:crew-list")),
+            Case(
+                "crew-detail",
+                "GET",
+                url("station:crew-detail", data["crew_id"]),
+            ),
+            Case("station-list", "GET", url("station:station-list")),
+            Case(
+                "station-detail",
+                "GET",
+                url("station:station-detail", data["station_ids"][0]),
+            ),
+            Case(
+                "station-autocomplete",
+                "GET",
+                url("station:station-autocomplete"),
+                lambda: {"q": "Station 1"},
+            ),
+            Case(
+                "station-nearby",
+                "GET",
+                url("station:station-nearby"),
+                lambda: {"lat": 49, "lon": 31, "radius": 200},
+            ),
+            Case("route-list", "GET", url("station:route-list")),
+            Case(
+                "route-detail",
+                "GET",
+                url("station:route-detail", data["route_id"]),
+            ),
+            Case("journey-list", "GET", url("station:journey-list")),
+            Case(
+                "journey-list-cursor",
+                "GET",
+                url("station:journey-list"),
+                lambda: {"pagination": "cursor"},
+            ),
+            Case(
+                "journey-list-search",
+                "GET",
+                url("station:journey-list"),
+                lambda: {"from": "Station 1", "date_from": "2024-01-01"},
+            ),
+            Case(
+                "journey-detail",
+                "GET",
+                url("station:journey-detail", data["journey_ids"][0]),
+            ),
+            Case(
+                "journey-seats",
+                "GET",
+                url("station:journey-seats", data["order_journey_id"]),
+            ),
+            Case(
+                "journey-hold",
+                "POST",
+                url("station:journey-hold", data["free_journey_id"]),
+                lambda: {"seats": [free_seat()]},
+            ),
+            Case(
+                "journey-plan",
+                "GET",
+                url("station:journey-plan"),
+                lambda: {
+                    "source": data["station_ids"][0],
+                    "destination": data["station_ids"][-1],
+                    "departure": "2024-01-01T00:00:00Z",
+                },
+            ),
+            Case(
+                "journey-export",
+                "GET",
+                url("station:journey-export"),
+            ),
+            Case(
+                "journey-manifest",
+                "GET",
+                url("station:journey-manifest"),
+                lambda: {"format": "csv"},
+            ),
+            Case("timetable", "GET", url("station:timetable")),
+            Case("order-list", "GET", url("station:order-list")),
+            Case(
+                "order-detail",
+                "GET",
+                url("station:order-detail", data["order_id"]),
+            ),
+            Case(
+                "order-create",
+                "POST",
+                url("station:order-list"),
+                lambda: {
+                    "tickets": [
+                        {"journey": data["free_journey_id"], **free_seat()}
+                    ]
+                },
+            ),
+            Case("manage_user", "GET", url("user:manage_user")),
+            Case(
+                "user_create",
+                "POST",
+                url("user:user_create"),
+                lambda: {
+                    "email": f"bench-{next(numbers)}@example.com",
+                    "password": "benchmark",
+                },
+            ),
+            Case(
+                "token_obtain_pair",
+                "POST",
+                url("user:token_obtain_pair"),
+                lambda: {
+                    "email": data["user"].email,
+                    "password": "benchmark",
+                },
+            ),
+            Case(
+                "token_refresh",
+                "POST",
+                url("user:token_refresh"),
+                lambda: {"refresh": data["refresh"]},
+            ),
+            Case(
+                "token_verify",
+                "POST",
+                url("user:token_verify"),
+                lambda: {"token": data["access"]},
+            ),
+        ]
+
+    def report_uncovered(self):
+        covered = {
+            case.name.removesuffix("-cursor").removesuffix("-search")
+            for case in self.cases()
+        }
+        names = {url.name for url in router.urls} | {
+            url.name for url in user_urlpatterns
+        }
+        for name in sorted(names - covered):
+            reason = "skipped" if name in SKIPPED else "not benchmarked"
+            self.stdout.write(self.style.WARNING(f"{name}: {reason}"))
+
+    @staticmethod
+    def query_growth(results: dict) -> list[str]:
+        labels = list(results)
+        smallest, largest = results[labels[0]], results[labels[-1]]
+        return [
+            f"{name}: {smallest[name]['queries']} queries at {labels[0]}, "
+            f"{largest[name]['queries']} at {labels[-1]}"
+            for name in smallest
+            if largest[name]["queries"] > smallest[name]["queries"]
+        ]
+
+    @staticmethod
+    def regressions(path: str, results: dict, tolerance: float) -> list:
+        try:
+            with open(path) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            raise CommandError(f"No baseline at {path}, run --save-baseline")
+        problems = []
+        for label, cases in results.items():
+            for name, result in cases.items():
+                expected = baseline.get(label, {}).get(name)
+                if expected and result["ms"] > expected["ms"] * (
+                    1 + tolerance
+                ):
+                    problems.append(
+                        f"{name} at {label}: {result['ms']} ms, "
+                        f"baseline {expected['ms']} ms"
+                    )
+        return problems
+
+    def save_baseline(self, path: str, results: dict):
+        with open(path, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        self.stdout.write(f"Baseline written to {path}")
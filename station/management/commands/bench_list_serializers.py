@@ -0,0 +1,99 @@
+import random
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from station.benchmarks import seed_dataset
+from station.models import JourneyModel, RouteModel
+from station.serializers import (
+    JourneyListSerializer,
+    JourneyListValuesSerializer,
+    RouteListSerializer,
+    RouteListValuesSerializer,
+)
+from station.views import TICKETS_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the model serializers of the journey and route list "
+        "actions with their values_list() stand-ins, query included. "
+        "Fails when the rendered pages differ by a single byte. The "
+        "dataset is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        self.stdout.write(
+            f"{'list':8} {'serializer':8} {'ms':>8} {'us/row':>8} "
+            f"{'speedup':>8}"
+        )
+        with transaction.atomic():
+            seed_dataset(rows, 1, random.Random(options["seed"]))
+            journeys = (
+                JourneyModel.objects.annotate(
+                    tickets_available=TICKETS_AVAILABLE
+                )
+                .select_related()
+                .prefetch_related("crews")
+                .order_by("-id")
+            )
+            routes = RouteModel.objects.select_related(
+                "source", "destination"
+            ).order_by("-id")
+            for name, queryset, model_serializer, values_serializer in (
+                (
+                    "journey",
+                    journeys,
+                    JourneyListSerializer,
+                    JourneyListValuesSerializer,
+                ),
+                (
+                    "route",
+                    routes,
+                    RouteListSerializer,
+                    RouteListValuesSerializer,
+                ),
+            ):
+                self.compare(
+                    name,
+                    lambda: model_serializer(
+                        queryset[:rows], many=True
+                    ).data,
+                    lambda: values_serializer(
+                        values_serializer.rows(queryset)[:rows], many=True
+                    ).data,
+                    min(rows, queryset.count()),
+                    repeat,
+                )
+            transaction.set_rollback(True)
+
+    def compare(self, name, model_data, values_data, rows, repeat):
+        renderer = JSONRenderer()
+        if renderer.render(model_data()) != renderer.render(values_data()):
+            raise CommandError(f"{name}: serializers disagree")
+
+        model = self.measure(model_data, repeat)
+        values = self.measure(values_data, repeat)
+        for label, elapsed in (("model", model), ("values", values)):
+            self.stdout.write(
+                f"{name:8} {label:8} {elapsed:>8.2f} "
+                f"{elapsed * 1000 / rows:>8.1f} {model / elapsed:>7.1f}x"
+            )
+
+    @staticmethod
+    def measure(call, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return median(timings) * 1000
@@ -0,0 +1,105 @@
+import io
+import json
+import random
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from station.benchmarks import seed_dataset
+from station.models import JourneyModel, OrderModel, TicketModel
+from station.renderers import (
+    MessagePackParser,
+    MessagePackRenderer,
+    ORJSONParser,
+    ORJSONRenderer,
+)
+from station.serializers import JourneyListSerializer, OrderListSerializer
+from station.views import TICKETS_AVAILABLE
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size, render and parse time of the stock JSON, "
+        "orjson and MessagePack renderers and parsers on journey and order "
+        "list payloads. Fails when the JSON renderers disagree on a single "
+        "byte or MessagePack decodes to other values. The dataset is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            seed_dataset(
+                rows, 1, random.Random(options["seed"]), orders=rows
+            )
+            journeys = (
+                JourneyModel.objects.select_related(
+                    "train", "route__source", "route__destination"
+                )
+                .annotate(tickets_available=TICKETS_AVAILABLE)
+                .prefetch_related("crews")
+            )
+            payloads = {
+                "journey-list": JourneyListSerializer(
+                    journeys.order_by("-id")[:rows], many=True
+                ).data,
+                "order-list": OrderListSerializer(
+                    OrderModel.objects.order_by("-id").prefetch_related(
+                        Prefetch(
+                            "tickets",
+                            queryset=TicketModel.objects.prefetch_related(
+                                Prefetch("journey", queryset=journeys)
+                            ),
+                        )
+                    )[:rows],
+                    many=True,
+                ).data,
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{'payload':14} {'format':8} {'KiB':>8} {'render ms':>10} "
+            f"{'parse ms':>10}"
+        )
+        for name, data in payloads.items():
+            stock = JSONRenderer().render(data)
+            if ORJSONRenderer().render(data) != stock:
+                raise CommandError(f"{name}: JSON renderers disagree")
+            if MessagePackParser().parse(
+                io.BytesIO(MessagePackRenderer().render(data))
+            ) != json.loads(stock):
+                raise CommandError(f"{name}: MessagePack differs from JSON")
+
+            for label, renderer, parser in (
+                ("json", JSONRenderer(), JSONParser()),
+                ("orjson", ORJSONRenderer(), ORJSONParser()),
+                ("msgpack", MessagePackRenderer(), MessagePackParser()),
+            ):
+                body = renderer.render(data)
+                render = self.measure(lambda: renderer.render(data), repeat)
+                parse = self.measure(
+                    lambda: parser.parse(io.BytesIO(body)), repeat
+                )
+                self.stdout.write(
+                    f"{name:14} {label:8} {len(body) / 1024:>8.1f} "
+                    f"{render:>10.2f} {parse:>10.2f}"
+                )
+
+    @staticmethod
+    def measure(call, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return median(timings) * 1000
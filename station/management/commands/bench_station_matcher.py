@@ -0,0 +1,64 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from station.matcher import StationMatcher
+
+SYLLABLES = [
+    "dni", "pro", "ky", "iv", "lvi", "od", "esa", "khar", "zapo", "ri",
+    "zhzhia", "pol", "ta", "va", "su", "my", "che", "rni", "hiv", "vin",
+    "ny", "tsia", "uzh", "ho", "rod", "lut", "sk", "ter", "no", "pil",
+]
+SUFFIXES = ["", " Main", " Passage", "-1", "-2", " Central", " North"]
+
+
+def station_name(rng: random.Random) -> str:
+    name = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+    return name.capitalize() + rng.choice(SUFFIXES)
+
+
+def misspell(rng: random.Random, name: str) -> str:
+    position = rng.randrange(len(name) - 1)
+    return (
+        name[:position] + name[position + 1] + name[position]
+        + name[position + 2:]
+    )
+
+
+class Command(BaseCommand):
+    help = "Measure station name lookups per second on synthetic stations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=10_000)
+        parser.add_argument("--lookups", type=int, default=2_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        names = [station_name(rng) for _ in range(options["stations"])]
+
+        started = time.perf_counter()
+        matcher = StationMatcher(enumerate(names, start=1))
+        self.stdout.write(
+            f"Indexed {len(matcher)} stations "
+            f"({len(matcher.names)} distinct names) in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+        samples = rng.choices(names, k=options["lookups"])
+        workloads = {
+            "substring": [name[: rng.randint(3, 8)] for name in samples],
+            "misspelled": [misspell(rng, name) for name in samples],
+        }
+        for label, queries in workloads.items():
+            resolved = 0
+            started = time.perf_counter()
+            for query in queries:
+                resolved += bool(matcher.resolve(query))
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:>10}: {len(queries) / elapsed:,.0f} lookups/s, "
+                f"{elapsed / len(queries) * 1e6:.0f} us/lookup, "
+                f"{resolved / len(queries):.0%} resolved"
+            )
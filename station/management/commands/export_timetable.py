@@ -0,0 +1,71 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from station.bundles import (
+    BUNDLE_COMPRESSION_LEVEL,
+    TimetableBundle,
+    compress,
+    purge_timetable_deletions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a zstd-compressed timetable bundle, or with --since a delta "
+        "of the changes after an earlier bundle, and delete deletion "
+        "records older than TIMETABLE_DELETION_TTL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=".", help="Directory")
+        parser.add_argument(
+            "--since",
+            type=int,
+            default=None,
+            help="Version of the bundle to write a delta for",
+        )
+        parser.add_argument(
+            "--level", type=int, default=BUNDLE_COMPRESSION_LEVEL
+        )
+
+    def handle(self, *args, **options):
+        purged = 0
+        while batch := purge_timetable_deletions():
+            purged += batch
+        if purged:
+            self.stdout.write(f"Purged {purged} expired deletion records")
+
+        started = time.perf_counter()
+        bundle = TimetableBundle(options["since"])
+        if options["since"] and bundle.since is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Version {options['since']} is older than the kept "
+                    "deletions or the last bulk import, writing a full "
+                    "snapshot"
+                )
+            )
+        path = Path(options["output"]) / f"{bundle.filename}.zst"
+        raw = 0
+
+        def chunks():
+            nonlocal raw
+            for chunk in bundle.chunks():
+                raw += len(chunk)
+                yield chunk
+
+        with open(path, "wb") as file:
+            for data in compress(chunks(), options["level"]):
+                file.write(data)
+
+        size = path.stat().st_size
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{path}: version {bundle.version}, {raw / 1024:.1f} KiB "
+                f"NDJSON compressed to {size / 1024:.1f} KiB "
+                f"(x{raw / max(size, 1):.1f}) in "
+                f"{time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,481 @@
+import csv
+import io
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from station.bulk_load import copy_rows
+from station.geo import haversine
+from station.models import (
+    TrainTypeModel,
+    TrainModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+)
+from station.bundles import record_bulk_import
+from station.response_cache import bump_cache_version
+from station.timetable import bump_timetable_version
+
+# https://gtfs.org/schedule/reference/#routestxt
+ROUTE_TYPES = {
+    "0": "Tram",
+    "1": "Subway",
+    "2": "Rail",
+    "3": "Bus",
+    "4": "Ferry",
+    "5": "Cable tram",
+    "6": "Aerial lift",
+    "7": "Funicular",
+    "11": "Trolleybus",
+    "12": "Monorail",
+}
+WEEKDAYS = [
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday",
+    "sunday",
+]
+# Stops, platforms and stations; entrances and nodes are not boarded
+BOARDING_LOCATION_TYPES = {"", "0", "1"}
+
+
+def parse_gtfs_date(value: str):
+    return datetime.strptime(value, "%Y%m%d").date()
+
+
+def parse_gtfs_time(value: str) -> int | None:
+    """Seconds after the start of the service day, past 24:00:00 too"""
+    if not value:
+        return None
+    hours, minutes, seconds = map(int, value.strip().split(":"))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def station_key(name: str, latitude: float, longitude: float) -> tuple:
+    # About 100 m, so a stop matches a station entered by hand
+    return name, round(latitude, 3), round(longitude, 3)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a GTFS feed (directory or .zip): stops become stations, "
+        "routes become trains, each trip becomes a journey from its first "
+        "to its last stop on every service day from --start for --days. "
+        "Rows already in the database are reused, journeys are written "
+        "with COPY in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("feed", help="GTFS directory or zip file")
+        parser.add_argument(
+            "--start",
+            type=parse_gtfs_date,
+            default=None,
+            help="First service day as YYYYMMDD, today by default",
+        )
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument(
+            "--cargo-num",
+            type=int,
+            default=10,
+            help="Cargos of trains created for GTFS routes",
+        )
+        parser.add_argument(
+            "--places-in-cargo",
+            type=int,
+            default=54,
+            help="Places per cargo of trains created for GTFS routes",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("import_gtfs needs PostgreSQL for COPY")
+        self.feed = Path(options["feed"])
+        if not self.feed.exists():
+            raise CommandError(f"No GTFS feed at {self.feed}")
+        start = options["start"] or timezone.localdate()
+        self.days = [
+            start + timedelta(days=day) for day in range(options["days"])
+        ]
+        self.capacity = (options["cargo_num"], options["places_in_cargo"])
+        self.started = time.perf_counter()
+        self.rows_read = 0
+
+        with self.open_feed():
+            self.tz = self.feed_timezone()
+            with transaction.atomic():
+                self.import_stations()
+                self.import_trains()
+                trips = self.read_trips()
+                services = self.read_services()
+                self.import_routes(trips)
+                journeys = self.import_journeys(trips, services)
+                # bulk_create and COPY send no signals
+                for model in (TrainTypeModel, StationModel, RouteModel):
+                    bump_cache_version(model)
+                transaction.on_commit(bump_timetable_version)
+                transaction.on_commit(record_bulk_import)
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {journeys} journeys from {self.rows_read} GTFS "
+                f"rows in {elapsed:.1f}s ({self.rows_read / elapsed:,.0f} "
+                "rows/s)"
+            )
+        )
+
+    @contextmanager
+    def open_feed(self):
+        if self.feed.is_dir():
+            self.archive = None
+            yield
+            return
+        try:
+            with zipfile.ZipFile(self.feed) as self.archive:
+                yield
+        except zipfile.BadZipFile:
+            raise CommandError(f"{self.feed} is not a directory or zip file")
+
+    def has_file(self, name: str) -> bool:
+        if self.archive is None:
+            return (self.feed / name).exists()
+        return name in self.archive.namelist()
+
+    def read(self, name: str, required: bool = True):
+        """Stream the rows of a feed file as dicts"""
+        if not self.has_file(name):
+            if required:
+                raise CommandError(f"{name} is missing from the feed")
+            return
+        if self.archive is None:
+            file = open(self.feed / name, encoding="utf-8-sig", newline="")
+        else:
+            file = io.TextIOWrapper(
+                self.archive.open(name), encoding="utf-8-sig", newline=""
+            )
+        started, count = time.perf_counter(), 0
+        with file:
+            for row in csv.DictReader(file):
+                count += 1
+                yield row
+        self.rows_read += count
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"{name}: {count} rows ({count / elapsed:,.0f} rows/s)"
+        )
+
+    def feed_timezone(self):
+        agencies = list(self.read("agency.txt", required=False))
+        name = (
+            agencies[0].get("agency_timezone") if agencies else None
+        ) or settings.TIME_ZONE
+        try:
+            return ZoneInfo(name)
+        except ZoneInfoNotFoundError:
+            raise CommandError(f"Unknown agency_timezone {name!r}")
+
+    def import_stations(self):
+        """Map every stop_id to a station, platforms to their parent"""
+        stations = {
+            station_key(name, latitude, longitude): station_id
+            for station_id, name, latitude, longitude in (
+                StationModel.objects.values_list(
+                    "id", "name", "latitude", "longitude"
+                ).iterator()
+            )
+        }
+        stops, parents = {}, {}
+        for row in self.read("stops.txt"):
+            if row.get("location_type", "") not in BOARDING_LOCATION_TYPES:
+                continue
+            try:
+                latitude = float(row["stop_lat"])
+                longitude = float(row["stop_lon"])
+            except (KeyError, ValueError):
+                continue
+            stops[row["stop_id"]] = (row["stop_name"], latitude, longitude)
+            if row.get("parent_station"):
+                parents[row["stop_id"]] = row["parent_station"]
+
+        # Platforms share the station of their parent
+        boarded = {
+            stop_id: stops.get(parents.get(stop_id), stop)
+            for stop_id, stop in stops.items()
+        }
+        new = {}
+        for stop in boarded.values():
+            key = station_key(*stop)
+            if key not in stations:
+                new.setdefault(key, stop)
+        created = StationModel.objects.bulk_create(
+            (
+                StationModel(name=name, latitude=latitude, longitude=longitude)
+                for name, latitude, longitude in new.values()
+            ),
+            batch_size=5000,
+        )
+        stations.update(
+            (
+                station_key(
+                    station.name, station.latitude, station.longitude
+                ),
+                station.id,
+            )
+            for station in created
+        )
+        self.stdout.write(f"stations: {len(created)} new")
+
+        self.stations = {}
+        self.coordinates = {}
+        for stop_id, (name, latitude, longitude) in boarded.items():
+            station_id = stations[station_key(name, latitude, longitude)]
+            self.stations[stop_id] = station_id
+            self.coordinates[station_id] = (latitude, longitude)
+
+    def import_trains(self):
+        """A train, named after the GTFS route, for every route_id"""
+        train_types = dict(
+            TrainTypeModel.objects.values_list("name", "id")
+        )
+        trains = {
+            name: (train_id, cargo_num * places_in_cargo)
+            for name, train_id, cargo_num, places_in_cargo in (
+                TrainModel.objects.values_list(
+                    "name", "id", "cargo_num", "places_in_cargo"
+                )
+            )
+        }
+        routes = {}
+        for row in self.read("routes.txt"):
+            name = (
+                row.get("route_long_name") or row.get("route_short_name")
+                or row["route_id"]
+            )
+            route_type = row.get("route_type", "")
+            routes[row["route_id"]] = (
+                name[:255],
+                ROUTE_TYPES.get(route_type, f"GTFS {route_type}"),
+            )
+
+        for type_name in {type_name for _, type_name in routes.values()}:
+            if type_name not in train_types:
+                train_types[type_name] = TrainTypeModel.objects.create(
+                    name=type_name
+                ).id
+        cargo_num, places_in_cargo = self.capacity
+        created = TrainModel.objects.bulk_create(
+            TrainModel(
+                name=name,
+                cargo_num=cargo_num,
+                places_in_cargo=places_in_cargo,
+                train_type_id=train_types[type_name],
+            )
+            for name, type_name in sorted(set(routes.values()))
+            if name not in trains
+        )
+        trains.update(
+            (train.name, (train.id, cargo_num * places_in_cargo))
+            for train in created
+        )
+        self.stdout.write(f"trains: {len(created)} new")
+        self.trains = {
+            route_id: trains[name] for route_id, (name, _) in routes.items()
+        }
+
+    def read_trips(self) -> dict:
+        """
+        First and last stop of every trip with known stops. stop_times.txt
+        may hold millions of rows in any order, only the ends and the
+        distance covered so far are kept per trip.
+        """
+        trips = {}
+        for row in self.read("trips.txt"):
+            if row["route_id"] in self.trains:
+                trips[row["trip_id"]] = [row["service_id"], row["route_id"]]
+
+        # trip_id -> [first sequence, first station, departure,
+        #             last sequence, last station, arrival, km or None]
+        ends = {}
+        skipped = set()
+        for row in self.read("stop_times.txt"):
+            trip_id = row["trip_id"]
+            if trip_id not in trips or trip_id in skipped:
+                continue
+            station = self.stations.get(row["stop_id"])
+            if station is None:
+                skipped.add(trip_id)
+                continue
+            sequence = int(row["stop_sequence"])
+            arrival = parse_gtfs_time(row.get("arrival_time", ""))
+            departure = parse_gtfs_time(row.get("departure_time", ""))
+            arrival = departure if arrival is None else arrival
+            departure = arrival if departure is None else departure
+
+            trip = ends.get(trip_id)
+            if trip is None:
+                ends[trip_id] = [
+                    sequence, station, departure,
+                    sequence, station, arrival, 0.0,
+                ]
+            elif sequence > trip[3]:
+                if trip[6] is not None:
+                    trip[6] += haversine(
+                        *self.coordinates[trip[4]],
+                        *self.coordinates[station],
+                    )
+                trip[3:6] = sequence, station, arrival
+            elif sequence < trip[0]:
+                # Stops out of order, fall back to the straight line
+                trip[0:3] = sequence, station, departure
+                trip[6] = None
+
+        result = {}
+        for trip_id, trip in ends.items():
+            first, source, departure, _, destination, arrival, km = trip
+            if source == destination or departure is None or arrival is None:
+                continue
+            if km is None:
+                km = haversine(
+                    *self.coordinates[source],
+                    *self.coordinates[destination],
+                ) * 1.2
+            service_id, route_id = trips[trip_id]
+            result[trip_id] = (
+                service_id,
+                self.trains[route_id],
+                source,
+                destination,
+                departure,
+                arrival,
+                max(1, round(km)),
+            )
+        self.stdout.write(
+            f"trips: {len(result)} usable, {len(skipped)} with unknown stops"
+        )
+        return result
+
+    def read_services(self) -> dict | None:
+        """service_id -> service days in the window, None runs every day"""
+        window = set(self.days)
+        services = {}
+        found = False
+        for row in self.read("calendar.txt", required=False):
+            found = True
+            first = parse_gtfs_date(row["start_date"])
+            last = parse_gtfs_date(row["end_date"])
+            services[row["service_id"]] = {
+                day
+                for day in window
+                if first <= day <= last
+                and row[WEEKDAYS[day.weekday()]] == "1"
+            }
+        for row in self.read("calendar_dates.txt", required=False):
+            found = True
+            day = parse_gtfs_date(row["date"])
+            if day not in window:
+                continue
+            days = services.setdefault(row["service_id"], set())
+            if row["exception_type"] == "1":
+                days.add(day)
+            else:
+                days.discard(day)
+        return services if found else None
+
+    def import_routes(self, trips: dict):
+        routes = {
+            (source, destination): route_id
+            for route_id, source, destination in (
+                RouteModel.objects.values_list(
+                    "id", "source_id", "destination_id"
+                )
+            )
+        }
+        distances = {}
+        for _, _, source, destination, _, _, distance in trips.values():
+            if (source, destination) not in routes:
+                distances.setdefault((source, destination), distance)
+        created = RouteModel.objects.bulk_create(
+            (
+                RouteModel(
+                    source_id=source,
+                    destination_id=destination,
+                    distance=distance,
+                )
+                for (source, destination), distance in sorted(
+                    distances.items()
+                )
+            ),
+            batch_size=5000,
+        )
+        routes.update(
+            ((route.source_id, route.destination_id), route.id)
+            for route in created
+        )
+        self.stdout.write(f"routes: {len(created)} new")
+        self.routes = routes
+
+    def service_day_start(self, day) -> datetime:
+        """GTFS times count from noon minus 12h, midnight but on DST days"""
+        noon = datetime(day.year, day.month, day.day, 12, tzinfo=self.tz)
+        return noon.astimezone(UTC) - timedelta(hours=12)
+
+    def import_journeys(self, trips: dict, services: dict | None) -> int:
+        starts = {day: self.service_day_start(day) for day in self.days}
+        # GTFS times run past 24:00:00, so yesterday's trips may depart in
+        # the window too
+        existing = set(
+            JourneyModel.objects.filter(
+                departure_time__gte=starts[self.days[0]],
+                departure_time__lt=starts[self.days[-1]] + timedelta(days=2),
+            ).values_list("train_id", "route_id", "departure_time")
+        )
+
+        def rows():
+            for (
+                service_id, (train_id, capacity), source, destination,
+                departure, arrival, _,
+            ) in trips.values():
+                days = self.days if services is None else sorted(
+                    services.get(service_id, ())
+                )
+                route_id = self.routes[source, destination]
+                for day in days:
+                    departure_time = starts[day] + timedelta(
+                        seconds=departure
+                    )
+                    key = (train_id, route_id, departure_time)
+                    if key in existing:
+                        continue
+                    existing.add(key)
+                    yield (
+                        route_id,
+                        train_id,
+                        departure_time,
+                        starts[day] + timedelta(seconds=arrival),
+                        capacity,
+                        0,
+                        0,
+                    )
+
+        started = time.perf_counter()
+        written = copy_rows(
+            JourneyModel,
+            [
+                "route", "train", "departure_time", "arrival_time",
+                "seats_capacity", "seats_sold", "seats_held",
+            ],
+            rows(),
+        )
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(
+            f"journeys: {written} new ({written / elapsed:,.0f} rows/s)"
+        )
+        return written
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from station.idempotency import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete order idempotency keys older than IDEMPOTENCY_KEY_TTL. "
+        "Runs once, or forever with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between purges, 0 purges once and exits",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            purged = self.purge(options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Purged {purged} expired idempotency keys")
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def purge(batch_size: int) -> int:
+        purged = 0
+        while True:
+            batch = purge_idempotency_keys(batch_size)
+            purged += batch
+            if batch < batch_size:
+                return purged
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from station.timetable import TimetableIndex
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the in-memory timetable index from the database and report "
+        "its size. With --verify the incremental update path is replayed "
+        "and both indexes are checked against the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Replay journeys one by one and compare with the database",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = TimetableIndex.from_db()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Indexed {len(index)} journeys from {len(index.stations)} "
+            f"stations in {elapsed * 1000:.1f} ms"
+        )
+        if not options["verify"]:
+            return
+
+        replayed = TimetableIndex()
+        replayed.routes = dict(index.routes)
+        for journey_id, (route_id, departure, arrival) in (
+            index.journeys.items()
+        ):
+            replayed.upsert_journey(journey_id, route_id, departure, arrival)
+
+        problems = index.verify() + [
+            f"Incremental: {problem}" for problem in replayed.verify()
+        ]
+        if problems:
+            raise CommandError("\n".join(problems))
+        self.stdout.write(self.style.SUCCESS("Timetable index is consistent"))
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from station.models import (
+    JourneyModel,
+    SeatHoldModel,
+    TicketModel,
+    TrainModel,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare journey seats_sold/seats_held/seats_capacity counters with "
+        "the ticket table, unexpired seat holds and train size, and repair "
+        "the journeys that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drifted journeys",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        drifted = (
+            JourneyModel.objects.annotate(
+                actual_sold=Count("tickets", distinct=True),
+                actual_held=Count(
+                    "holds",
+                    filter=Q(holds__expires_at__gt=now),
+                    distinct=True,
+                ),
+                actual_capacity=(
+                    F("train__cargo_num") * F("train__places_in_cargo")
+                ),
+            )
+            .filter(
+                ~Q(seats_sold=F("actual_sold"))
+                | ~Q(seats_held=F("actual_held"))
+                | ~Q(seats_capacity=F("actual_capacity"))
+            )
+            .order_by("id")
+            .only("id", "seats_sold", "seats_held", "seats_capacity")
+        )
+
+        journey_ids = []
+        for journey in drifted.iterator(chunk_size=options["batch_size"]):
+            self.stdout.write(
+                f"Journey {journey.id}: "
+                f"sold {journey.seats_sold} -> {journey.actual_sold}, "
+                f"held {journey.seats_held} -> {journey.actual_held}, "
+                f"capacity {journey.seats_capacity} -> "
+                f"{journey.actual_capacity}"
+            )
+            journey_ids.append(journey.id)
+
+        if not options["dry_run"]:
+            batch_size = options["batch_size"]
+            for start in range(0, len(journey_ids), batch_size):
+                self.repair(journey_ids[start:start + batch_size], now)
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {len(journey_ids)} drifted journeys")
+        )
+
+    @staticmethod
+    def repair(journey_ids, now):
+        """
+        Recount inside the UPDATE so concurrent sales are not lost. Holds
+        that expired are left for the sweeper and not counted as held.
+        """
+        sold = (
+            TicketModel.objects.filter(journey=OuterRef("pk"))
+            .order_by()
+            .values("journey")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        held = (
+            SeatHoldModel.objects.filter(
+                journey=OuterRef("pk"), expires_at__gt=now
+            )
+            .order_by()
+            .values("journey")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        capacity = TrainModel.objects.filter(pk=OuterRef("train_id")).values(
+            capacity=F("cargo_num") * F("places_in_cargo")
+        )
+        with transaction.atomic():
+            JourneyModel.objects.filter(pk__in=journey_ids).update(
+                seats_sold=Coalesce(Subquery(sold), 0),
+                seats_held=Coalesce(Subquery(held), 0),
+                seats_capacity=Subquery(capacity),
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from station.response_cache import CachedResponseMixin, cache_stats
+from station.urls import router
+
+
+class Command(BaseCommand):
+    help = "Show response cache hits and misses of the cached viewsets."
+
+    def handle(self, *args, **options):
+        basenames = [
+            basename
+            for _, viewset, basename in router.registry
+            if issubclass(viewset, CachedResponseMixin)
+        ]
+        for basename, counts in cache_stats(basenames).items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total if total else 0
+            self.stdout.write(
+                f"{basename}: {counts['hit']} hits, {counts['miss']} misses "
+                f"({ratio:.0%} hit ratio)"
+            )
@@ -0,0 +1,370 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from station.models import (
+    TrainTypeModel,
+    TrainModel,
+    CrewModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+    OrderModel,
+    TicketModel,
+)
+from station.bulk_load import copy_rows, next_ids, reset_sequences
+from station.geo import haversine
+from station.bundles import record_bulk_import
+from station.response_cache import bump_cache_version
+from station.timetable import bump_timetable_version
+
+TRAIN_TYPES = ["Intercity", "Intercity+", "Regional", "Night", "Suburban"]
+FIRST_NAMES = ["Taras", "Olena", "Andrii", "Iryna", "Mykola", "Oksana"]
+LAST_NAMES = ["Shevchenko", "Kovalenko", "Bondarenko", "Tkachenko", "Melnyk"]
+DEPARTURE_HOURS = range(5, 23)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic railway: stations linked into "
+        "a connected route graph, trains, crews, a year of journeys and "
+        "their orders and tickets. Rows are streamed into PostgreSQL with "
+        "COPY, seat counters are written consistent with the tickets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="1.0 is 2000 stations, 1000 journeys a day, ~2M tickets",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument(
+            "--start",
+            type=lambda value: datetime.strptime(value, "%Y-%m-%d").date(),
+            default=None,
+            help="First day of journeys, today by default",
+        )
+        parser.add_argument(
+            "--occupancy",
+            type=float,
+            default=0.1,
+            help="Average share of sold seats per journey",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("seed_railway needs PostgreSQL for COPY")
+        scale = options["scale"]
+        if not 0 < options["occupancy"] < 1:
+            raise CommandError("--occupancy must be between 0 and 1")
+        self.rng = random.Random(options["seed"])
+        self.seed = options["seed"]
+        self.ids = {}
+        self.started = time.perf_counter()
+
+        with transaction.atomic():
+            self.seed_users(max(10, round(10_000 * scale)))
+            self.seed_train_types()
+            self.seed_trains(max(5, round(200 * scale)))
+            self.seed_crews(max(5, round(500 * scale)))
+            self.seed_stations(max(10, round(2_000 * scale)))
+            self.seed_routes()
+            self.seed_journeys(
+                start=options["start"] or timezone.localdate(),
+                days=options["days"],
+                per_day=max(1, round(1_000 * scale)),
+                occupancy=options["occupancy"],
+            )
+            self.seed_orders_and_tickets()
+            self.reset_sequences()
+            # COPY sends no signals
+            for model in (TrainTypeModel, CrewModel, StationModel, RouteModel):
+                bump_cache_version(model)
+            transaction.on_commit(bump_timetable_version)
+            transaction.on_commit(record_bulk_import)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded in {time.perf_counter() - self.started:.1f}s"
+            )
+        )
+
+    def copy(self, model, columns: list[str], rows) -> int:
+        written = copy_rows(model, columns, rows)
+        self.stdout.write(
+            f"{model._meta.db_table}: {written} rows "
+            f"({time.perf_counter() - self.started:.1f}s)"
+        )
+        return written
+
+    def next_ids(self, model, count: int) -> range:
+        self.ids[model] = next_ids(model, count)
+        return self.ids[model]
+
+    def seed_users(self, count: int):
+        user_model = get_user_model()
+        password = make_password("password")
+        joined = timezone.now()
+        ids = self.next_ids(user_model, count)
+        self.copy(
+            user_model,
+            [
+                "id", "email", "password", "first_name", "last_name",
+                "is_staff", "is_superuser", "is_active", "date_joined",
+            ],
+            (
+                (
+                    user_id,
+                    f"passenger-{user_id}@seed.example.com",
+                    password,
+                    "",
+                    "",
+                    False,
+                    False,
+                    True,
+                    joined,
+                )
+                for user_id in ids
+            ),
+        )
+
+    def seed_train_types(self):
+        ids = self.next_ids(TrainTypeModel, len(TRAIN_TYPES))
+        self.copy(TrainTypeModel, ["id", "name"], zip(ids, TRAIN_TYPES))
+
+    def seed_trains(self, count: int):
+        ids = self.next_ids(TrainModel, count)
+        train_types = self.ids[TrainTypeModel]
+        self.trains = {}
+        rows = []
+        for train_id in ids:
+            cargo_num = self.rng.randint(6, 20)
+            places_in_cargo = self.rng.choice([36, 54, 58, 64])
+            self.trains[train_id] = (cargo_num, places_in_cargo)
+            rows.append(
+                (
+                    train_id,
+                    f"{self.rng.randint(1, 999):03d} "
+                    f"{self.rng.choice(TRAIN_TYPES)}",
+                    cargo_num,
+                    places_in_cargo,
+                    self.rng.choice(train_types),
+                )
+            )
+        self.copy(
+            TrainModel,
+            ["id", "name", "cargo_num", "places_in_cargo", "train_type"],
+            rows,
+        )
+
+    def seed_crews(self, count: int):
+        ids = self.next_ids(CrewModel, count)
+        self.copy(
+            CrewModel,
+            ["id", "first_name", "last_name"],
+            (
+                (
+                    crew_id,
+                    self.rng.choice(FIRST_NAMES),
+                    self.rng.choice(LAST_NAMES),
+                )
+                for crew_id in ids
+            ),
+        )
+
+    def seed_stations(self, count: int):
+        ids = self.next_ids(StationModel, count)
+        self.stations = {
+            station_id: (
+                44.5 + self.rng.random() * 7.5,
+                22.5 + self.rng.random() * 17.5,
+            )
+            for station_id in ids
+        }
+        self.copy(
+            StationModel,
+            ["id", "name", "latitude", "longitude"],
+            (
+                (station_id, f"Station {station_id}", latitude, longitude)
+                for station_id, (latitude, longitude) in self.stations.items()
+            ),
+        )
+
+    def seed_routes(self):
+        """
+        A spanning tree joining each station to a random earlier one keeps
+        the graph connected, a few random chords add alternative paths.
+        Every link is a route in both directions.
+        """
+        station_ids = list(self.stations)
+        links = {
+            (station_ids[self.rng.randrange(position)], station_id)
+            for position, station_id in enumerate(station_ids)
+            if position
+        }
+        for _ in range(len(station_ids) // 2):
+            source, destination = self.rng.sample(station_ids, 2)
+            links.add((source, destination))
+        pairs = sorted(
+            {pair for source, destination in links
+             for pair in ((source, destination), (destination, source))}
+        )
+
+        ids = self.next_ids(RouteModel, len(pairs))
+        self.routes = []
+        rows = []
+        for route_id, (source, destination) in zip(ids, pairs):
+            distance = max(
+                1, round(haversine(*self.stations[source],
+                                   *self.stations[destination]) * 1.2)
+            )
+            self.routes.append((route_id, distance))
+            rows.append((route_id, source, destination, distance))
+        self.copy(
+            RouteModel, ["id", "source", "destination", "distance"], rows
+        )
+
+    def seed_journeys(self, start, days: int, per_day: int, occupancy):
+        ids = self.next_ids(JourneyModel, days * per_day)
+        train_ids = list(self.trains)
+        crew_ids = self.ids[CrewModel]
+        self.journeys = []
+
+        def rows():
+            journey_id = iter(ids)
+            for day in range(days):
+                midnight = timezone.make_aware(
+                    datetime.combine(start + timedelta(days=day),
+                                     datetime.min.time())
+                )
+                for _ in range(per_day):
+                    route_id, distance = self.rng.choice(self.routes)
+                    train_id = self.rng.choice(train_ids)
+                    departure = midnight + timedelta(
+                        hours=self.rng.choice(DEPARTURE_HOURS),
+                        minutes=self.rng.randrange(0, 60, 5),
+                    )
+                    # About 80 km/h with stops
+                    arrival = departure + timedelta(
+                        minutes=max(20, round(distance * 0.75))
+                    )
+                    cargo_num, places_in_cargo = self.trains[train_id]
+                    capacity = cargo_num * places_in_cargo
+                    sold = min(
+                        capacity,
+                        round(capacity * self.rng.betavariate(
+                            2, 2 / occupancy - 2
+                        )),
+                    )
+                    current = next(journey_id)
+                    self.journeys.append(
+                        (current, places_in_cargo, capacity, sold, departure)
+                    )
+                    yield (
+                        current, route_id, train_id, departure, arrival,
+                        capacity, sold, 0,
+                    )
+
+        self.copy(
+            JourneyModel,
+            [
+                "id", "route", "train", "departure_time", "arrival_time",
+                "seats_capacity", "seats_sold", "seats_held",
+            ],
+            rows(),
+        )
+        through = JourneyModel.crews.through
+        self.copy(
+            through,
+            ["journeymodel", "crewmodel"],
+            (
+                (journey_id, crew_id)
+                for journey_id in ids
+                for crew_id in self.rng.sample(crew_ids, 2)
+            ),
+        )
+
+    def seed_orders_and_tickets(self):
+        """
+        Sold seats of each journey come from a generator seeded by the
+        journey id, so tickets can be streamed after their orders without
+        keeping them in memory.
+        """
+        user_ids = self.ids[get_user_model()]
+        first_order = (
+            OrderModel.objects.aggregate(last=Max("id"))["last"] or 0
+        ) + 1
+        order_sizes = [1, 1, 1, 2, 2, 3, 4]
+
+        def orders_by_journey():
+            order_id = first_order
+            for (
+                journey_id, places_in_cargo, capacity, sold, departure
+            ) in self.journeys:
+                rng = random.Random(f"{self.seed}:{journey_id}")
+                seats = rng.sample(range(capacity), sold)
+                position = 0
+                while position < sold:
+                    size = min(rng.choice(order_sizes), sold - position)
+                    yield (
+                        order_id,
+                        rng.choice(user_ids),
+                        departure - timedelta(
+                            minutes=rng.randint(30, 60 * 24 * 30)
+                        ),
+                        journey_id,
+                        places_in_cargo,
+                        seats[position:position + size],
+                    )
+                    order_id += 1
+                    position += size
+
+        self.copy(
+            OrderModel,
+            ["id", "user", "created_at"],
+            (
+                (order_id, user_id, created_at)
+                for order_id, user_id, created_at, *_ in orders_by_journey()
+            ),
+        )
+        self.copy(
+            TicketModel,
+            ["order", "journey", "cargo", "seat"],
+            (
+                (
+                    order_id,
+                    journey_id,
+                    seat // places_in_cargo + 1,
+                    seat % places_in_cargo + 1,
+                )
+                for order_id, _, _, journey_id, places_in_cargo, seats
+                in orders_by_journey()
+                for seat in seats
+            ),
+        )
+
+    def reset_sequences(self):
+        reset_sequences(
+            [
+                get_user_model(),
+                TrainTypeModel,
+                TrainModel,
+                CrewModel,
+                StationModel,
+                RouteModel,
+                JourneyModel,
+                JourneyModel.crews.through,
+                OrderModel,
+                TicketModel,
+            ]
+        )
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from station.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = (
+        "Release expired seat holds and give their seats back to sale. "
+        "Runs once, or forever with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between sweeps, 0 sweeps once and exits",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = self.sweep(options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Released {released} expired seat holds")
+            )
+            if not options["interval"]:
+                return
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def sweep(batch_size: int) -> int:
+        released = 0
+        while True:
+            batch = sweep_expired_holds(batch_size)
+            released += batch
+            if batch < batch_size:
+                return released
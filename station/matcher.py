@@ -0,0 +1,125 @@
+import logging
+import threading
+from bisect import bisect_right
+from itertools import accumulate
+
+from django.db import DatabaseError
+from rapidfuzz import fuzz, process, utils
+
+from station.models import StationModel
+from station.response_cache import cache_versions
+
+
+class StationMatcher:
+    """
+    Resolves free-text station names to ids without touching the database.
+
+    Names are normalized once, identical names share one choice. A query
+    matches every station containing it; a query that is not a substring
+    of any name is compared with name prefixes of the same length, so
+    "Dnirpo" still finds "Dnipro Main".
+    """
+
+    max_prefix = 32
+
+    def __init__(self, stations, score_cutoff: float = 70):
+        self.score_cutoff = score_cutoff
+        self.version = None
+        self.prefixes = {}
+        self.prefixes_lock = threading.Lock()
+        ids_by_name = {}
+        for station_id, name in stations:
+            ids_by_name.setdefault(utils.default_process(name), []).append(
+                station_id
+            )
+        self.names = list(ids_by_name)
+        self.ids = list(ids_by_name.values())
+        self.haystack = "\n".join(self.names)
+        self.offsets = list(
+            accumulate((len(name) + 1 for name in self.names), initial=0)
+        )
+
+    @classmethod
+    def from_db(cls) -> "StationMatcher":
+        return cls(
+            StationModel.objects.values_list("id", "name").iterator(
+                chunk_size=5000
+            )
+        )
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.ids)
+
+    def resolve(self, query: str) -> list[int]:
+        query = utils.default_process(query)
+        if not query:
+            return []
+        matches = []
+        found = self.haystack.find(query)
+        while found != -1:
+            position = bisect_right(self.offsets, found) - 1
+            matches.extend(self.ids[position])
+            found = self.haystack.find(query, self.offsets[position + 1])
+        if matches:
+            return matches
+
+        query = query[: self.max_prefix]
+        prefixes = self.prefixes.get(len(query))
+        if prefixes is None:
+            with self.prefixes_lock:
+                prefixes = self.prefixes.get(len(query))
+                if prefixes is None:
+                    prefixes = [name[: len(query)] for name in self.names]
+                    self.prefixes[len(query)] = prefixes
+        best = process.extract(
+            query,
+            prefixes,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=self.score_cutoff,
+            limit=None,
+        )
+        if not best:
+            return []
+        top_score = best[0][1]
+        return [
+            station_id
+            for _, score, position in best
+            if score == top_score
+            for station_id in self.ids[position]
+        ]
+
+
+logger = logging.getLogger(__name__)
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_station_matcher() -> StationMatcher:
+    """
+    The matcher, rebuilt once a station write of any process moved the
+    shared station cache version
+    """
+    global _matcher
+    version = cache_versions([StationModel])[0]
+    matcher = _matcher
+    if matcher is None or matcher.version != version:
+        with _matcher_lock:
+            if _matcher is matcher:
+                _matcher = StationMatcher.from_db()
+                _matcher.version = version
+            matcher = _matcher
+    return matcher
+
+
+def warm_station_matcher() -> None:
+    try:
+        get_station_matcher()
+    except DatabaseError:
+        logger.warning("Station matcher is not built yet")
+
+
+def invalidate_station_matcher() -> None:
+    global _matcher
+    _matcher = None
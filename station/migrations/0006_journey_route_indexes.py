@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:23
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("station", "0005_station_name_trgm"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="journeymodel",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="journey_route_departure_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="journeymodel",
+            index=models.Index(
+                fields=["departure_time"], name="journey_departure_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="routemodel",
+            index=models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            ),
+        ),
+    ]
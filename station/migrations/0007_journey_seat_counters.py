@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:40
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_seat_counters(apps, schema_editor):
+    JourneyModel = apps.get_model("station", "JourneyModel")
+    TicketModel = apps.get_model("station", "TicketModel")
+    TrainModel = apps.get_model("station", "TrainModel")
+
+    sold = (
+        TicketModel.objects.filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    capacity = TrainModel.objects.filter(pk=OuterRef("train_id")).values(
+        capacity=F("cargo_num") * F("places_in_cargo")
+    )
+    JourneyModel.objects.update(
+        seats_sold=Coalesce(Subquery(sold), 0),
+        seats_capacity=Subquery(capacity),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0006_journey_route_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journeymodel",
+            name="seats_capacity",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="journeymodel",
+            name="seats_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_seat_counters, migrations.RunPython.noop),
+    ]
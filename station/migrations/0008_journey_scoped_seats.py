@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0007_journey_seat_counters"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="ticketmodel",
+            name="unique_cargo_seat",
+        ),
+        migrations.AddConstraint(
+            model_name="ticketmodel",
+            constraint=models.UniqueConstraint(
+                fields=("journey", "cargo", "seat"),
+                name="unique_journey_cargo_seat",
+            ),
+        ),
+    ]
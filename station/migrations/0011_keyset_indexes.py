@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-17 20:05
+
+from django.conf import settings
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("station", "0010_idempotency_keys"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="journeymodel",
+            index=models.Index(
+                fields=["departure_time", "id"],
+                name="journey_departure_id_idx",
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name="journeymodel",
+            name="journey_departure_idx",
+        ),
+        AddIndexConcurrently(
+            model_name="ordermodel",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-17 20:45
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0011_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journeymodel",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="routemodel",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="stationmodel",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="trainmodel",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+            ),
+        ),
+    ]
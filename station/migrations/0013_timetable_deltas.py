@@ -0,0 +1,47 @@
+# Generated by Django 5.1.7 on 2026-10-17 21:04
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("station", "0012_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimetableDeletionModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=16)),
+                ("object_id", models.PositiveBigIntegerField()),
+                ("deleted_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "timetable_deletion",
+                "indexes": [
+                    models.Index(
+                        fields=["deleted_at"],
+                        name="timetable_deletion_at_idx",
+                    )
+                ],
+            },
+        ),
+        AddIndexConcurrently(
+            model_name="journeymodel",
+            index=models.Index(
+                fields=["updated_at"], name="journey_updated_idx"
+            ),
+        ),
+    ]
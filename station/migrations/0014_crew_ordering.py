@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-17 18:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('station', '0013_timetable_deltas'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='crewmodel',
+            options={'ordering': ['last_name', 'id']},
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.15 on 2026-10-17 19:20
+
+from django.db import migrations, models
+
+import station.models
+
+
+def move_bulk_imports(apps, schema_editor):
+    TimetableDeletionModel = apps.get_model(
+        "station", "TimetableDeletionModel"
+    )
+    TimetableBulkImportModel = apps.get_model(
+        "station", "TimetableBulkImportModel"
+    )
+    imports = TimetableDeletionModel.objects.filter(kind="bulk-import")
+    TimetableBulkImportModel.objects.bulk_create(
+        TimetableBulkImportModel(imported_at=imported_at)
+        for imported_at in imports.values_list("deleted_at", flat=True)
+    )
+    imports.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("station", "0014_crew_ordering"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimetableBulkImportModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("imported_at", station.models.DatabaseNowField()),
+            ],
+            options={
+                "db_table": "timetable_bulk_import",
+            },
+        ),
+        migrations.AlterField(
+            model_name="journeymodel",
+            name="updated_at",
+            field=station.models.DatabaseNowField(),
+        ),
+        migrations.AlterField(
+            model_name="routemodel",
+            name="updated_at",
+            field=station.models.DatabaseNowField(),
+        ),
+        migrations.AlterField(
+            model_name="stationmodel",
+            name="updated_at",
+            field=station.models.DatabaseNowField(),
+        ),
+        migrations.AlterField(
+            model_name="timetabledeletionmodel",
+            name="deleted_at",
+            field=station.models.DatabaseNowField(),
+        ),
+        migrations.AlterField(
+            model_name="trainmodel",
+            name="updated_at",
+            field=station.models.DatabaseNowField(),
+        ),
+        migrations.RunPython(move_bulk_imports, migrations.RunPython.noop),
+    ]
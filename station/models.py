@@ -1,9 +1,13 @@
 import os
 import pathlib
 import uuid
+from collections import Counter
 
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now, Upper
 from django.db.models.constraints import UniqueConstraint
 from django.utils.text import slugify
 from rest_framework.exceptions import ValidationError
@@ -25,6 +29,30 @@ def train_image_path(instance: "TrainModel", file_name: os.path) -> str:
     return os.path.join("upload", "train", file)
 
 
+class DatabaseNowField(models.DateTimeField):
+    """
+    Stamped with the database clock on every save, so rows written by
+    different web workers compare with each other and with bundle
+    versions. The instance keeps its old value until refresh_from_db()
+    after an update.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs["editable"] = False
+        kwargs["blank"] = True
+        kwargs["db_default"] = Now()
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        for option in ("editable", "blank", "db_default"):
+            kwargs.pop(option, None)
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        return Now()
+
+
 class TrainTypeModel(models.Model):
     name = models.CharField(max_length=255)
 
@@ -44,6 +72,7 @@ class TrainModel(models.Model):
         TrainTypeModel, on_delete=models.CASCADE, verbose_name="trains"
     )
     image = models.ImageField(upload_to=train_image_path, null=True)
+    updated_at = DatabaseNowField()
 
     class Meta:
         db_table = "train"
@@ -52,6 +81,16 @@ class TrainModel(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def capacity(self) -> int:
+        return self.cargo_num * self.places_in_cargo
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.journeys.exclude(seats_capacity=self.capacity).update(
+            seats_capacity=self.capacity, updated_at=Now()
+        )
+
 
 class CrewModel(models.Model):
     first_name = models.CharField(max_length=255)
@@ -66,7 +105,7 @@ class CrewModel(models.Model):
 
     class Meta:
         db_table = "crew"
-        ordering = ["last_name"]
+        ordering = ["last_name", "id"]
 
 
 class StationModel(models.Model):
@@ -74,10 +113,17 @@ class StationModel(models.Model):
     latitude = models.FloatField()
     longitude = models.FloatField()
     image = models.ImageField(upload_to=station_image_path, null=True)
+    updated_at = DatabaseNowField()
 
     class Meta:
         db_table = "station"
         ordering = ["name"]
+        indexes = [
+            GinIndex(
+                OpClass(Upper("name"), name="gin_trgm_ops"),
+                name="station_name_trgm",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -91,6 +137,7 @@ class RouteModel(models.Model):
         StationModel, on_delete=models.CASCADE, related_name="routers_to"
     )
     distance = models.PositiveIntegerField()
+    updated_at = DatabaseNowField()
 
     def __str__(self):
         return (
@@ -100,6 +147,12 @@ class RouteModel(models.Model):
 
     class Meta:
         db_table = "route"
+        indexes = [
+            models.Index(
+                fields=["source", "destination"],
+                name="route_source_destination_idx",
+            ),
+        ]
 
 
 class JourneyModel(models.Model):
@@ -112,9 +165,26 @@ class JourneyModel(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crews = models.ManyToManyField(CrewModel, related_name="journeys")
+    seats_capacity = models.PositiveIntegerField(default=0, editable=False)
+    seats_sold = models.PositiveIntegerField(default=0, editable=False)
+    seats_held = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = DatabaseNowField()
+
+    COUNTER_FIELDS = ("seats_sold", "seats_held")
 
     class Meta:
         db_table = "journey"
+        indexes = [
+            models.Index(
+                fields=["route", "departure_time"],
+                name="journey_route_departure_idx",
+            ),
+            models.Index(
+                fields=["departure_time", "id"],
+                name="journey_departure_id_idx",
+            ),
+            models.Index(fields=["updated_at"], name="journey_updated_idx"),
+        ]
 
     def __str__(self):
         return (
@@ -123,6 +193,93 @@ class JourneyModel(models.Model):
             f"arrival: {self.arrival_time}"
         )
 
+    def save(self, *args, **kwargs):
+        self.seats_capacity = self.train.capacity
+        if not self._state.adding:
+            # The counters only move with F() updates under the row lock,
+            # saving a stale instance must not write them back
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            kwargs["update_fields"] = [
+                name
+                for name in update_fields
+                if name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def sell_seats(cls, journey_id: int, count: int) -> None:
+        cls.objects.filter(pk=journey_id).update(
+            seats_sold=Greatest(F("seats_sold") + count, 0)
+        )
+
+    @classmethod
+    def hold_seats(cls, journey_id: int, count: int) -> None:
+        cls.objects.filter(pk=journey_id).update(
+            seats_held=Greatest(F("seats_held") + count, 0)
+        )
+
+    @classmethod
+    def lock(cls, journey_ids) -> None:
+        """Row-lock journeys in id order, the order every writer uses"""
+        list(
+            cls.objects.select_for_update()
+            .filter(pk__in=journey_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+
+class SeatHoldModel(models.Model):
+    journey = models.ForeignKey(
+        JourneyModel, on_delete=models.CASCADE, related_name="holds"
+    )
+    cargo = models.PositiveIntegerField()
+    seat = models.PositiveIntegerField()
+    user = models.ForeignKey(
+        get_user_model(), on_delete=models.CASCADE, related_name="holds"
+    )
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "seat_hold"
+        constraints = [
+            UniqueConstraint(
+                fields=["journey", "cargo", "seat"],
+                name="unique_hold_journey_cargo_seat",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="seat_hold_expires_idx"),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.user}, cargo: {self.cargo}, seat: {self.seat}, "
+            f"until: {self.expires_at}"
+        )
+
+    @classmethod
+    def release(cls, holds) -> int:
+        """
+        Delete (id, journey_id) holds and give their seats back.
+        Callers must hold the journey locks.
+        """
+        holds = list(holds)
+        if not holds:
+            return 0
+        cls.objects.filter(pk__in=[hold_id for hold_id, _ in holds]).delete()
+        for journey_id, count in Counter(
+            journey_id for _, journey_id in holds
+        ).items():
+            JourneyModel.hold_seats(journey_id, -count)
+        return len(holds)
+
 
 class OrderModel(models.Model):
     user = models.ForeignKey(
@@ -133,11 +290,82 @@ class OrderModel(models.Model):
     class Meta:
         db_table = "order"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="order_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.email}, {self.created_at}"
 
 
+class IdempotencyKeyModel(models.Model):
+    """Result of a POST sent with an Idempotency-Key header"""
+
+    user = models.ForeignKey(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "idempotency_key"
+        constraints = [
+            UniqueConstraint(
+                fields=["user", "key"], name="unique_user_idempotency_key"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["created_at"], name="idempotency_key_created_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user}, {self.key}, {self.status_code}"
+
+
+class TimetableDeletionModel(models.Model):
+    """A station, train, route or journey deleted, for timetable deltas"""
+
+    kind = models.CharField(max_length=16)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = DatabaseNowField()
+
+    class Meta:
+        db_table = "timetable_deletion"
+        indexes = [
+            models.Index(
+                fields=["deleted_at"], name="timetable_deletion_at_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}, {self.deleted_at}"
+
+
+class TimetableBulkImportModel(models.Model):
+    """
+    A committed bulk import, whose rows may carry any updated_at and whose
+    deletes are not recorded
+    """
+
+    imported_at = DatabaseNowField()
+
+    class Meta:
+        db_table = "timetable_bulk_import"
+
+    def __str__(self):
+        return f"Bulk import, {self.imported_at}"
+
+
 class TicketModel(models.Model):
     cargo = models.PositiveIntegerField()
     seat = models.PositiveIntegerField()
@@ -161,8 +389,8 @@ class TicketModel(models.Model):
         db_table = "ticket"
         constraints = [
             UniqueConstraint(
-                fields=["cargo", "seat"],
-                name="unique_cargo_seat",
+                fields=["journey", "cargo", "seat"],
+                name="unique_journey_cargo_seat",
             )
         ]
 
@@ -186,6 +414,33 @@ class TicketModel(models.Model):
         )
         super().clean(*args, **kwargs)
 
+    @classmethod
+    def bulk_sell(cls, tickets: list["TicketModel"]) -> list["TicketModel"]:
+        """
+        Insert tickets with one query. Journeys must be loaded with their
+        trains; bulk_create skips save(), so ranges and seat counters are
+        handled here and uniqueness is left to the database constraint.
+        """
+        for ticket in tickets:
+            ticket.clean()
+        with transaction.atomic():
+            tickets = cls.objects.bulk_create(tickets)
+            for journey_id, count in Counter(
+                ticket.journey_id for ticket in tickets
+            ).items():
+                JourneyModel.sell_seats(journey_id, count)
+        return tickets
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            if self._state.adding:
+                JourneyModel.sell_seats(self.journey_id, 1)
+            else:
+                previous = TicketModel.objects.values_list(
+                    "journey_id", flat=True
+                ).get(pk=self.pk)
+                if previous != self.journey_id:
+                    JourneyModel.sell_seats(previous, -1)
+                    JourneyModel.sell_seats(self.journey_id, 1)
+            super().save(*args, **kwargs)
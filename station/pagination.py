@@ -0,0 +1,152 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination over a unique (field, ..., "id") ordering.
+
+    The cursor holds the ordering values of the last row of the page, the
+    next page starts right after them, so every page costs one index range
+    scan and no COUNT(*) or OFFSET.
+    """
+
+    ordering = ("id",)
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                self.after(self.decode_cursor(cursor, queryset.model))
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def after(self, values: list) -> Q:
+        """Rows strictly after values in self.ordering"""
+        condition = None
+        for field, value in reversed(list(zip(self.ordering, values))):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            beyond = Q(**{f"{name}__{lookup}": value})
+            condition = (
+                beyond
+                if condition is None
+                else beyond | (Q(**{name: value}) & condition)
+            )
+        return condition
+
+    def encode_cursor(self, row) -> str:
+        values = [
+            getattr(row, field.lstrip("-")) for field in self.ordering
+        ]
+        payload = json.dumps(
+            [
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in values
+            ],
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor: str, model) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor from the next link of a keyset page",
+                "schema": {"type": "string"},
+            },
+        ]
+
+
+class JourneyKeysetPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderKeysetPagination(KeysetPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 3
+
+
+class SelectablePaginationMixin:
+    """
+    Page numbers by default, keyset pagination for ?pagination=cursor or
+    any request carrying a cursor.
+    """
+
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            params = getattr(self.request, "query_params", {})
+            if self.keyset_pagination_class is not None and (
+                params.get("pagination") == "cursor" or "cursor" in params
+            ):
+                self._paginator = self.keyset_pagination_class()
+                return self._paginator
+        return super().paginator
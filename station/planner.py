@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import NamedTuple
+
+
+class Connection(NamedTuple):
+    departure: int
+    arrival: int
+    source_id: int
+    destination_id: int
+    journey_id: int
+
+
+class Itinerary(NamedTuple):
+    arrival: int
+    transfers: int
+    legs: list
+
+
+class ConnectionScanPlanner:
+    """
+    Connection Scan over a time-expanded timetable held in memory.
+
+    Every journey is a single elementary connection sorted by departure
+    time. The scan runs once per allowed number of legs, so the result is
+    the Pareto front of (earliest arrival, fewest transfers).
+    """
+
+    def __init__(self, connections):
+        self.connections = sorted(connections)
+        self.departures = [c.departure for c in self.connections]
+
+    def plan(
+        self,
+        origin: int,
+        destination: int,
+        departure: int,
+        max_transfers: int = 3,
+        min_transfer: int = 600,
+        horizon: int | None = None,
+    ) -> list[Itinerary]:
+        """
+        Itineraries leaving origin from departure on, with legs departing
+        no later than horizon seconds after it when one is given
+        """
+        if origin == destination:
+            return []
+        start = bisect_left(self.departures, departure)
+        end = (
+            len(self.connections)
+            if horizon is None
+            else bisect_right(self.departures, departure + horizon)
+        )
+
+        previous = {origin: departure}
+        parents = []
+        itineraries = []
+        for legs in range(1, max_transfers + 2):
+            reached = dict(previous)
+            parent = {}
+            # Earliest arrival at the destination known so far, nothing
+            # arriving at or after it can lead to a better itinerary
+            target = reached.get(destination)
+            for connection in islice(self.connections, start, end):
+                if target is not None:
+                    if connection.departure >= target:
+                        break
+                    if connection.arrival >= target:
+                        continue
+                ready = previous.get(connection.source_id)
+                if ready is None:
+                    continue
+                if legs > 1 and connection.source_id != origin:
+                    ready += min_transfer
+                if ready > connection.departure:
+                    continue
+                known = reached.get(connection.destination_id)
+                if known is None or connection.arrival < known:
+                    reached[connection.destination_id] = connection.arrival
+                    parent[connection.destination_id] = connection
+                    if connection.destination_id == destination:
+                        target = connection.arrival
+            parents.append(parent)
+
+            if destination in parent:
+                itineraries.append(
+                    Itinerary(
+                        arrival=target,
+                        transfers=legs - 1,
+                        legs=self._unwind(parents, destination),
+                    )
+                )
+            if not parent:
+                break
+            previous = reached
+        return itineraries
+
+    @staticmethod
+    def _unwind(parents: list, destination: int) -> list[Connection]:
+        legs = []
+        station = destination
+        for parent in reversed(parents):
+            connection = parent.get(station)
+            if connection is None:
+                continue
+            legs.append(connection)
+            station = connection.source_id
+        legs.reverse()
+        return legs
@@ -0,0 +1,178 @@
+import codecs
+import csv
+import io
+from decimal import Decimal
+
+import msgpack
+import orjson
+import zstandard
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils import encoders
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer output produced by orjson.
+
+    Datetimes with any tzinfo, dates, times and UUIDs are encoded natively
+    in the same form as DRF's encoder. Everything else (Decimal, lazy
+    strings, querysets, generators) goes through DRF's encoder, so the
+    bytes match the stock renderer except for floats in exponent notation
+    (1e16 rather than 1e+16) and NaN, which becomes null. Indented or
+    ASCII-only output, as the browsable API and non-default COMPACT_JSON
+    or UNICODE_JSON ask for, and values orjson rejects fall back to the
+    stock renderer.
+    """
+
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if (
+            self.get_indent(accepted_media_type, renderer_context)
+            or not self.compact
+            or self.ensure_ascii
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default, option=ORJSON_OPTIONS
+            )
+        except orjson.JSONEncodeError:
+            # Integers above 64 bits, non-string keys orjson cannot coerce
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by the stock renderer for JavaScript embedding
+        return ret.replace(LINE_SEPARATOR, b"\\u2028").replace(
+            PARAGRAPH_SEPARATOR, b"\\u2029"
+        )
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    The JSON response as MessagePack.
+
+    Values get the representation a JSON client would see: datetimes, dates
+    and times as ISO 8601 strings with Z for UTC, UUIDs as strings. Decimals
+    are kept as exact strings rather than floats.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    encoder = encoders.JSONEncoder()
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.default, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    media_type = "application/msgpack"
+    renderer_class = MessagePackRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), timestamp=3)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f"MessagePack parse error - {exc}")
+
+
+class NDJSONRenderer(ORJSONRenderer):
+    """One JSON document per line, one line per item of list data"""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        render = super().render
+        return b"".join(render(item) + b"\n" for item in items)
+
+    def render_header(self, columns) -> bytes:
+        return b""
+
+    def render_rows(self, columns, rows) -> bytes:
+        return self.render([dict(zip(columns, row)) for row in rows])
+
+
+class ZstdNDJSONRenderer(NDJSONRenderer):
+    """NDJSON in a zstd frame"""
+
+    media_type = "application/zstd"
+    format = "zst"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return zstandard.ZstdCompressor().compress(super().render(data))
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """
+    A header line of the keys of the first item, then a line per item.
+    Datetimes are written as in JSON, empty cells are null.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        columns = list(items[0]) if items else []
+        return self.render_header(columns) + self.render_rows(
+            columns, ([item.get(name) for name in columns] for item in items)
+        )
+
+    def render_header(self, columns) -> bytes:
+        return self.render_rows(columns, [columns])
+
+    def render_rows(self, columns, rows) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            [self.cell(value) for value in row] for row in rows
+        )
+        return buffer.getvalue().encode(self.charset)
+
+    def cell(self, value):
+        if value is None:
+            return ""
+        if isinstance(value, (str, int, float)):
+            return value
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, (list, tuple)):
+            return "; ".join(str(self.cell(item)) for item in value)
+        return self.encoder.default(value)
@@ -0,0 +1,136 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+STATS_KEY = "response-cache:{basename}:{outcome}"
+
+
+def version_key(model) -> str:
+    return f"response-cache:{model._meta.label_lower}:version"
+
+
+def cache_versions(models) -> list[int]:
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A version lost to eviction restarts from the clock, above
+            # any version entries still in the cache were stored under
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_cache_version(model) -> None:
+    """
+    Move the model's cached responses to a new version right away, and once
+    more after commit so readers that cached the old rows meanwhile miss.
+    """
+
+    def bump():
+        try:
+            cache.incr(version_key(model))
+        except ValueError:
+            cache.add(version_key(model), time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def count_outcome(basename: str, outcome: str) -> None:
+    key = STATS_KEY.format(basename=basename, outcome=outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, None)
+
+
+def cache_stats(basenames) -> dict:
+    keys = {
+        (basename, outcome): STATS_KEY.format(
+            basename=basename, outcome=outcome
+        )
+        for basename in basenames
+        for outcome in ("hit", "miss")
+    }
+    values = cache.get_many(keys.values())
+    return {
+        basename: {
+            outcome: values.get(keys[basename, outcome], 0)
+            for outcome in ("hit", "miss")
+        }
+        for basename in basenames
+    }
+
+
+class CachedResponseMixin:
+    """
+    Serve GET requests of cached_actions from the cache.
+
+    Keys hold the current version of every model in cache_models, so a
+    save or delete of any of them retires all entries of the viewset
+    without scanning the cache. Permissions are still checked on hits.
+    Nothing is cached while the RESPONSE_CACHE setting is off.
+    """
+
+    cache_models = ()
+    cached_actions = ("list", "retrieve")
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def response_cache_key(self, request, kwargs) -> str:
+        params = sorted(
+            (name, sorted(values))
+            for name, values in request.query_params.lists()
+        )
+        # Pagination links are absolute URLs built from scheme and host
+        digest = hashlib.sha1(
+            repr(
+                (
+                    request.scheme,
+                    request.get_host(),
+                    params,
+                    sorted(kwargs.items()),
+                )
+            ).encode()
+        ).hexdigest()
+        versions = ".".join(map(str, cache_versions(self.cache_models)))
+        return f"response:{self.basename}:{self.action}:{versions}:{digest}"
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.RESPONSE_CACHE
+            and request.method == "GET"
+            and self.action in self.cached_actions
+        ):
+            # dispatch() looks the handler up after initial()
+            self.get = partial(self.cached_response, self.get)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        outcome = getattr(self, "cache_outcome", None)
+        if outcome is not None:
+            response["X-Cache"] = outcome.upper()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.response_cache_key(request, kwargs)
+        data = cache.get(key)
+        if data is not None:
+            self.cache_outcome = "hit"
+            count_outcome(self.basename, "hit")
+            return Response(data, status=status.HTTP_200_OK)
+
+        self.cache_outcome = "miss"
+        count_outcome(self.basename, "miss")
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, self.cache_timeout)
+        return response
@@ -0,0 +1,129 @@
+import base64
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from station.models import JourneyModel, SeatHoldModel, TicketModel
+
+SEAT_MAP_TIMEOUT = 60 * 60
+
+
+class SeatMap:
+    """
+    Occupancy of one journey packed one bit per seat, cargo by cargo.
+
+    Seat (cargo, seat) is bit (cargo - 1) * places_in_cargo + seat - 1,
+    most significant bit first, so a 20x30 train takes 75 bytes.
+    """
+
+    def __init__(self, cargo_num: int, places_in_cargo: int, bits=None):
+        self.cargo_num = cargo_num
+        self.places_in_cargo = places_in_cargo
+        size = (cargo_num * places_in_cargo + 7) // 8
+        self.bits = bytearray(bits) if bits is not None else bytearray(size)
+
+    def position(self, cargo: int, seat: int) -> tuple[int, int]:
+        index = (cargo - 1) * self.places_in_cargo + seat - 1
+        return index >> 3, 0x80 >> (index & 7)
+
+    def is_taken(self, cargo: int, seat: int) -> bool:
+        byte, mask = self.position(cargo, seat)
+        return bool(self.bits[byte] & mask)
+
+    def set(self, cargo: int, seat: int, taken: bool = True) -> None:
+        byte, mask = self.position(cargo, seat)
+        if taken:
+            self.bits[byte] |= mask
+        else:
+            self.bits[byte] &= ~mask & 0xFF
+
+    def occupied(self) -> dict[int, list[int]]:
+        seats = {}
+        for byte_index, byte in enumerate(self.bits):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte & (0x80 >> bit):
+                    cargo, seat = divmod(
+                        byte_index * 8 + bit, self.places_in_cargo
+                    )
+                    seats.setdefault(cargo + 1, []).append(seat + 1)
+        return seats
+
+    def to_base64(self) -> str:
+        return base64.b64encode(self.bits).decode()
+
+
+def seat_map_key(journey_id: int) -> str:
+    return f"journey:{journey_id}:seat-map"
+
+
+def seat_map_generation_key(journey_id: int) -> str:
+    return f"journey:{journey_id}:seat-map:generation"
+
+
+def seat_map_generation(journey_id: int) -> int:
+    key = seat_map_generation_key(journey_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Restart from the clock, above any generation a map was built at
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_seat_map(journey: JourneyModel) -> SeatMap:
+    """Sold seats, cached between ticket changes, and live holds"""
+    cargo_num = journey.train.cargo_num
+    places_in_cargo = journey.train.places_in_cargo
+    key, generation_key = (
+        seat_map_key(journey.id),
+        seat_map_generation_key(journey.id),
+    )
+    cached = cache.get_many([key, generation_key])
+    generation = cached.get(generation_key)
+    if generation is None:
+        generation = seat_map_generation(journey.id)
+    stored = cached.get(key)
+    if stored is not None and stored[:3] == (
+        generation,
+        cargo_num,
+        places_in_cargo,
+    ):
+        seat_map = SeatMap(cargo_num, places_in_cargo, stored[3])
+    else:
+        seat_map = SeatMap(cargo_num, places_in_cargo)
+        for cargo, seat in TicketModel.objects.filter(
+            journey_id=journey.id
+        ).values_list("cargo", "seat"):
+            seat_map.set(cargo, seat)
+        # Tagged with the generation read before the query, a ticket
+        # committed meanwhile makes it stale instead of lost
+        cache.set(
+            key,
+            (generation, cargo_num, places_in_cargo, bytes(seat_map.bits)),
+            SEAT_MAP_TIMEOUT,
+        )
+
+    if journey.seats_held:
+        for cargo, seat in SeatHoldModel.objects.filter(
+            journey_id=journey.id, expires_at__gt=timezone.now()
+        ).values_list("cargo", "seat"):
+            seat_map.set(cargo, seat)
+    return seat_map
+
+
+def drop_seat_map(journey_id: int) -> None:
+    """Make the cached map of every process stale"""
+    try:
+        cache.incr(seat_map_generation_key(journey_id))
+    except ValueError:
+        seat_map_generation(journey_id)
+    cache.delete(seat_map_key(journey_id))
+
+
+def expire_seat_map(journey_id: int) -> None:
+    """Drop the cached map once the surrounding transaction commits"""
+    transaction.on_commit(lambda: drop_seat_map(journey_id))
@@ -1,4 +1,9 @@
-from django.db import transaction
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import IntegrityError, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils import timezone
 from rest_framework import serializers
 
 from station.models import (
@@ -10,7 +15,11 @@ from station.models import (
     JourneyModel,
     OrderModel,
     TicketModel,
+    SeatHoldModel,
 )
+from station.holds import check_seats_free, claim_holds
+from station.seatmap import expire_seat_map
+from station.values import ValuesSerializer
 
 
 class TrainTypeSerializer(serializers.ModelSerializer):
@@ -66,6 +75,32 @@ class StationSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "latitude", "longitude", "image"]
 
 
+class StationAutocompleteSerializer(serializers.ModelSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = StationModel
+        fields = ["id", "name", "similarity"]
+
+
+class StationNearbySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(
+        min_value=0, max_value=500, default=10,
+        help_text="Search radius in km",
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class StationDistanceSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    latitude = serializers.FloatField()
+    longitude = serializers.FloatField()
+    distance = serializers.FloatField(help_text="Distance in km")
+
+
 class StationImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = StationModel
@@ -86,6 +121,17 @@ class RouteListSerializer(RouteSerializer):
     )
 
 
+class RouteListValuesSerializer(ValuesSerializer):
+    """RouteListSerializer data from values_list() rows"""
+
+    columns = {
+        "id": "id",
+        "source": "source__name",
+        "destination": "destination__name",
+        "distance": "distance",
+    }
+
+
 class RouteDetailSerializer(RouteSerializer):
     source = StationSerializer(read_only=True)
     destination = StationSerializer(read_only=True)
@@ -133,6 +179,71 @@ class JourneyListSerializer(serializers.ModelSerializer):
         ]
 
 
+class JourneyListValuesSerializer(ValuesSerializer):
+    """
+    JourneyListSerializer data from values_list() rows, with the crew
+    names of the page from one ArrayAgg query instead of a prefetch.
+    """
+
+    columns = {
+        "id": "id",
+        "train_name": "train__name",
+        "route_from": "route__source__name",
+        "route_to": "route__destination__name",
+        "departure_time": "departure_time",
+        "arrival_time": "arrival_time",
+        "tickets_available": "tickets_available",
+    }
+    extra_fields = ("crews",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # The current timezone is looked up once per page, not per value
+        current = timezone.get_current_timezone()
+        self.representations = {
+            name: serializers.DateTimeField(default_timezone=current)
+            for name in ("departure_time", "arrival_time")
+        }
+
+    @staticmethod
+    def crew_names(journey_ids) -> dict[int, list[str]]:
+        crews = JourneyModel.crews.through.objects.filter(
+            journeymodel_id__in=journey_ids
+        )
+        return dict(
+            crews.values("journeymodel_id")
+            .annotate(
+                names=ArrayAgg(
+                    Concat(
+                        "crewmodel__first_name",
+                        Value(" "),
+                        "crewmodel__last_name",
+                    ),
+                    # The order CrewModel instances are prefetched in
+                    ordering=[
+                        f"crewmodel__{field}"
+                        for field in CrewModel._meta.ordering
+                    ],
+                )
+            )
+            .values_list("journeymodel_id", "names")
+        )
+
+    @property
+    def data(self):
+        self.instance = list(self.instance)
+        self.crews = None
+        if "crews" in self.fields:
+            self.crews = self.crew_names([row.id for row in self.instance])
+        return super().data
+
+    def to_representation(self, row) -> dict:
+        data = super().to_representation(row)
+        if self.crews is not None:
+            data["crews"] = self.crews.get(row.id, [])
+        return data
+
+
 class JourneyDetailSerializer(JourneySerializer):
     departure_time = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%S%z")
     arrival_time = serializers.DateTimeField(format="%Y-%m-%dT%H:%M:%S%z")
@@ -141,7 +252,89 @@ class JourneyDetailSerializer(JourneySerializer):
     crews = CrewSerializer(many=True, read_only=True)
 
 
+class JourneyPlanSerializer(serializers.Serializer):
+    source = serializers.IntegerField(min_value=1)
+    destination = serializers.IntegerField(min_value=1)
+    departure = serializers.DateTimeField(required=False)
+    max_transfers = serializers.IntegerField(
+        min_value=0, max_value=5, default=3
+    )
+    min_transfer = serializers.IntegerField(
+        min_value=0, max_value=24 * 60, default=10
+    )
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    journeys = JourneyListSerializer(many=True)
+
+
+class SeatMapSerializer(serializers.Serializer):
+    cargo_num = serializers.IntegerField()
+    places_in_cargo = serializers.IntegerField()
+    bitmap = serializers.CharField(
+        source="to_base64",
+        help_text="Base64 bitset, bit (cargo-1)*places_in_cargo+seat-1 "
+                  "is set for sold or held seats, most significant bit "
+                  "first",
+    )
+    occupied = serializers.DictField(
+        child=serializers.ListField(child=serializers.IntegerField()),
+        help_text="Sold or held seats by cargo",
+    )
+
+
+class SeatSerializer(serializers.Serializer):
+    cargo = serializers.IntegerField(min_value=1)
+    seat = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        train = self.context["journey"].train
+        TicketModel.validate_max_value_num(
+            num=attrs["cargo"],
+            max_num=train.cargo_num,
+            error=serializers.ValidationError,
+            name="Cargo",
+        )
+        TicketModel.validate_max_value_num(
+            num=attrs["seat"],
+            max_num=train.places_in_cargo,
+            error=serializers.ValidationError,
+            name="Seat",
+        )
+        return attrs
+
+
+class SeatHoldSerializer(serializers.Serializer):
+    seats = SeatSerializer(many=True, allow_empty=False)
+    expires_at = serializers.DateTimeField(read_only=True)
+
+    def validate_seats(self, seats):
+        pairs = [(seat["cargo"], seat["seat"]) for seat in seats]
+        if len(set(pairs)) != len(pairs):
+            raise serializers.ValidationError(
+                "The same seat is held more than once"
+            )
+        return pairs
+
+
+class PrefetchedJourneyField(serializers.PrimaryKeyRelatedField):
+    """Journey by pk, looked up in the journeys prefetched by the order"""
+
+    def to_internal_value(self, data):
+        journeys = self.context.get("journeys", {})
+        try:
+            return journeys[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    journey = PrefetchedJourneyField(
+        queryset=JourneyModel.objects.select_related("train")
+    )
 
     def validate(self, attrs):
         max_cargo = attrs["journey"].train.cargo_num
@@ -163,6 +356,8 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = TicketModel
         fields = ["id", "cargo", "seat", "journey"]
+        # Seat uniqueness is checked by OrderSerializer under a journey lock
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -172,14 +367,58 @@ class TicketListSerializer(TicketSerializer):
 class OrderSerializer(serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
+    def to_internal_value(self, data):
+        tickets = data.get("tickets") if hasattr(data, "get") else None
+        journey_ids = set()
+        for ticket in tickets if isinstance(tickets, list) else []:
+            try:
+                journey_ids.add(int(ticket["journey"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.context["journeys"] = JourneyModel.objects.select_related(
+            "train"
+        ).in_bulk(journey_ids)
+        return super().to_internal_value(data)
+
+    def validate_tickets(self, tickets):
+        seats = [
+            (ticket["journey"].id, ticket["cargo"], ticket["seat"])
+            for ticket in tickets
+        ]
+        if len(set(seats)) != len(seats):
+            raise serializers.ValidationError(
+                "The same seat is booked more than once"
+            )
+        return tickets
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets = validated_data.pop("tickets")
-            order = OrderModel.objects.create(**validated_data)
-            for ticket in tickets:
-                ticket.pop("order", None)
-                TicketModel.objects.create(order=order, **ticket)
-            return order
+        tickets = validated_data.pop("tickets")
+        seats = {
+            (ticket["journey"].id, ticket["cargo"], ticket["seat"])
+            for ticket in tickets
+        }
+        try:
+            with transaction.atomic():
+                # Buyers of the same journey queue on its row, always
+                # locked in id order so multi-journey orders cannot deadlock
+                JourneyModel.lock({journey_id for journey_id, _, _ in seats})
+                check_seats_free(seats, "tickets")
+                SeatHoldModel.release(
+                    claim_holds(seats, validated_data["user"])
+                )
+                order = OrderModel.objects.create(**validated_data)
+                for ticket in tickets:
+                    ticket.pop("order", None)
+                TicketModel.bulk_sell(
+                    [TicketModel(order=order, **ticket) for ticket in tickets]
+                )
+                for journey_id in {journey_id for journey_id, _, _ in seats}:
+                    expire_seat_map(journey_id)
+                return order
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"tickets": ["One of the seats has just been taken"]}
+            )
 
     class Meta:
         model = OrderModel
@@ -0,0 +1,131 @@
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.models.signals import (
+    m2m_changed,
+    post_save,
+    post_delete,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from station.bundles import BUNDLE_TABLES, record_deletion
+from station.models import (
+    TrainTypeModel,
+    TrainModel,
+    CrewModel,
+    StationModel,
+    RouteModel,
+    JourneyModel,
+    TicketModel,
+)
+from station.response_cache import bump_cache_version
+from station.seatmap import expire_seat_map
+from station.timetable import (
+    catch_up,
+    peek_timetable,
+    publish_timetable_change,
+    to_timestamp,
+)
+
+
+def retire_cached_responses(sender, **kwargs):
+    bump_cache_version(sender)
+
+
+for model in (TrainTypeModel, CrewModel, StationModel, RouteModel):
+    post_save.connect(retire_cached_responses, sender=model)
+    post_delete.connect(retire_cached_responses, sender=model)
+
+
+def record_timetable_deletion(sender, instance, **kwargs):
+    """Deleted rows leave no updated_at behind for timetable deltas"""
+    record_deletion(sender, instance.pk)
+
+
+for model in BUNDLE_TABLES:
+    post_delete.connect(record_timetable_deletion, sender=model)
+
+
+@receiver(post_save, sender=TrainTypeModel)
+def touch_trains(sender, instance, **kwargs):
+    """Train responses show the type name, move their ETags on"""
+    TrainModel.objects.filter(train_type=instance).update(updated_at=Now())
+
+
+@receiver(post_save, sender=CrewModel)
+@receiver(pre_delete, sender=CrewModel)
+def touch_crew_journeys(sender, instance, **kwargs):
+    JourneyModel.objects.filter(crews=instance).update(updated_at=Now())
+
+
+@receiver(m2m_changed, sender=JourneyModel.crews.through)
+def touch_crewed_journeys(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            journeys = JourneyModel.objects.filter(pk=instance.pk)
+        else:
+            return
+    elif action == "pre_clear":
+        journeys = JourneyModel.objects.filter(crews=instance)
+    elif action in ("post_add", "post_remove"):
+        journeys = JourneyModel.objects.filter(pk__in=pk_set)
+    else:
+        return
+    journeys.update(updated_at=Now())
+
+
+def patch_timetable(method: str, *args) -> None:
+    """
+    Once the write commits, publish it as a call of the TimetableIndex
+    method every process patches its index with, this one right away
+    """
+
+    def apply():
+        version = publish_timetable_change(method, *args)
+        timetable = peek_timetable()
+        if timetable is not None:
+            catch_up(timetable, version)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=JourneyModel)
+def index_journey(sender, instance, **kwargs):
+    patch_timetable(
+        "upsert_journey",
+        instance.id,
+        instance.route_id,
+        to_timestamp(instance.departure_time),
+        to_timestamp(instance.arrival_time),
+    )
+
+
+@receiver(post_delete, sender=JourneyModel)
+def unindex_journey(sender, instance, **kwargs):
+    patch_timetable("remove_journey", instance.id)
+
+
+@receiver(post_save, sender=RouteModel)
+def index_route(sender, instance, **kwargs):
+    patch_timetable(
+        "upsert_route",
+        instance.id,
+        instance.source_id,
+        instance.destination_id,
+    )
+
+
+@receiver(post_delete, sender=RouteModel)
+def unindex_route(sender, instance, **kwargs):
+    patch_timetable("remove_route", instance.id)
+
+
+@receiver(post_save, sender=TicketModel)
+def occupy_seat(sender, instance, **kwargs):
+    expire_seat_map(instance.journey_id)
+
+
+@receiver(post_delete, sender=TicketModel)
+def release_seat(sender, instance, **kwargs):
+    JourneyModel.sell_seats(instance.journey_id, -1)
+    expire_seat_map(instance.journey_id)
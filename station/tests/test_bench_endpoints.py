@@ -0,0 +1,24 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+
+class BenchEndpointsTest(TransactionTestCase):
+    def test_run_completes_without_the_response_cache(self):
+        out = StringIO()
+
+        call_command(
+            "bench_endpoints",
+            "--scales", "10:1", "20:2",
+            "--repeat", "2",
+            "--noinput",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("No regressions found", output)
+        for name in ("station-list", "station-detail", "train-list"):
+            queries = re.search(rf"^{name} +(\d+)", output, re.M).group(1)
+            self.assertGreater(int(queries), 0, name)
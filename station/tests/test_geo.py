@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from station.geo import (
+    StationGrid,
+    get_station_grid,
+    haversine,
+    invalidate_station_grid,
+)
+from station.models import StationModel
+from station.response_cache import bump_cache_version
+
+KYIV = (50.4401, 30.4888)
+BORYSPIL = (50.3450, 30.9500)
+FASTIV = (50.0771, 29.9178)
+LVIV = (49.8397, 24.0297)
+
+
+class HaversineTest(SimpleTestCase):
+    def test_known_distance(self):
+        self.assertAlmostEqual(haversine(*KYIV, *LVIV), 465, delta=1)
+        self.assertEqual(haversine(*KYIV, *KYIV), 0)
+
+
+class StationGridTest(SimpleTestCase):
+    def setUp(self):
+        self.grid = StationGrid(
+            [
+                (1, "Kyiv", *KYIV),
+                (2, "Boryspil", *BORYSPIL),
+                (3, "Fastiv", *FASTIV),
+                (4, "Lviv", *LVIV),
+                (5, "Fiji", -17.5, 179.99),
+            ]
+        )
+
+    def names(self, *args, **kwargs):
+        return [
+            station[1] for _, station in self.grid.nearby(*args, **kwargs)
+        ]
+
+    def test_nearby_ordered_by_distance(self):
+        self.assertEqual(
+            self.names(50.45, 30.52, radius=70), ["Kyiv", "Boryspil", "Fastiv"]
+        )
+
+    def test_radius_and_limit(self):
+        self.assertEqual(self.names(*KYIV, radius=40), ["Kyiv", "Boryspil"])
+        self.assertEqual(self.names(*KYIV, radius=600, limit=1), ["Kyiv"])
+        self.assertEqual(self.names(0, 0, radius=500), [])
+
+    def test_across_antimeridian(self):
+        self.assertEqual(self.names(-17.5, -179.99, radius=10), ["Fiji"])
+
+
+class SharedStationGridTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_station_grid()
+        self.addCleanup(invalidate_station_grid)
+
+    def test_station_write_of_another_process_rebuilds_grid(self):
+        grid = get_station_grid()
+        self.assertEqual(len(grid), 0)
+        self.assertIs(get_station_grid(), grid)
+
+        StationModel.objects.bulk_create(
+            [StationModel(name="Kyiv", latitude=KYIV[0], longitude=KYIV[1])]
+        )
+        bump_cache_version(StationModel)
+
+        self.assertEqual(len(get_station_grid()), 1)
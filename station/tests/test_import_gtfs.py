@@ -0,0 +1,145 @@
+import tempfile
+import zipfile
+from datetime import datetime, UTC
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from station.bundles import last_bulk_import
+from station.geo import haversine
+from station.models import JourneyModel, RouteModel, StationModel, TrainModel
+
+KYIV = (50.4401, 30.4888)
+FASTIV = (50.0771, 29.9178)
+LVIV = (49.8397, 24.0297)
+
+FEED = {
+    "agency.txt": (
+        "agency_id,agency_name,agency_url,agency_timezone\n"
+        "UZ,Ukrzaliznytsia,https://uz.gov.ua,Europe/Kyiv\n"
+    ),
+    "stops.txt": (
+        "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station\n"
+        f"KYIV,Kyiv Passage,{KYIV[0]},{KYIV[1]},1,\n"
+        "KYIV-1,Kyiv Passage platform 1,50.4402,30.4889,0,KYIV\n"
+        "KYIV-E,Kyiv Passage entrance,50.4403,30.4890,2,KYIV\n"
+        f"FAST,Fastiv,{FASTIV[0]},{FASTIV[1]},,\n"
+        f"LVIV,Lviv,{LVIV[0]},{LVIV[1]},,\n"
+    ),
+    "routes.txt": (
+        "route_id,route_short_name,route_long_name,route_type\n"
+        "R1,743,Kyiv - Lviv Intercity,2\n"
+    ),
+    "trips.txt": (
+        "route_id,service_id,trip_id\n"
+        "R1,WEEKDAY,T1\n"
+        "R1,NIGHT,T2\n"
+    ),
+    # T2 is listed backwards
+    "stop_times.txt": (
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+        "T1,07:00:00,07:00:00,KYIV-1,1\n"
+        "T1,07:50:00,07:52:00,FAST,2\n"
+        "T1,12:30:00,12:30:00,LVIV,3\n"
+        "T2,25:10:00,25:10:00,KYIV,2\n"
+        "T2,23:30:00,23:30:00,LVIV,1\n"
+    ),
+    "calendar.txt": (
+        "service_id,monday,tuesday,wednesday,thursday,friday,saturday,"
+        "sunday,start_date,end_date\n"
+        "WEEKDAY,1,1,1,1,1,0,0,20300101,20301231\n"
+        "NIGHT,1,1,1,1,1,1,1,20300101,20301231\n"
+    ),
+    "calendar_dates.txt": (
+        "service_id,date,exception_type\n"
+        "WEEKDAY,20300102,2\n"
+    ),
+}
+
+
+class ImportGTFSTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.feed = Path(directory.name)
+        for name, content in FEED.items():
+            (self.feed / name).write_text(content)
+
+    def load(self, feed=None):
+        out = StringIO()
+        call_command(
+            "import_gtfs",
+            str(feed or self.feed),
+            "--start", "20300101",
+            "--days", "3",
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_imports_feed(self):
+        kyiv = StationModel.objects.create(
+            name="Kyiv Passage", latitude=50.44012, longitude=30.48875
+        )
+        out = self.load()
+
+        self.assertIn("rows/s", out)
+        self.assertEqual(StationModel.objects.count(), 3)
+        self.assertEqual(
+            TrainModel.objects.get().name, "Kyiv - Lviv Intercity"
+        )
+        # Tuesday to Thursday, without the cancelled Wednesday run
+        day_trains = JourneyModel.objects.filter(route__source=kyiv)
+        self.assertEqual(
+            list(day_trains.values_list("departure_time", flat=True)),
+            [
+                datetime(2030, 1, 1, 5, 0, tzinfo=UTC),
+                datetime(2030, 1, 3, 5, 0, tzinfo=UTC),
+            ],
+        )
+        route = RouteModel.objects.get(source=kyiv)
+        self.assertEqual(
+            route.distance,
+            round(haversine(*KYIV, *FASTIV) + haversine(*FASTIV, *LVIV)),
+        )
+        night = JourneyModel.objects.filter(route__destination=kyiv)
+        self.assertEqual(night.count(), 3)
+        self.assertEqual(
+            night.earliest("departure_time").arrival_time,
+            datetime(2030, 1, 1, 23, 10, tzinfo=UTC),
+        )
+
+    def test_import_is_recorded_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.load()
+        self.assertIsNone(last_bulk_import())
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(last_bulk_import())
+
+    def test_reimport_adds_nothing(self):
+        self.load()
+        self.load()
+
+        self.assertEqual(StationModel.objects.count(), 3)
+        self.assertEqual(RouteModel.objects.count(), 2)
+        self.assertEqual(JourneyModel.objects.count(), 5)
+
+    def test_zip_feed(self):
+        archive = self.feed / "feed.zip"
+        with zipfile.ZipFile(archive, "w") as feed:
+            for name, content in FEED.items():
+                feed.writestr(name, content)
+        self.load(archive)
+
+        self.assertEqual(JourneyModel.objects.count(), 5)
+
+    def test_missing_file(self):
+        (self.feed / "trips.txt").unlink()
+
+        with self.assertRaisesMessage(CommandError, "trips.txt is missing"):
+            self.load()
+        self.assertFalse(StationModel.objects.exists())
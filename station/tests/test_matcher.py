@@ -0,0 +1,63 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from station.matcher import (
+    StationMatcher,
+    get_station_matcher,
+    invalidate_station_matcher,
+)
+from station.models import StationModel
+from station.response_cache import bump_cache_version
+from station.tests.tests_api.test_helpers import create_station
+
+
+class StationMatcherTest(SimpleTestCase):
+    def setUp(self):
+        self.matcher = StationMatcher(
+            [
+                (1, "Dnipro Main"),
+                (2, "Kyiv Passage"),
+                (3, "Lviv"),
+                (4, "Dnipro Main"),
+                (5, "Zaporizhzhia-1"),
+            ]
+        )
+
+    def test_substring_matches_every_station(self):
+        self.assertEqual(self.matcher.resolve("dnipro"), [1, 4])
+        self.assertEqual(self.matcher.resolve("  KYIV "), [2])
+
+    def test_misspelled_name_resolves_to_closest(self):
+        self.assertEqual(self.matcher.resolve("Dnirpo"), [1, 4])
+        self.assertEqual(self.matcher.resolve("Zaporizhia"), [5])
+
+    def test_unknown_name(self):
+        self.assertEqual(self.matcher.resolve("Warszawa Centralna"), [])
+        self.assertEqual(self.matcher.resolve(""), [])
+
+
+class SharedStationMatcherTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        invalidate_station_matcher()
+        self.addCleanup(invalidate_station_matcher)
+        self.station = create_station()
+
+    def test_matcher_is_reused_until_stations_change(self):
+        matcher = get_station_matcher()
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_station_matcher(), matcher)
+        with self.captureOnCommitCallbacks(execute=True):
+            odesa = create_station(name="Odesa Main")
+        self.assertEqual(get_station_matcher().resolve("odesa"), [odesa.id])
+
+    def test_station_write_of_another_process_rebuilds_matcher(self):
+        get_station_matcher()
+        # Written without signals, then retired as the importers do
+        odesa = StationModel.objects.bulk_create(
+            [StationModel(name="Odesa Main", latitude=46.5, longitude=30.7)]
+        )[0]
+        bump_cache_version(StationModel)
+
+        self.assertEqual(get_station_matcher().resolve("odesa"), [odesa.id])
@@ -1,5 +1,9 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from station.models import (
@@ -204,6 +208,38 @@ class JourneyModelTest(TestCase):
     def test_journey_db_table_name(self):
         self.assertEqual(JourneyModel._meta.db_table, "journey")
 
+    def test_journey_save_keeps_seat_counters(self):
+        stale = JourneyModel.objects.get(pk=self.journey.pk)
+        JourneyModel.sell_seats(self.journey.pk, 3)
+        JourneyModel.hold_seats(self.journey.pk, 2)
+
+        stale.departure_time = stale.arrival_time
+        stale.save()
+        self.journey.refresh_from_db()
+
+        self.assertEqual(self.journey.departure_time, stale.arrival_time)
+        self.assertEqual(self.journey.seats_sold, 3)
+        self.assertEqual(self.journey.seats_held, 2)
+
+    def test_updated_at_follows_database_clock(self):
+        skewed = timezone.now() - timedelta(days=365)
+        with mock.patch("django.utils.timezone.now", return_value=skewed):
+            self.journey.save()
+        self.journey.refresh_from_db()
+
+        self.assertGreater(self.journey.updated_at, skewed + timedelta(days=1))
+
+    def test_train_capacity_change_touches_journeys(self):
+        long_ago = self.journey.updated_at - timedelta(days=365)
+        JourneyModel.objects.update(updated_at=long_ago)
+        train = self.journey.train
+        train.cargo_num += 1
+        train.save()
+        self.journey.refresh_from_db()
+
+        self.assertEqual(self.journey.seats_capacity, train.capacity)
+        self.assertGreater(self.journey.updated_at, long_ago)
+
 
 class OrderModelTest(TestCase):
     def setUp(self):
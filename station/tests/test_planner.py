@@ -0,0 +1,73 @@
+from django.test import SimpleTestCase
+
+from station.planner import Connection, ConnectionScanPlanner
+
+HOUR = 3600
+
+
+class ConnectionScanPlannerTest(SimpleTestCase):
+    def setUp(self):
+        self.planner = ConnectionScanPlanner(
+            [
+                Connection(1 * HOUR, 9 * HOUR, 1, 3, 10),
+                Connection(1 * HOUR, 2 * HOUR, 1, 2, 11),
+                Connection(2 * HOUR, 4 * HOUR, 2, 3, 12),
+                Connection(3 * HOUR, 5 * HOUR, 2, 3, 13),
+                Connection(5 * HOUR, 6 * HOUR, 3, 4, 14),
+            ]
+        )
+
+    def test_pareto_front_by_transfers(self):
+        itineraries = self.planner.plan(1, 3, 0, min_transfer=1800)
+
+        self.assertEqual(len(itineraries), 2)
+        direct, connecting = itineraries
+        self.assertEqual(direct.transfers, 0)
+        self.assertEqual(direct.arrival, 9 * HOUR)
+        self.assertEqual([leg.journey_id for leg in direct.legs], [10])
+        self.assertEqual(connecting.transfers, 1)
+        self.assertEqual(connecting.arrival, 5 * HOUR)
+        self.assertEqual(
+            [leg.journey_id for leg in connecting.legs], [11, 13]
+        )
+
+    def test_min_transfer_allows_tight_connection(self):
+        itineraries = self.planner.plan(1, 3, 0, min_transfer=0)
+
+        self.assertEqual(itineraries[-1].arrival, 4 * HOUR)
+        self.assertEqual(
+            [leg.journey_id for leg in itineraries[-1].legs], [11, 12]
+        )
+
+    def test_max_transfers_limits_legs(self):
+        self.assertEqual(
+            self.planner.plan(1, 4, 0, max_transfers=1, min_transfer=0), []
+        )
+
+        itineraries = self.planner.plan(
+            1, 4, 0, max_transfers=2, min_transfer=0
+        )
+        self.assertEqual(len(itineraries), 1)
+        self.assertEqual(itineraries[0].transfers, 2)
+        self.assertEqual(
+            [leg.journey_id for leg in itineraries[0].legs], [11, 12, 14]
+        )
+
+    def test_horizon_leaves_out_later_legs(self):
+        itineraries = self.planner.plan(
+            1, 3, 0, min_transfer=1800, horizon=2 * HOUR
+        )
+
+        # The connection departing at 3h is out of reach
+        self.assertEqual(
+            [(itinerary.arrival, itinerary.transfers)
+             for itinerary in itineraries],
+            [(9 * HOUR, 0)],
+        )
+        self.assertEqual(self.planner.plan(1, 4, 0, horizon=4 * HOUR), [])
+
+    def test_departure_after_last_connection(self):
+        self.assertEqual(self.planner.plan(1, 3, 10 * HOUR), [])
+
+    def test_unreachable_station(self):
+        self.assertEqual(self.planner.plan(4, 1, 0), [])
@@ -0,0 +1,160 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+import msgpack
+import pytz
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from station.renderers import (
+    CSVRenderer,
+    MessagePackParser,
+    MessagePackRenderer,
+    NDJSONRenderer,
+    ORJSONParser,
+    ORJSONRenderer,
+)
+
+KYIV = pytz.timezone("Europe/Kyiv")
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    def assertRendersAsStock(self, data, media_type=None, context=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type, context),
+            JSONRenderer().render(data, media_type, context),
+        )
+
+    def test_matches_stock_renderer(self):
+        self.assertRendersAsStock(
+            {
+                "departure_time": KYIV.localize(datetime(2030, 7, 1, 8, 15)),
+                "utc": datetime(2030, 1, 1, 6, 0, 0, 123456, pytz.utc),
+                "naive": datetime(2030, 1, 1, 6, 0),
+                "date": date(2030, 1, 1),
+                "time": time(6, 30),
+                "duration": timedelta(hours=2),
+                "price": Decimal("12.50"),
+                "label": gettext_lazy("Not found."),
+                "id": uuid.UUID(int=1),
+                "name": "Київ-Пасажирський",
+                "ratio": 0.1 + 0.2,
+                "nested": [{"a": None, "b": True}, (1, 2)],
+                "separators": "\u2028 \u2029",
+            }
+        )
+
+    def test_falls_back_to_stock_renderer(self):
+        self.assertRendersAsStock({"big": 2 ** 70})
+        self.assertRendersAsStock({"id": 1}, "application/json; indent=4")
+        self.assertRendersAsStock({"id": 1}, context={"indent": 2})
+
+    def test_empty_data(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTest(SimpleTestCase):
+    def parse(self, body: bytes, encoding="utf-8"):
+        return ORJSONParser().parse(
+            io.BytesIO(body), parser_context={"encoding": encoding}
+        )
+
+    def test_parses_like_stock_parser(self):
+        body = '{"name": "Львів", "seats": [1, 2.5], "x": null}'.encode()
+        self.assertEqual(
+            self.parse(body),
+            JSONParser().parse(
+                io.BytesIO(body), parser_context={"encoding": "utf-8"}
+            ),
+        )
+
+    def test_other_encodings_use_stock_parser(self):
+        body = '{"name": "Lviv"}'.encode("utf-16")
+        self.assertEqual(self.parse(body, "utf-16"), {"name": "Lviv"})
+
+    def test_invalid_json(self):
+        with self.assertRaisesMessage(ParseError, "JSON parse error"):
+            self.parse(b'{"name": ')
+
+
+class MessagePackTest(SimpleTestCase):
+    def test_renders_json_representation(self):
+        data = {
+            "departure_time": KYIV.localize(datetime(2030, 7, 1, 8, 15)),
+            "utc": datetime(2030, 1, 1, 6, 0, tzinfo=pytz.utc),
+            "price": Decimal("0.10"),
+            "label": gettext_lazy("Not found."),
+            "id": uuid.UUID(int=1),
+            "seats": (1, 2),
+        }
+
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(data)),
+            {
+                "departure_time": "2030-07-01T08:15:00+03:00",
+                "utc": "2030-01-01T06:00:00Z",
+                "price": "0.10",
+                "label": "Not found.",
+                "id": "00000000-0000-0000-0000-000000000001",
+                "seats": [1, 2],
+            },
+        )
+
+    def test_parses_timestamps(self):
+        departure = datetime(2030, 1, 1, 6, 0, tzinfo=pytz.utc)
+        body = msgpack.packb({"departure": departure}, datetime=True)
+
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(body)),
+            {"departure": departure},
+        )
+
+    def test_invalid_body(self):
+        for body in (b"\x81", b"\xc1", b"\x81\x01\x02", b"\x01\x02"):
+            with self.assertRaisesMessage(ParseError, "MessagePack parse"):
+                MessagePackParser().parse(io.BytesIO(body))
+
+
+class ExportRendererTest(SimpleTestCase):
+    data = [
+        {
+            "id": 1,
+            "departure_time": datetime(2030, 1, 1, 6, 0, tzinfo=pytz.utc),
+            "route_from": 'Kyiv, "Main"',
+            "crews": ["Taras Smith", "Olena Bondarenko"],
+            "price": Decimal("12.50"),
+            "seats_held": None,
+        },
+        {
+            "id": 2,
+            "departure_time": None,
+            "route_from": "Lviv",
+            "crews": [],
+            "price": Decimal("1"),
+            "seats_held": 0,
+        },
+    ]
+
+    def test_ndjson(self):
+        lines = NDJSONRenderer().render(self.data).splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0], JSONRenderer().render(self.data[0]))
+        self.assertEqual(
+            NDJSONRenderer().render({"detail": "Not found."}),
+            b'{"detail":"Not found."}\n',
+        )
+
+    def test_csv(self):
+        self.assertEqual(
+            CSVRenderer().render(self.data).decode(),
+            "id,departure_time,route_from,crews,price,seats_held\r\n"
+            '1,2030-01-01T06:00:00Z,"Kyiv, ""Main""",'
+            "Taras Smith; Olena Bondarenko,12.50,\r\n"
+            "2,,Lviv,,1,0\r\n",
+        )
@@ -0,0 +1,136 @@
+import base64
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.holds import hold_seats
+from station.models import (
+    JourneyModel,
+    OrderModel,
+    SeatHoldModel,
+    TicketModel,
+)
+from station.seatmap import (
+    SeatMap,
+    get_seat_map,
+    seat_map_generation,
+    seat_map_key,
+)
+from station.tests.tests_api.test_helpers import create_journey
+
+
+class SeatMapTest(SimpleTestCase):
+    def test_bit_layout(self):
+        seat_map = SeatMap(20, 30)
+        seat_map.set(1, 1)
+        seat_map.set(1, 9)
+        seat_map.set(20, 30)
+
+        self.assertEqual(len(seat_map.bits), 75)
+        self.assertEqual(seat_map.bits[0], 0x80)
+        self.assertEqual(seat_map.bits[1], 0x80)
+        self.assertEqual(seat_map.bits[-1], 0x01)
+        self.assertTrue(seat_map.is_taken(20, 30))
+        self.assertFalse(seat_map.is_taken(1, 2))
+        self.assertEqual(seat_map.occupied(), {1: [1, 9], 20: [30]})
+
+        seat_map.set(1, 9, taken=False)
+        self.assertEqual(seat_map.occupied(), {1: [1], 20: [30]})
+
+
+class CachedSeatMapTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.order = OrderModel.objects.create(user=user)
+        self.journey = create_journey()
+
+    def test_cached_map_is_dropped_on_ticket_changes(self):
+        TicketModel.objects.create(
+            order=self.order, journey=self.journey, cargo=2, seat=3
+        )
+        self.assertEqual(get_seat_map(self.journey).occupied(), {2: [3]})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_seat_map(self.journey).occupied(), {2: [3]})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = TicketModel.objects.create(
+                order=self.order, journey=self.journey, cargo=2, seat=4
+            )
+        self.assertEqual(get_seat_map(self.journey).occupied(), {2: [3, 4]})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+        self.assertEqual(get_seat_map(self.journey).occupied(), {2: [3]})
+
+    def test_rebuild_racing_a_ticket_is_not_kept(self):
+        # A rebuild read the generation, then a ticket was committed and
+        # only then the rebuild stored its map
+        generation = seat_map_generation(self.journey.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketModel.objects.create(
+                order=self.order, journey=self.journey, cargo=2, seat=3
+            )
+        cache.set(
+            seat_map_key(self.journey.id),
+            (generation, 20, 30, bytes(SeatMap(20, 30).bits)),
+        )
+
+        self.assertEqual(get_seat_map(self.journey).occupied(), {2: [3]})
+
+    def test_live_holds_are_taken(self):
+        hold_seats(self.journey, self.order.user, [(1, 1)])
+        SeatHoldModel.objects.create(
+            journey=self.journey,
+            user=self.order.user,
+            cargo=1,
+            seat=2,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        JourneyModel.hold_seats(self.journey.id, 1)
+        self.journey.refresh_from_db()
+
+        self.assertEqual(get_seat_map(self.journey).occupied(), {1: [1]})
+
+
+class JourneySeatsApiTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(user)
+        self.journey = create_journey()
+        order = OrderModel.objects.create(user=user)
+        TicketModel.objects.create(
+            order=order, journey=self.journey, cargo=1, seat=2
+        )
+        self.url = reverse("station:journey-seats", args=[self.journey.id])
+
+    def test_seats_json(self):
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["cargo_num"], 20)
+        self.assertEqual(res.data["places_in_cargo"], 30)
+        self.assertEqual(res.data["occupied"], {"1": [2]})
+        bitmap = base64.b64decode(res.data["bitmap"])
+        self.assertEqual(len(bitmap), 75)
+        self.assertEqual(bitmap[0], 0x40)
+
+    def test_seats_binary(self):
+        res = self.client.get(self.url, {"encoding": "binary"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/octet-stream")
+        self.assertEqual(res["X-Places-In-Cargo"], "30")
+        self.assertEqual(len(res.content), 75)
+        self.assertEqual(res.content[0], 0x40)
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase
+
+from station.models import (
+    JourneyModel,
+    RouteModel,
+    StationModel,
+    TicketModel,
+)
+
+
+class SeedRailwayTest(TestCase):
+    def seed(self, seed=7):
+        call_command(
+            "seed_railway",
+            "--scale", "0.005",
+            "--days", "3",
+            "--seed", str(seed),
+            "--start", "2030-01-01",
+            stdout=StringIO(),
+        )
+
+    def test_seeds_consistent_network(self):
+        self.seed()
+
+        self.assertEqual(StationModel.objects.count(), 10)
+        self.assertEqual(JourneyModel.objects.count(), 15)
+        self.assertTrue(TicketModel.objects.exists())
+        drifted = JourneyModel.objects.annotate(
+            sold=Count("tickets")
+        ).exclude(seats_sold=F("sold"))
+        self.assertFalse(drifted.exists())
+
+        links = {}
+        for source, destination in RouteModel.objects.values_list(
+            "source_id", "destination_id"
+        ):
+            links.setdefault(source, set()).add(destination)
+        start = next(iter(links))
+        reached, frontier = {start}, [start]
+        while frontier:
+            for station in links.get(frontier.pop(), ()):
+                if station not in reached:
+                    reached.add(station)
+                    frontier.append(station)
+        self.assertEqual(reached, set(links))
+        self.assertEqual(len(reached), 10)
+
+    def test_sequences_follow_seeded_rows(self):
+        self.seed()
+
+        station = StationModel.objects.create(
+            name="After seed", latitude=0, longitude=0
+        )
+        self.assertEqual(
+            station.id,
+            StationModel.objects.exclude(pk=station.pk).latest("id").id + 1,
+        )
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from threading import Event
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+from pytz import timezone
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.models import JourneyModel
+from station.tests.tests_api.test_helpers import (
+    create_journey,
+    create_route,
+    create_station,
+)
+from station.timetable import (
+    TimetableIndex,
+    build_planner_in_background,
+    bump_timetable_version,
+    current_timetable,
+    get_planner,
+    invalidate_planner,
+    peek_timetable,
+    publish_timetable_change,
+    rebuild_in_background,
+    set_timetable,
+)
+
+KIEV = timezone("Europe/Kiev")
+
+
+def timestamp(journey: JourneyModel) -> int:
+    return int(journey.departure_time.timestamp())
+
+
+class TimetableIndexTest(TestCase):
+    def setUp(self):
+        self.lviv = create_station(name="Lviv")
+        self.odesa = create_station(name="Odesa")
+        self.journey = create_journey()
+        self.source_id = self.journey.route.source_id
+        set_timetable(TimetableIndex.from_db())
+
+    def tearDown(self):
+        set_timetable(None)
+
+    def test_built_from_db(self):
+        timetable = peek_timetable()
+
+        self.assertEqual(len(timetable), 1)
+        self.assertEqual(
+            timetable.search([self.source_id]), [self.journey.id]
+        )
+        self.assertEqual(timetable.verify(), [])
+
+    def test_patched_on_journey_save_and_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            later = create_journey(
+                route=self.journey.route,
+                departure_time=(
+                    self.journey.departure_time + timedelta(hours=2)
+                ),
+            )
+            earlier = create_journey(
+                route=self.journey.route,
+                departure_time=(
+                    self.journey.departure_time - timedelta(hours=2)
+                ),
+            )
+        timetable = peek_timetable()
+
+        self.assertEqual(
+            timetable.search([self.source_id]),
+            [earlier.id, self.journey.id, later.id],
+        )
+        self.assertEqual(
+            timetable.search(
+                [self.source_id],
+                start=timestamp(self.journey),
+                end=timestamp(later),
+            ),
+            [self.journey.id],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            later.delete()
+        self.assertEqual(
+            timetable.search([self.source_id]), [earlier.id, self.journey.id]
+        )
+        self.assertEqual(timetable.verify(), [])
+        # Only writes of this process were committed since the build
+        self.assertIs(current_timetable(), timetable)
+
+    def test_rolled_back_write_is_not_indexed(self):
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                create_journey(route=self.journey.route)
+                raise DatabaseError
+
+        self.assertEqual(len(peek_timetable()), 1)
+
+    @mock.patch("station.timetable._rebuilding", new_callable=Event)
+    @mock.patch("station.timetable.threading.Thread")
+    def test_write_of_another_process_makes_index_stale(self, thread, _):
+        bump_timetable_version()
+
+        self.assertIsNone(current_timetable())
+        thread.return_value.start.assert_called_once()
+
+    def test_change_published_by_another_process_is_applied(self):
+        journey = create_journey(route=self.journey.route)
+        publish_timetable_change(
+            "upsert_journey",
+            journey.id,
+            journey.route_id,
+            timestamp(journey),
+            int(journey.arrival_time.timestamp()),
+        )
+        journey_id = self.journey.id
+        self.journey.delete()
+        publish_timetable_change("remove_journey", journey_id)
+
+        index = current_timetable()
+        self.assertIs(index, peek_timetable())
+        self.assertEqual(index.search([self.source_id]), [journey.id])
+        self.assertEqual(index.verify(), [])
+
+    @mock.patch("station.timetable._planning", new_callable=Event)
+    @mock.patch("station.timetable._rebuilding", new_callable=Event)
+    @mock.patch("station.timetable.threading.Thread")
+    def test_planner_keeps_serving_while_rebuilt(self, thread, *_):
+        planner = get_planner()
+
+        invalidate_planner()
+        self.assertIs(get_planner(), planner)
+        self.assertEqual(
+            thread.call_args.kwargs["target"], build_planner_in_background
+        )
+
+        bump_timetable_version()
+        self.assertIs(get_planner(), planner)
+        self.assertEqual(
+            thread.call_args.kwargs["target"], rebuild_in_background
+        )
+
+    def test_patched_on_route_change(self):
+        route = self.journey.route
+        route.source = self.lviv
+        route.destination = self.odesa
+        with self.captureOnCommitCallbacks(execute=True):
+            route.save()
+        timetable = peek_timetable()
+
+        self.assertEqual(timetable.search([self.source_id]), [])
+        self.assertEqual(
+            timetable.search([self.lviv.id], [self.odesa.id]),
+            [self.journey.id],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route.delete()
+        self.assertEqual(len(timetable), 0)
+        self.assertEqual(timetable.verify(), [])
+
+    def test_rebuild_command_verifies_index(self):
+        create_journey(route=create_route(source=self.lviv))
+
+        out = StringIO()
+        call_command("rebuild_timetable", "--verify", stdout=out)
+
+        self.assertIn("consistent", out.getvalue())
+
+
+class JourneySearchTimetableTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(user)
+        self.lviv = create_station(name="Lviv")
+        self.journey = create_journey()
+        self.journey_lviv = create_journey(
+            route=create_route(source=self.lviv),
+            departure_time=KIEV.localize(datetime(2022, 6, 15, 0, 30)),
+        )
+        set_timetable(TimetableIndex.from_db())
+
+    def tearDown(self):
+        set_timetable(None)
+
+    def search(self, **params):
+        res = self.client.get(reverse("station:journey-list"), params)
+        return [journey["id"] for journey in res.data["results"]]
+
+    def test_filter_from_index(self):
+        self.assertEqual(self.search(**{"from": "dni"}), [self.journey.id])
+        self.assertEqual(
+            self.search(**{"from": "lv", "to": "kyiv"}),
+            [self.journey_lviv.id],
+        )
+
+    @mock.patch("station.timetable._rebuilding", new_callable=Event)
+    @mock.patch("station.timetable.threading.Thread")
+    def test_stale_index_falls_back_to_database(self, *mocks):
+        # Written by another process, which bumped the version
+        journey = create_journey(route=self.journey_lviv.route)
+        bump_timetable_version()
+
+        self.assertEqual(
+            self.search(**{"from": "lv", "to": "kyiv"}),
+            [self.journey_lviv.id, journey.id],
+        )
+
+    def test_filter_without_source_uses_database(self):
+        with mock.patch.object(TimetableIndex, "search") as search:
+            self.assertEqual(
+                sorted(self.search(to="kyiv")),
+                [self.journey.id, self.journey_lviv.id],
+            )
+        search.assert_not_called()
+
+    def test_filter_by_local_date(self):
+        self.assertEqual(
+            self.search(**{"to": "kyiv", "date": "2022-06-15"}),
+            [self.journey_lviv.id],
+        )
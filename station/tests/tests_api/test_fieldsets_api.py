@@ -0,0 +1,167 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.models import OrderModel, TicketModel
+from station.serializers import JourneyDetailSerializer
+from station.tests.tests_api.test_helpers import create_crew, create_journey
+
+URL_JOURNEY_LIST = reverse("station:journey-list")
+URL_ORDER_LIST = reverse("station:order-list")
+
+
+def journey_detail_url(pk: int) -> str:
+    return reverse("station:journey-detail", args=[pk])
+
+
+class FieldsetTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = create_journey()
+        self.journey.crews.add(
+            create_crew(first_name="Olha", last_name="Melnyk"),
+            create_crew(first_name="Ivan", last_name="Bondar"),
+        )
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return res.data, [query["sql"] for query in queries]
+
+    def test_detail_fields(self):
+        data, queries = self.get(
+            journey_detail_url(self.journey.id),
+            fields="id,departure_time,route.source.name",
+        )
+
+        self.assertEqual(
+            data,
+            {
+                "id": self.journey.id,
+                "departure_time": JourneyDetailSerializer(
+                    self.journey
+                ).data["departure_time"],
+                "route": {"source": {"name": "Dnipro Main"}},
+            },
+        )
+        # No train, crews or destination, and no station images
+        journey_query = queries[-1]
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("train", journey_query)
+        self.assertNotIn('"image"', journey_query)
+        self.assertEqual(journey_query.count("JOIN"), 2)
+
+    def test_detail_expand(self):
+        data, queries = self.get(
+            journey_detail_url(self.journey.id), expand="crews"
+        )
+
+        self.assertEqual(data["train"], self.journey.train_id)
+        self.assertEqual(data["route"], self.journey.route_id)
+        self.assertEqual(
+            [crew["full_name"] for crew in data["crews"]],
+            ["Ivan Bondar", "Olha Melnyk"],
+        )
+        self.assertNotIn("JOIN", queries[-2])
+
+    def test_detail_collapsed_crews(self):
+        data, queries = self.get(
+            journey_detail_url(self.journey.id), fields="crews", expand=""
+        )
+
+        self.assertEqual(
+            data,
+            {"crews": list(self.journey.crews.values_list("id", flat=True))},
+        )
+        self.assertNotIn("first_name", queries[-1])
+
+    def test_list_fields(self):
+        data, queries = self.get(
+            URL_JOURNEY_LIST, fields="id,route_to", pagination="cursor"
+        )
+
+        self.assertEqual(
+            data["results"],
+            [{"id": self.journey.id, "route_to": "Kyiv Passage"}],
+        )
+        # The crew names are not queried
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("train", queries[0])
+
+    def test_order_fields(self):
+        order = OrderModel.objects.create(user=self.user)
+        TicketModel.objects.create(
+            order=order, journey=self.journey, cargo=1, seat=1
+        )
+
+        data, queries = self.get(
+            URL_ORDER_LIST,
+            fields="id,tickets.seat,tickets.journey.tickets_available",
+        )
+
+        self.assertEqual(
+            data["results"],
+            [
+                {
+                    "id": order.id,
+                    "tickets": [
+                        {"seat": 1, "journey": {"tickets_available": 599}}
+                    ],
+                }
+            ],
+        )
+        self.assertNotIn("crew", "".join(queries))
+
+    def test_invalid_fieldsets(self):
+        url = journey_detail_url(self.journey.id)
+        for params in (
+            {"fields": "id,platform"},
+            {"fields": "route.source.name.first"},
+            {"expand": "departure_time"},
+            {"fields": "train.name", "expand": "route"},
+        ):
+            res = self.client.get(url, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_fieldsets(self):
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.post(
+            reverse("station:route-list") + "?fields=id",
+            {
+                "source": self.journey.route.source_id,
+                "destination": self.journey.route.destination_id,
+                "distance": 100,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(res.data), ["id", "source", "destination", "distance"]
+        )
+
+
+class FieldsetSchemaTest(SimpleTestCase):
+    def test_list_and_detail_declare_parameters(self):
+        paths = SchemaGenerator().get_schema(public=True)["paths"]
+        prefix = URL_JOURNEY_LIST.removesuffix("journey/")
+        for resource in (
+            "train-type", "train", "crew", "station", "journey", "order"
+        ):
+            for path in (f"{prefix}{resource}/", f"{prefix}{resource}/{{id}}/"):
+                names = {
+                    parameter["name"]
+                    for parameter in paths[path]["get"]["parameters"]
+                }
+                with self.subTest(path=path):
+                    self.assertLessEqual({"fields", "expand"}, names)
@@ -1,19 +1,25 @@
-from datetime import datetime
+import csv
+import io
+import json
+from datetime import datetime, UTC
+from unittest import mock
 
+from django.db import connection
 from django.db.models import F, Count
 from pytz import timezone
 
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.reverse import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
-from station.models import JourneyModel
+from station.models import JourneyModel, OrderModel, TicketModel
 from station.serializers import (
     JourneyListSerializer,
     JourneyDetailSerializer,
     JourneySerializer,
 )
+from station.views import TICKETS_AVAILABLE
 from station.tests.tests_api.test_helpers import (
     create_route,
     create_train,
@@ -66,7 +72,7 @@ class AuthorizedJourneyTest(APITestCase):
         )
         journeys = route_with_annotate().filter(
             id__in=[self.journey.id, self.journey_2.id, self.journey_3.id]
-        )
+        ).order_by("id")
 
         serialized_data = JourneyListSerializer(journeys, many=True).data
 
@@ -108,6 +114,15 @@ class AuthorizedJourneyTest(APITestCase):
         self.assertIn(self.serializer_3, res_filter_to.data["results"])
         self.assertNotIn(self.serializer_2, res_filter_to.data["results"])
 
+    def test_journey_filter_with_typo(self):
+        res = self.client.get(
+            URL_JOURNEY_LIST, {"from": "Dnirpo", "to": "Kiyv"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(self.serializer_1, res.data["results"])
+        self.assertNotIn(self.serializer_2, res.data["results"])
+        self.assertNotIn(self.serializer_3, res.data["results"])
+
     def test_journey_filter_by_date(self):
         res_filter_date = self.client.get(
             URL_JOURNEY_LIST,
@@ -118,6 +133,41 @@ class AuthorizedJourneyTest(APITestCase):
         self.assertNotIn(self.serializer_2, res_filter_date.data["results"])
         self.assertIn(self.serializer_3, res_filter_date.data["results"])
 
+    def test_journey_filter_by_local_day_boundary(self):
+        after_midnight = create_journey(
+            departure_time=datetime(2022, 6, 14, 21, 30, tzinfo=UTC)
+        )
+        res = self.client.get(URL_JOURNEY_LIST, {"date": "2022-06-15"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [after_midnight.id],
+        )
+
+    def test_journey_filter_by_date_range(self):
+        res = self.client.get(
+            URL_JOURNEY_LIST,
+            {"date_from": "2022-04-01", "date_to": "2022-04-14"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [self.serializer_3])
+
+        res = self.client.get(URL_JOURNEY_LIST, {"date_from": "2022-04-15"})
+        self.assertIn(self.serializer_1, res.data["results"])
+        self.assertIn(self.serializer_2, res.data["results"])
+        self.assertNotIn(self.serializer_3, res.data["results"])
+
+    def test_journey_filter_by_invalid_date(self):
+        res = self.client.get(URL_JOURNEY_LIST, {"date": "14.06.2022"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_journey_filter_by_impossible_date(self):
+        for params in ({"date": "2022-02-30"}, {"date_to": "2022-13-01"}):
+            res = self.client.get(URL_JOURNEY_LIST, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(list(params)[0], res.data)
+
     def test_journey_create_forbidden(self):
         departure_time = datetime(
             2023, 6, 14, 15, 34,
@@ -138,6 +188,273 @@ class AuthorizedJourneyTest(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class JourneyKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        departure_time = datetime(2022, 6, 14, 12, 0, tzinfo=UTC)
+        # Two journeys per departure time to cross ties on the cursor
+        self.journeys = [
+            create_journey(
+                departure_time=departure_time.replace(hour=12 + hour),
+                arrival_time=departure_time.replace(hour=23),
+            )
+            for hour in (3, 1, 2, 1, 3, 2, 4)
+        ]
+        self.client.force_authenticate(user)
+
+    def test_pages_follow_departure_time_and_id(self):
+        expected = [
+            journey.id
+            for journey in sorted(
+                self.journeys,
+                key=lambda journey: (journey.departure_time, journey.id),
+            )
+        ]
+        seen = []
+        url = URL_JOURNEY_LIST + "?pagination=cursor&page_size=2"
+        with self.assertNumQueries(2):
+            res = self.client.get(url)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            seen.extend(journey["id"] for journey in res.data["results"])
+            if res.data["next"] is None:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        res = self.client.get(URL_JOURNEY_LIST, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_numbers_by_default(self):
+        res = self.client.get(URL_JOURNEY_LIST)
+
+        self.assertEqual(res.data["count"], len(self.journeys))
+
+
+class JourneyConditionalGetTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.journey = create_journey()
+        self.url = detail_route_url(self.journey.id)
+        self.client.force_authenticate(user)
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.assertNumQueries(1):
+            res = self.client.get(self.url, headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertFalse(res.content)
+
+    def test_weak_etag_matches(self):
+        etag = self.client.get(self.url)["ETag"]
+        res = self.client.get(self.url, headers={"If-None-Match": f"W/{etag}"})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_nested_changes_move_etag(self):
+        etags = [self.client.get(self.url)["ETag"]]
+        self.journey.train.name = "Odesa Express"
+        self.journey.train.save()
+        etags.append(self.client.get(self.url)["ETag"])
+        self.journey.crews.add(create_crew())
+        etags.append(self.client.get(self.url)["ETag"])
+        self.journey.route.source.name = "Odesa Main"
+        self.journey.route.source.save()
+        res = self.client.get(self.url, headers={"If-None-Match": etags[0]})
+
+        self.assertEqual(len(set(etags + [res["ETag"]])), 4)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        res = self.client.get(
+            self.url, headers={"If-Modified-Since": last_modified}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class JourneyListValuesTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(user)
+        departure_time = datetime(2022, 6, 14, 12, 0, 0, 250000, tzinfo=UTC)
+        crews = [
+            create_crew(first_name="Olha", last_name="Melnyk"),
+            create_crew(first_name="Ivan", last_name="Bondar"),
+            create_crew(first_name="Petro", last_name="Shevchenko"),
+        ]
+        for hour in (3, 1, 2):
+            journey = create_journey(
+                departure_time=departure_time.replace(hour=12 + hour),
+                arrival_time=departure_time.replace(hour=23),
+            )
+            journey.crews.set(crews[:hour])
+
+    def test_same_output_as_list_serializer(self):
+        journeys = (
+            JourneyModel.objects.annotate(tickets_available=TICKETS_AVAILABLE)
+            .select_related()
+            .prefetch_related("crews")
+            .order_by("departure_time", "id")
+        )
+        expected = JourneyListSerializer(journeys, many=True).data
+
+        for params in ({}, {"format": "msgpack"}):
+            res = self.client.get(
+                URL_JOURNEY_LIST, {"pagination": "cursor", **params}
+            )
+            renderer = res.accepted_renderer
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                res.content,
+                renderer.render({"next": None, "results": expected}),
+            )
+        self.assertEqual(
+            expected[2]["crews"],
+            ["Ivan Bondar", "Olha Melnyk", "Petro Shevchenko"],
+        )
+
+
+class JourneyExportTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.admin = get_user_model().objects.create_user(
+            email="admin@admin.com", password="password", is_staff=True
+        )
+        departure_time = datetime(2022, 6, 14, 6, 0, tzinfo=UTC)
+        self.journeys = [
+            create_journey(
+                departure_time=departure_time.replace(hour=hour),
+                arrival_time=departure_time.replace(hour=hour + 1),
+            )
+            for hour in (9, 7, 8)
+        ]
+        create_journey(
+            departure_time=datetime(2022, 6, 15, 9, 0, tzinfo=UTC),
+            arrival_time=datetime(2022, 6, 15, 10, 0, tzinfo=UTC),
+        )
+        order = OrderModel.objects.create(user=self.user)
+        for journey, seat in [
+            (self.journeys[0], 2), (self.journeys[0], 1), (self.journeys[1], 5)
+        ]:
+            TicketModel.objects.create(
+                order=order, journey=journey, cargo=1, seat=seat
+            )
+        self.url = reverse("station:journey-export")
+        self.manifest_url = reverse("station:journey-manifest")
+
+    def content(self, res) -> str:
+        self.assertTrue(res.streaming)
+        return b"".join(res.streaming_content).decode()
+
+    @mock.patch("station.exports.EXPORT_CHUNK_SIZE", 2)
+    def test_export_day_as_ndjson(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(self.url, {"date": "2022-06-14"})
+        rows = [json.loads(line) for line in self.content(res).splitlines()]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertIn('filename="journeys-2022-06-14.ndjson"',
+                      res["Content-Disposition"])
+        self.assertEqual(
+            [row["id"] for row in rows],
+            [self.journeys[1].id, self.journeys[2].id, self.journeys[0].id],
+        )
+        self.assertEqual(rows[2]["departure_time"], "2022-06-14T09:00:00Z")
+        self.assertEqual(rows[2]["route_from"], "Dnipro Main")
+        self.assertEqual(rows[2]["tickets_available"], 598)
+
+    def test_export_as_csv(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(self.url, {"format": "csv"})
+        rows = list(csv.DictReader(io.StringIO(self.content(res))))
+
+        self.assertEqual(res["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["id"], str(self.journeys[1].id))
+        self.assertEqual(rows[0]["train_name"], "Kyiv Pass")
+
+    def test_export_invalid_date(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(self.url, {"date": "14.06.2022"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_manifest_for_admin_only(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(self.manifest_url)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    @mock.patch("station.exports.EXPORT_CHUNK_SIZE", 2)
+    def test_day_manifest(self):
+        self.client.force_authenticate(self.admin)
+        res = self.client.get(
+            self.manifest_url, {"date": "2022-06-14", "format": "csv"}
+        )
+        rows = list(csv.DictReader(io.StringIO(self.content(res))))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(int(row["journey"]), int(row["seat"])) for row in rows],
+            [
+                (self.journeys[1].id, 5),
+                (self.journeys[0].id, 1),
+                (self.journeys[0].id, 2),
+            ],
+        )
+        self.assertEqual(rows[0]["passenger"], "user@user.com")
+
+
+class JourneyExportStreamingTest(APITransactionTestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        for _ in range(5):
+            create_journey()
+
+    def open_cursors(self) -> list:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT is_holdable FROM pg_cursors")
+            return [holdable for holdable, in cursor.fetchall()]
+
+    @mock.patch("station.exports.EXPORT_CHUNK_SIZE", 2)
+    def test_first_chunk_is_sent_before_rows_are_read(self):
+        self.client.force_authenticate(self.user)
+        res = self.client.get(
+            reverse("station:journey-export"), {"format": "csv"}
+        )
+        content = iter(res.streaming_content)
+
+        next(content)  # header
+        first_rows = next(content)
+        cursors = self.open_cursors()
+        rest = list(content)
+
+        self.assertEqual(first_rows.count(b"\n"), 2)
+        self.assertEqual(cursors, [False])
+        self.assertEqual(len(rest), 2)
+        self.assertEqual(self.open_cursors(), [])
+
+
 class AdminJourneyTest(APITestCase):
     def setUp(self):
         admin = get_user_model().objects.create_user(
@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from pytz import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.tests.tests_api.test_helpers import (
+    create_journey,
+    create_route,
+    create_station,
+)
+from station.timetable import set_timetable
+
+URL_JOURNEY_PLAN = reverse("station:journey-plan")
+KIEV = timezone("Europe/Kiev")
+
+
+class JourneyPlanTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(user)
+
+        self.dnipro = create_station(name="Dnipro")
+        self.poltava = create_station(name="Poltava")
+        self.kyiv = create_station(name="Kyiv")
+        self.direct = create_journey(
+            route=create_route(source=self.dnipro, destination=self.kyiv),
+            departure_time=KIEV.localize(datetime(2030, 6, 14, 8, 0)),
+            arrival_time=KIEV.localize(datetime(2030, 6, 14, 20, 0)),
+        )
+        self.first_leg = create_journey(
+            route=create_route(source=self.dnipro, destination=self.poltava),
+            departure_time=KIEV.localize(datetime(2030, 6, 14, 9, 0)),
+            arrival_time=KIEV.localize(datetime(2030, 6, 14, 12, 0)),
+        )
+        self.second_leg = create_journey(
+            route=create_route(source=self.poltava, destination=self.kyiv),
+            departure_time=KIEV.localize(datetime(2030, 6, 14, 12, 30)),
+            arrival_time=KIEV.localize(datetime(2030, 6, 14, 15, 0)),
+        )
+
+    def tearDown(self):
+        set_timetable(None)
+
+    def test_plan_returns_pareto_itineraries(self):
+        res = self.client.get(
+            URL_JOURNEY_PLAN,
+            {
+                "source": self.dnipro.id,
+                "destination": self.kyiv.id,
+                "departure": "2030-06-14T07:00:00+03:00",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(res.data[0]["transfers"], 0)
+        self.assertEqual(
+            [journey["id"] for journey in res.data[0]["journeys"]],
+            [self.direct.id],
+        )
+        self.assertEqual(res.data[1]["transfers"], 1)
+        self.assertEqual(
+            [journey["id"] for journey in res.data[1]["journeys"]],
+            [self.first_leg.id, self.second_leg.id],
+        )
+        self.assertEqual(
+            res.data[1]["journeys"][0]["tickets_available"], 600
+        )
+
+    def test_plan_respects_min_transfer(self):
+        res = self.client.get(
+            URL_JOURNEY_PLAN,
+            {
+                "source": self.dnipro.id,
+                "destination": self.kyiv.id,
+                "departure": "2030-06-14T07:00:00+03:00",
+                "min_transfer": 45,
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(res.data[0]["transfers"], 0)
+
+    def test_plan_requires_stations(self):
+        res = self.client.get(URL_JOURNEY_PLAN)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_plan_skips_journeys_deleted_under_the_index(self):
+        params = {
+            "source": self.dnipro.id,
+            "destination": self.kyiv.id,
+            "departure": "2030-06-14T07:00:00+03:00",
+        }
+        self.client.get(URL_JOURNEY_PLAN, params)
+        # Not committed, so the index still holds the journey
+        self.second_leg.delete()
+
+        res = self.client.get(URL_JOURNEY_PLAN, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [
+                [journey["id"] for journey in itinerary["journeys"]]
+                for itinerary in res.data
+            ],
+            [[self.direct.id]],
+        )
@@ -1,10 +1,22 @@
+from datetime import timedelta
+from io import StringIO
+
+import msgpack
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F, Prefetch
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 
-from station.models import OrderModel, TicketModel
+from station.models import (
+    IdempotencyKeyModel,
+    JourneyModel,
+    OrderModel,
+    TicketModel,
+)
 from station.serializers import OrderListSerializer, OrderSerializer
 from station.tests.tests_api.test_helpers import create_journey
 
@@ -50,6 +62,24 @@ class AuthorizedJourneyTest(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_201_CREATED)
         self.assertEqual(serializer.data, res.data)
 
+    def test_create_order_with_msgpack(self):
+        journey = create_journey()
+        res = self.client.post(
+            URL_ORDER_LIST,
+            msgpack.packb(
+                {"tickets": [{"cargo": 1, "seat": 10, "journey": journey.id}]}
+            ),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res["Content-Type"], "application/msgpack")
+        order = OrderModel.objects.get(id=res.data["id"])
+        self.assertEqual(
+            msgpack.unpackb(res.content), OrderSerializer(order).data
+        )
+
     def test_create_order_without_tickets(self):
         res = self.client.post(URL_ORDER_LIST, format="json")
 
@@ -57,12 +87,41 @@ class AuthorizedJourneyTest(APITestCase):
 
     def test_order_list(self):
         res = self.client.get(URL_ORDER_LIST)
-        orders = OrderModel.objects.all()
+        orders = OrderModel.objects.prefetch_related(
+            Prefetch(
+                "tickets__journey",
+                queryset=JourneyModel.objects.annotate(
+                    tickets_available=F("seats_capacity") - F("seats_sold")
+                ),
+            )
+        )
         serializer = OrderListSerializer(orders, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(orders.count(), 1)
         self.assertIn(serializer.data[0], res.data["results"])
 
+    def test_order_list_query_count_is_constant(self):
+        for seat in range(1, 4):
+            order = OrderModel.objects.create(user=self.user)
+            for cargo in range(1, 4):
+                create_ticket(order=order, cargo=cargo, seat=seat)
+
+        # count, orders, tickets, journeys with route and train, crews
+        with self.assertNumQueries(5):
+            res = self.client.get(URL_ORDER_LIST)
+        with self.assertNumQueries(4):
+            self.client.get(
+                reverse("station:order-detail", args=[order.id])
+            )
+
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertEqual(
+            res.data["results"][0]["tickets"][0]["journey"][
+                "tickets_available"
+            ],
+            599,
+        )
+
     def test_order_with_invalid_seat_cargo(self):
         journey = create_journey()
         ticket_1 = [
@@ -88,3 +147,208 @@ class AuthorizedJourneyTest(APITestCase):
         url = reverse("station:order-detail", args=[self.order_1.id])
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class SeatCounterTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.journey = create_journey()
+        self.client.force_authenticate(self.user)
+
+    def test_order_updates_seats_sold(self):
+        tickets = [
+            {"cargo": 1, "seat": 10, "journey": self.journey.id},
+            {"cargo": 1, "seat": 11, "journey": self.journey.id},
+        ]
+        res = self.client.post(
+            URL_ORDER_LIST, {"tickets": tickets}, format="json"
+        )
+        self.journey.refresh_from_db()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.journey.seats_capacity, 600)
+        self.assertEqual(self.journey.seats_sold, 2)
+
+        TicketModel.objects.filter(seat=10).delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_sold, 1)
+
+        OrderModel.objects.all().delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_sold, 0)
+
+    def test_train_resize_updates_capacity(self):
+        train = self.journey.train
+        train.cargo_num = 10
+        train.save()
+        self.journey.refresh_from_db()
+
+        self.assertEqual(self.journey.seats_capacity, 300)
+
+    def test_reconcile_seats_repairs_drift(self):
+        order = OrderModel.objects.create(user=self.user)
+        create_ticket(order, journey=self.journey)
+        JourneyModel.objects.filter(pk=self.journey.pk).update(
+            seats_sold=7, seats_capacity=1
+        )
+        out = StringIO()
+        call_command("reconcile_seats", stdout=out)
+        self.journey.refresh_from_db()
+
+        self.assertIn("Repaired 1 drifted journeys", out.getvalue())
+        self.assertEqual(self.journey.seats_sold, 1)
+        self.assertEqual(self.journey.seats_capacity, 600)
+
+
+class SeatBookingTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.journey = create_journey()
+        self.client.force_authenticate(self.user)
+
+    def book(self, *tickets):
+        return self.client.post(
+            URL_ORDER_LIST, {"tickets": list(tickets)}, format="json"
+        )
+
+    def test_same_seat_on_different_journeys(self):
+        other_journey = create_journey()
+        res_1 = self.book({"cargo": 1, "seat": 1, "journey": self.journey.id})
+        res_2 = self.book(
+            {"cargo": 1, "seat": 1, "journey": other_journey.id}
+        )
+
+        self.assertEqual(res_1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res_2.status_code, status.HTTP_201_CREATED)
+
+    def test_taken_seat_is_rejected(self):
+        self.book({"cargo": 1, "seat": 1, "journey": self.journey.id})
+        res = self.book(
+            {"cargo": 1, "seat": 2, "journey": self.journey.id},
+            {"cargo": 1, "seat": 1, "journey": self.journey.id},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("already taken", str(res.data["tickets"]))
+        self.assertEqual(TicketModel.objects.count(), 1)
+        self.assertEqual(OrderModel.objects.count(), 1)
+
+    def test_duplicate_seat_in_order_is_rejected(self):
+        ticket = {"cargo": 1, "seat": 1, "journey": self.journey.id}
+        res = self.book(ticket, ticket)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TicketModel.objects.count(), 0)
+
+    def test_order_query_count_does_not_grow_with_tickets(self):
+        other_journey = create_journey()
+        group = [
+            {"cargo": 2, "seat": seat, "journey": journey.id}
+            for seat in range(1, 6)
+            for journey in (self.journey, other_journey)
+        ]
+        with self.assertNumQueries(13):
+            res = self.book(*group)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TicketModel.objects.count(), 10)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_sold, 5)
+
+
+class IdempotentOrderTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.journey = create_journey()
+        self.client.force_authenticate(self.user)
+
+    def book(self, key, seat=1):
+        return self.client.post(
+            URL_ORDER_LIST,
+            {"tickets": [{"cargo": 1, "seat": seat, "journey": self.journey.id}]},
+            format="json",
+            headers={"Idempotency-Key": key},
+        )
+
+    def test_retry_replays_response(self):
+        res_1 = self.book("order-1")
+        res_2 = self.book("order-1")
+
+        self.assertEqual(res_1.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res_2.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res_2.data, res_1.data)
+        self.assertEqual(res_2.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(OrderModel.objects.count(), 1)
+        self.assertEqual(TicketModel.objects.count(), 1)
+
+    def test_key_reused_for_other_request(self):
+        self.book("order-1")
+        res = self.book("order-1", seat=2)
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(OrderModel.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        self.client.post(
+            URL_ORDER_LIST,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+        res_1 = self.book("order-1")
+        TicketModel.objects.all().delete()
+        res_2 = self.book("order-1")
+
+        self.assertEqual(res_1.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_2.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_key_is_purged(self):
+        self.book("order-1")
+        IdempotencyKeyModel.objects.update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        out = StringIO()
+
+        call_command("purge_idempotency_keys", stdout=out)
+
+        self.assertIn("Purged 1 expired idempotency keys", out.getvalue())
+        self.assertFalse(IdempotencyKeyModel.objects.exists())
+
+
+class OrderKeysetPaginationTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        now = timezone.now()
+        self.orders = [
+            OrderModel.objects.create(user=self.user) for _ in range(5)
+        ]
+        # Equal timestamps must still page by id
+        OrderModel.objects.filter(
+            pk__in=[self.orders[1].id, self.orders[2].id]
+        ).update(created_at=now)
+        self.client.force_authenticate(self.user)
+
+    def test_pages_newest_first(self):
+        expected = list(
+            OrderModel.objects.order_by("-created_at", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        seen = []
+        res = self.client.get(URL_ORDER_LIST, {"pagination": "cursor"})
+        while True:
+            self.assertNotIn("count", res.data)
+            self.assertLessEqual(len(res.data["results"]), 3)
+            seen.extend(order["id"] for order in res.data["results"])
+            if res.data["next"] is None:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(seen, expected)
@@ -44,6 +44,25 @@ class AuthorizedCrewTest(APITestCase):
         self.assertIn(serializer.data[0], res.data["results"])
         self.assertIn(serializer.data[1], res.data["results"])
 
+    def test_route_list_same_output_as_list_serializer(self):
+        create_route()
+        create_route(source=create_station(name="Poltava"), distance=341)
+        res = self.client.get(URL_ROUTE_LIST)
+        routes = RouteModel.objects.order_by("id")
+        serializer = RouteListSerializer(routes, many=True)
+
+        self.assertEqual(
+            res.content,
+            res.accepted_renderer.render(
+                {
+                    "count": 2,
+                    "next": None,
+                    "previous": None,
+                    "results": serializer.data,
+                }
+            ),
+        )
+
     def test_route_detail(self):
         route = create_route()
         url = detail_route_url(route.id)
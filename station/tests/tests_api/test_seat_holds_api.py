@@ -0,0 +1,214 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.models import JourneyModel, SeatHoldModel, TicketModel
+from station.tests.tests_api.test_helpers import create_journey
+
+URL_ORDER_LIST = reverse("station:order-list")
+URL_JOURNEY_LIST = reverse("station:journey-list")
+
+
+def hold_url(journey_id: int):
+    return reverse("station:journey-hold", args=[journey_id])
+
+
+class SeatHoldTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@user.com", password="password"
+        )
+        self.journey = create_journey()
+        self.client.force_authenticate(self.user)
+
+    def hold(self, *seats):
+        return self.client.post(
+            hold_url(self.journey.id),
+            {"seats": [{"cargo": cargo, "seat": seat} for cargo, seat in seats]},
+            format="json",
+        )
+
+    def held(self) -> int:
+        self.journey.refresh_from_db()
+        return self.journey.seats_held
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["seats"]), 2)
+        self.assertIsNotNone(res.data["expires_at"])
+        self.assertEqual(self.held(), 2)
+
+    def test_hold_requires_authentication(self):
+        self.client.force_authenticate(None)
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_hold_out_of_range_seat(self):
+        res = self.hold((1, 10_000))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SeatHoldModel.objects.count(), 0)
+
+    def test_seat_held_by_other_user_is_rejected(self):
+        self.hold((1, 1))
+        self.client.force_authenticate(self.other_user)
+
+        res_hold = self.hold((1, 1))
+        res_order = self.client.post(
+            URL_ORDER_LIST,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res_hold.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("held by another passenger", str(res_hold.data["seats"]))
+        self.assertEqual(res_order.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TicketModel.objects.count(), 0)
+        self.assertEqual(self.held(), 1)
+
+    def test_rehold_extends_own_hold(self):
+        self.hold((1, 1))
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHoldModel.objects.count(), 1)
+        self.assertEqual(self.held(), 1)
+
+    def test_order_converts_hold(self):
+        self.hold((1, 1), (1, 2))
+        res = self.client.post(
+            URL_ORDER_LIST,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 1)
+        self.assertEqual(self.journey.seats_sold, 1)
+
+    def test_expired_hold_can_be_taken(self):
+        self.hold((1, 1))
+        SeatHoldModel.objects.update(expires_at=timezone.now())
+        self.client.force_authenticate(self.other_user)
+
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            SeatHoldModel.objects.get().user_id, self.other_user.id
+        )
+        self.assertEqual(self.held(), 1)
+
+    def test_hold_releases_expired_holds_of_the_journey(self):
+        self.hold((1, 1), (1, 2))
+        SeatHoldModel.objects.filter(seat=1).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        self.client.force_authenticate(self.other_user)
+
+        res = self.hold((2, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHoldModel.objects.filter(seat=1).count(), 1)
+        self.assertEqual(self.held(), 2)
+
+    def test_release_holds(self):
+        self.hold((1, 1), (1, 2))
+        res = self.client.delete(hold_url(self.journey.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(SeatHoldModel.objects.count(), 0)
+        self.assertEqual(self.held(), 0)
+
+    def test_held_seats_are_not_available(self):
+        self.hold((1, 1), (1, 2))
+        res = self.client.get(URL_JOURNEY_LIST)
+
+        self.assertEqual(
+            res.data["results"][0]["tickets_available"],
+            self.journey.seats_capacity - 2,
+        )
+
+    def test_sweep_releases_expired_holds(self):
+        self.hold((1, 1), (1, 2))
+        SeatHoldModel.objects.filter(seat=1).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        out = StringIO()
+
+        call_command("sweep_seat_holds", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Released 1 expired seat holds", out.getvalue())
+        self.assertEqual(
+            list(SeatHoldModel.objects.values_list("seat", flat=True)), [2]
+        )
+        self.assertEqual(
+            JourneyModel.objects.get(pk=self.journey.id).seats_held, 1
+        )
+
+    def test_reconcile_seats_recounts_unexpired_holds(self):
+        self.hold((1, 1), (1, 2))
+        SeatHoldModel.objects.filter(seat=1).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        JourneyModel.objects.filter(pk=self.journey.pk).update(seats_held=9)
+        out = StringIO()
+
+        call_command("reconcile_seats", stdout=out)
+
+        self.assertIn("held 9 -> 1", out.getvalue())
+        self.assertEqual(self.held(), 1)
+
+
+class SeatHoldAdminTest(APITestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@admin.com", password="password"
+        )
+        self.journey = create_journey()
+        self.client.force_login(self.admin)
+        self.client.force_authenticate(self.admin)
+        self.client.post(
+            hold_url(self.journey.id),
+            {"seats": [{"cargo": 1, "seat": 1}, {"cargo": 1, "seat": 2}]},
+            format="json",
+        )
+
+    def test_holds_are_read_only(self):
+        hold = SeatHoldModel.objects.first()
+
+        add = self.client.get(reverse("admin:station_seatholdmodel_add"))
+        delete = self.client.get(
+            reverse("admin:station_seatholdmodel_delete", args=[hold.id])
+        )
+
+        self.assertEqual(add.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(delete.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_release_action_gives_seats_back(self):
+        hold = SeatHoldModel.objects.get(seat=1)
+
+        self.client.post(
+            reverse("admin:station_seatholdmodel_changelist"),
+            {"action": "release", "_selected_action": [hold.id]},
+        )
+
+        self.assertEqual(
+            list(SeatHoldModel.objects.values_list("seat", flat=True)), [2]
+        )
+        self.assertEqual(
+            JourneyModel.objects.get(pk=self.journey.id).seats_held, 1
+        )
@@ -1,13 +1,21 @@
+from io import StringIO
+
+import msgpack
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
 
 from station.models import StationModel
 from station.serializers import StationSerializer
-from station.tests.tests_api.test_helpers import create_station
+from station.tests.tests_api.test_helpers import create_route, create_station
 
 URL_STATION_LIST = reverse("station:station-list")
+URL_STATION_AUTOCOMPLETE = reverse("station:station-autocomplete")
+URL_STATION_NEARBY = reverse("station:station-nearby")
+URL_ROUTE_LIST = reverse("station:route-list")
 
 
 def detail_station_url(pk: int) -> str:
@@ -39,6 +47,17 @@ class AuthorizedStationTest(APITestCase):
         self.assertEqual(station.count(), 2)
         self.assertEqual(serializer.data, res.data["results"])
 
+    def test_station_list_msgpack(self):
+        create_station()
+        res = self.client.get(
+            URL_STATION_LIST, headers={"Accept": "application/msgpack"}
+        )
+        json_res = self.client.get(URL_STATION_LIST)
+
+        self.assertEqual(res["Content-Type"], "application/msgpack")
+        self.assertEqual(msgpack.unpackb(res.content), json_res.json())
+        self.assertLess(len(res.content), len(json_res.content))
+
     def test_crew_detail(self):
         station = create_station()
         url = detail_station_url(station.id)
@@ -48,6 +67,59 @@ class AuthorizedStationTest(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_station_autocomplete_ranking(self):
+        create_station(name="Novomoskovsk-Dnipro")
+        create_station(name="Dnipro Main")
+        create_station(name="Dnipro")
+        create_station(name="Kyiv Passage")
+        res = self.client.get(URL_STATION_AUTOCOMPLETE, {"q": "dnipro"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["name"] for station in res.data],
+            ["Dnipro", "Dnipro Main", "Novomoskovsk-Dnipro"],
+        )
+
+    def test_station_autocomplete_limit(self):
+        for num in range(5):
+            create_station(name=f"Lviv {num}")
+        res = self.client.get(
+            URL_STATION_AUTOCOMPLETE, {"q": "lviv", "limit": 2}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_station_autocomplete_empty_query(self):
+        create_station()
+        res = self.client.get(URL_STATION_AUTOCOMPLETE)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [])
+
+    def test_station_nearby(self):
+        kyiv = create_station(
+            name="Kyiv Passage", latitude=50.4401, longitude=30.4888
+        )
+        darnytsia = create_station(
+            name="Darnytsia", latitude=50.4558, longitude=30.6197
+        )
+        create_station(name="Lviv", latitude=49.8397, longitude=24.0297)
+        res = self.client.get(
+            URL_STATION_NEARBY, {"lat": 50.45, "lon": 30.5, "radius": 20}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in res.data], [kyiv.id, darnytsia.id]
+        )
+        self.assertLess(res.data[0]["distance"], res.data[1]["distance"])
+
+    def test_station_nearby_invalid_coordinates(self):
+        res = self.client.get(URL_STATION_NEARBY, {"lat": 91, "lon": 30})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_train_create_forbidden(self):
         payload = {
             "first_name": "Test first name",
@@ -88,3 +160,114 @@ class AdminTrainTest(APITestCase):
         station = create_station()
         res = self.client.delete(detail_station_url(station.id))
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class StationResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        create_station()
+        self.client.force_authenticate(user)
+
+    def test_second_request_is_served_from_cache(self):
+        res_1 = self.client.get(URL_STATION_LIST, {"page": 1})
+        with self.assertNumQueries(0):
+            res_2 = self.client.get(URL_STATION_LIST, {"page": "1"})
+
+        self.assertEqual(res_1["X-Cache"], "MISS")
+        self.assertEqual(res_2["X-Cache"], "HIT")
+        self.assertEqual(res_2.data, res_1.data)
+
+    def test_scheme_is_part_of_the_key(self):
+        self.client.get(URL_STATION_LIST)
+        res = self.client.get(URL_STATION_LIST, secure=True)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+
+    def test_station_change_retires_cached_responses(self):
+        self.client.get(URL_STATION_LIST)
+        create_station(name="Kyiv Passage")
+        res = self.client.get(URL_STATION_LIST)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["count"], 2)
+
+    def test_route_list_follows_station_names(self):
+        route = create_route()
+        self.client.get(URL_ROUTE_LIST)
+        route.source.name = "Odesa Main"
+        route.source.save()
+        res = self.client.get(URL_ROUTE_LIST)
+
+        self.assertEqual(res.data["results"][0]["source"], "Odesa Main")
+
+    def test_unauthorized_request_is_not_served(self):
+        self.client.get(URL_STATION_LIST)
+        self.client.force_authenticate(None)
+        res = self.client.get(URL_STATION_LIST)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_command(self):
+        self.client.get(URL_STATION_LIST)
+        self.client.get(URL_STATION_LIST)
+        out = StringIO()
+
+        call_command("response_cache_stats", stdout=out)
+
+        self.assertIn("station: 1 hits, 1 misses (50% hit ratio)", out.getvalue())
+
+
+class StationConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.station = create_station()
+        self.client.force_authenticate(user)
+
+    def test_station_list_not_modified_without_queries(self):
+        etag = self.client.get(URL_STATION_LIST)["ETag"]
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                URL_STATION_LIST, headers={"If-None-Match": etag}
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_delete_moves_list_etag(self):
+        create_station(name="Kyiv Passage")
+        etag = self.client.get(URL_STATION_LIST)["ETag"]
+        self.station.delete()
+        res = self.client.get(URL_STATION_LIST, headers={"If-None-Match": etag})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_list_is_not_validated_by_date(self):
+        newest = create_station(name="Kyiv Passage")
+        last_modified = self.client.get(
+            reverse("station:station-detail", args=[newest.id])
+        )["Last-Modified"]
+        self.station.delete()
+        res = self.client.get(
+            URL_STATION_LIST, headers={"If-Modified-Since": last_modified}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("Last-Modified", res)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_etag_differs_per_representation(self):
+        etag = self.client.get(URL_STATION_LIST)["ETag"]
+        res = self.client.get(
+            URL_STATION_LIST,
+            headers={"Accept": "application/msgpack", "If-None-Match": etag},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertIn("Accept", res["Vary"])
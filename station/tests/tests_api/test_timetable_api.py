@@ -0,0 +1,184 @@
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+import zstandard
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from station.bundles import record_bulk_import, to_version
+from station.models import (
+    JourneyModel,
+    RouteModel,
+    StationModel,
+    TimetableBulkImportModel,
+    TrainModel,
+)
+from station.tests.tests_api.test_helpers import create_journey
+
+URL_TIMETABLE = reverse("station:timetable")
+
+
+def records(content: bytes) -> list[dict]:
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class TimetableBundleTest(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email="user@user.com", password="password"
+        )
+        self.client.force_authenticate(user)
+        departure = timezone.now() + timedelta(days=1)
+        self.journeys = [
+            create_journey(
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=5),
+            )
+            for _ in range(2)
+        ]
+        # Past journeys are left out
+        create_journey(
+            departure_time=departure - timedelta(days=3),
+            arrival_time=departure - timedelta(days=3, hours=-5),
+        )
+
+    def get(self, **params):
+        res = self.client.get(URL_TIMETABLE, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, b"".join(res.streaming_content)
+
+    def backdate(self, moment):
+        for model in (StationModel, TrainModel, RouteModel, JourneyModel):
+            model.objects.update(updated_at=moment)
+
+    def test_snapshot(self):
+        res, content = self.get()
+        bundle = records(
+            zstandard.ZstdDecompressor().decompressobj().decompress(content)
+        )
+
+        self.assertEqual(res["Content-Type"], "application/zstd")
+        self.assertEqual(bundle[0]["type"], "header")
+        self.assertIsNone(bundle[0]["since"])
+        self.assertEqual(
+            bundle[0]["version"], int(res["X-Timetable-Version"])
+        )
+        kinds = [record["type"] for record in bundle[1:]]
+        self.assertEqual(
+            kinds,
+            ["station"] * 6 + ["train"] * 3 + ["route"] * 3 + ["journey"] * 2,
+        )
+        self.assertEqual(
+            [record["id"] for record in bundle[-2:]],
+            [journey.id for journey in self.journeys],
+        )
+
+    def test_delta_has_changes_and_deletions(self):
+        now = timezone.now()
+        self.backdate(now - timedelta(hours=1))
+        station = self.journeys[0].route.source
+        station.name = "Dnipro Main 2"
+        station.save()
+        deleted_id = self.journeys[1].id
+        self.journeys[1].delete()
+
+        _, content = self.get(
+            since=to_version(now - timedelta(minutes=30)), format="ndjson"
+        )
+        bundle = records(content)
+
+        self.assertEqual(
+            bundle[1:],
+            [
+                {
+                    "type": "station",
+                    "id": station.id,
+                    "name": "Dnipro Main 2",
+                    "latitude": station.latitude,
+                    "longitude": station.longitude,
+                },
+                {
+                    "type": "deleted",
+                    "kind": "journey",
+                    "id": deleted_id,
+                },
+            ],
+        )
+
+    def test_journey_moved_to_the_past_is_deleted(self):
+        now = timezone.now()
+        self.backdate(now - timedelta(hours=1))
+        journey = self.journeys[0]
+        journey.departure_time = now - timedelta(days=2)
+        journey.save()
+
+        _, content = self.get(
+            since=to_version(now - timedelta(minutes=30)), format="ndjson"
+        )
+        bundle = records(content)
+
+        self.assertEqual(
+            bundle[1:],
+            [{"type": "deleted", "kind": "journey", "id": journey.id}],
+        )
+
+    def test_too_old_version_gets_snapshot(self):
+        _, content = self.get(
+            since=to_version(timezone.now() - timedelta(days=365)),
+            format="ndjson",
+        )
+        bundle = records(content)
+
+        self.assertIsNone(bundle[0]["since"])
+        self.assertEqual(len(bundle), 15)
+
+    def test_version_before_bulk_import_gets_snapshot(self):
+        res, _ = self.get(format="ndjson")
+        version = int(res["X-Timetable-Version"])
+        record_bulk_import()
+
+        _, content = self.get(since=version, format="ndjson")
+        bundle = records(content)
+
+        self.assertIsNone(bundle[0]["since"])
+        self.assertEqual(len(bundle), 15)
+
+    def test_version_after_bulk_import_gets_delta(self):
+        now = timezone.now()
+        record_bulk_import()
+        TimetableBulkImportModel.objects.update(
+            imported_at=now - timedelta(hours=1)
+        )
+        self.backdate(now - timedelta(hours=1))
+        since = to_version(now - timedelta(minutes=30))
+
+        _, content = self.get(since=since, format="ndjson")
+        bundle = records(content)
+
+        self.assertEqual(bundle[0]["since"], since)
+        self.assertEqual(bundle[1:], [])
+
+    def test_invalid_version(self):
+        res = self.client.get(URL_TIMETABLE, {"since": "yesterday"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                "export_timetable", "--output", directory, stdout=StringIO()
+            )
+            (path,) = Path(directory).iterdir()
+            with open(path, "rb") as file:
+                content = zstandard.ZstdDecompressor().stream_reader(
+                    file
+                ).read()
+
+        self.assertEqual(len(records(content)), 15)
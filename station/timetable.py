@@ -0,0 +1,457 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from station.models import JourneyModel, RouteModel
+from station.planner import Connection, ConnectionScanPlanner
+
+
+def to_timestamp(value) -> int:
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return int(value.timestamp())
+
+
+class StationDepartures:
+    """Departures of one station as parallel typed arrays sorted by time"""
+
+    __slots__ = ("departures", "arrivals", "destinations", "journeys")
+
+    def __init__(self):
+        self.departures = array("q")
+        self.arrivals = array("q")
+        self.destinations = array("q")
+        self.journeys = array("q")
+
+    def __len__(self):
+        return len(self.journeys)
+
+    def append(self, departure, arrival, destination_id, journey_id):
+        self.departures.append(departure)
+        self.arrivals.append(arrival)
+        self.destinations.append(destination_id)
+        self.journeys.append(journey_id)
+
+    def insert(self, departure, arrival, destination_id, journey_id):
+        position = bisect_right(self.departures, departure)
+        self.departures.insert(position, departure)
+        self.arrivals.insert(position, arrival)
+        self.destinations.insert(position, destination_id)
+        self.journeys.insert(position, journey_id)
+
+    def remove(self, departure, journey_id):
+        start = bisect_left(self.departures, departure)
+        end = bisect_right(self.departures, departure)
+        for position in range(start, end):
+            if self.journeys[position] == journey_id:
+                del self.departures[position]
+                del self.arrivals[position]
+                del self.destinations[position]
+                del self.journeys[position]
+                return
+
+    def between(self, start=None, end=None):
+        low = 0 if start is None else bisect_left(self.departures, start)
+        high = (
+            len(self.departures)
+            if end is None
+            else bisect_left(self.departures, end)
+        )
+        return range(low, high)
+
+
+class TimetableIndex:
+    """
+    Departures by station and time, patched in place on journey and route
+    changes instead of being re-read from the database.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # timetable_version() the index matches the database at
+        self.version = None
+        self.routes = {}
+        self.journeys = {}
+        self.stations = {}
+
+    @classmethod
+    def from_db(cls) -> "TimetableIndex":
+        index = cls()
+        # Read first, a write committed during the build moves it on
+        index.version = timetable_version()
+        index.routes = {
+            route_id: (source_id, destination_id)
+            for route_id, source_id, destination_id
+            in RouteModel.objects.values_list(
+                "id", "source_id", "destination_id"
+            ).iterator(chunk_size=5000)
+        }
+        rows = JourneyModel.objects.order_by(
+            "route__source_id", "departure_time", "id"
+        ).values_list(
+            "id",
+            "route_id",
+            "route__source_id",
+            "route__destination_id",
+            "departure_time",
+            "arrival_time",
+        )
+        for (
+            journey_id,
+            route_id,
+            source_id,
+            destination_id,
+            departure,
+            arrival,
+        ) in rows.iterator(chunk_size=5000):
+            departure = to_timestamp(departure)
+            arrival = to_timestamp(arrival)
+            index.routes[route_id] = (source_id, destination_id)
+            index.journeys[journey_id] = (route_id, departure, arrival)
+            index.stations.setdefault(source_id, StationDepartures()).append(
+                departure, arrival, destination_id, journey_id
+            )
+        return index
+
+    def __len__(self):
+        return len(self.journeys)
+
+    def search(
+        self,
+        source_ids=None,
+        destination_ids=None,
+        start: int = None,
+        end: int = None,
+    ) -> list[int]:
+        with self.lock:
+            if source_ids is None:
+                stations = self.stations.values()
+            else:
+                stations = [
+                    self.stations[source_id]
+                    for source_id in source_ids
+                    if source_id in self.stations
+                ]
+            destination_ids = (
+                None if destination_ids is None else set(destination_ids)
+            )
+            result = []
+            for station in stations:
+                for position in station.between(start, end):
+                    if (
+                        destination_ids is None
+                        or station.destinations[position] in destination_ids
+                    ):
+                        result.append(station.journeys[position])
+            return result
+
+    def connections(self):
+        with self.lock:
+            return [
+                Connection(
+                    station.departures[position],
+                    station.arrivals[position],
+                    source_id,
+                    station.destinations[position],
+                    station.journeys[position],
+                )
+                for source_id, station in self.stations.items()
+                for position in range(len(station))
+            ]
+
+    def upsert_route(self, route_id, source_id, destination_id):
+        with self.lock:
+            if self.routes.get(route_id) == (source_id, destination_id):
+                return
+            moved = [
+                (journey_id, departure, arrival)
+                for journey_id, (journey_route_id, departure, arrival)
+                in self.journeys.items()
+                if journey_route_id == route_id
+            ]
+            for journey_id, _, _ in moved:
+                self.remove_journey(journey_id)
+            self.routes[route_id] = (source_id, destination_id)
+            for journey_id, departure, arrival in moved:
+                self.upsert_journey(journey_id, route_id, departure, arrival)
+
+    def remove_route(self, route_id):
+        with self.lock:
+            for journey_id, (journey_route_id, _, _) in list(
+                self.journeys.items()
+            ):
+                if journey_route_id == route_id:
+                    self.remove_journey(journey_id)
+            self.routes.pop(route_id, None)
+
+    def upsert_journey(self, journey_id, route_id, departure, arrival):
+        with self.lock:
+            self.remove_journey(journey_id)
+            if route_id not in self.routes:
+                self.routes[route_id] = tuple(
+                    RouteModel.objects.values_list(
+                        "source_id", "destination_id"
+                    ).get(pk=route_id)
+                )
+            source_id, destination_id = self.routes[route_id]
+            self.journeys[journey_id] = (route_id, departure, arrival)
+            self.stations.setdefault(source_id, StationDepartures()).insert(
+                departure, arrival, destination_id, journey_id
+            )
+
+    def remove_journey(self, journey_id):
+        with self.lock:
+            entry = self.journeys.pop(journey_id, None)
+            if entry is None:
+                return
+            route_id, departure, _ = entry
+            source_id, _ = self.routes[route_id]
+            station = self.stations.get(source_id)
+            if station is not None:
+                station.remove(departure, journey_id)
+
+    def verify(self) -> list[str]:
+        """Compare the index with the database, return found problems"""
+        problems = []
+        with self.lock:
+            for source_id, station in self.stations.items():
+                if list(station.departures) != sorted(station.departures):
+                    problems.append(f"Station {source_id}: unsorted")
+            diff = self.diff(TimetableIndex.from_db())
+        for kind, journey_ids in diff.items():
+            if journey_ids:
+                problems.append(
+                    f"{len(journey_ids)} {kind} journeys: "
+                    f"{journey_ids[:10]}"
+                )
+        return problems
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                journey_id: (*self.routes[route_id], departure, arrival)
+                for journey_id, (route_id, departure, arrival)
+                in self.journeys.items()
+            }
+
+    def diff(self, other: "TimetableIndex") -> dict:
+        """Journey ids missing from, extra in or changed against other"""
+        current = self.snapshot()
+        expected = other.snapshot()
+        return {
+            "missing": sorted(expected.keys() - current.keys()),
+            "extra": sorted(current.keys() - expected.keys()),
+            "changed": sorted(
+                journey_id
+                for journey_id in current.keys() & expected.keys()
+                if current[journey_id] != expected[journey_id]
+            ),
+        }
+
+
+logger = logging.getLogger(__name__)
+
+TIMETABLE_VERSION_KEY = "timetable:version"
+TIMETABLE_CHANGE_KEY = "timetable:change:{version}"
+TIMETABLE_CHANGE_TIMEOUT = 60 * 60
+# An index further behind is rebuilt rather than patched
+TIMETABLE_MAX_CATCH_UP = 1000
+
+_timetable = None
+_timetable_lock = threading.Lock()
+_rebuilding = threading.Event()
+# (index, generation, planner), generation counts invalidate_planner()
+_planner = None
+_planner_generation = 0
+_planner_lock = threading.Lock()
+_planning = threading.Event()
+
+
+def timetable_version() -> int:
+    version = cache.get(TIMETABLE_VERSION_KEY)
+    if version is None:
+        # Restart from the clock, above any version an index was built at
+        cache.add(TIMETABLE_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(TIMETABLE_VERSION_KEY)
+    return version
+
+
+def bump_timetable_version() -> int:
+    """
+    Tell every process its index is stale, call after journeys or routes
+    were committed. Returns the new version.
+    """
+    try:
+        return cache.incr(TIMETABLE_VERSION_KEY)
+    except ValueError:
+        cache.add(TIMETABLE_VERSION_KEY, time.time_ns(), None)
+        return cache.get(TIMETABLE_VERSION_KEY)
+
+
+def publish_timetable_change(method: str, *args) -> int:
+    """
+    Give a committed journey or route write a new version and publish it
+    as the TimetableIndex method call that patches it, for every process
+    to apply. Returns the version.
+    """
+    version = bump_timetable_version()
+    cache.set(
+        TIMETABLE_CHANGE_KEY.format(version=version),
+        (method, args),
+        TIMETABLE_CHANGE_TIMEOUT,
+    )
+    return version
+
+
+def catch_up(index: TimetableIndex, version: int) -> bool:
+    """
+    Patch index up to version with the published changes, False if one of
+    them is gone (evicted, or a bulk write without a patch)
+    """
+    with index.lock:
+        if index.version == version:
+            return True
+        if (
+            index.version is None
+            or not 0 < version - index.version <= TIMETABLE_MAX_CATCH_UP
+        ):
+            return False
+        keys = [
+            TIMETABLE_CHANGE_KEY.format(version=missed)
+            for missed in range(index.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return False
+        try:
+            for key in keys:
+                method, args = changes[key]
+                getattr(index, method)(*args)
+        except RouteModel.DoesNotExist:
+            # A journey of a route deleted meanwhile
+            return False
+        finally:
+            invalidate_planner()
+        index.version = version
+        return True
+
+
+def get_timetable() -> TimetableIndex:
+    """The index, patched or rebuilt right away if missing or stale"""
+    global _timetable
+    index = _timetable
+    if index is not None and catch_up(index, timetable_version()):
+        return index
+    with _timetable_lock:
+        if _timetable is index:
+            _timetable = TimetableIndex.from_db()
+        return _timetable
+
+
+def current_timetable() -> TimetableIndex | None:
+    """
+    The index while it matches the database or can be patched to, else
+    None and it is rebuilt in the background, meanwhile callers query the
+    database
+    """
+    index = _timetable
+    if index is None:
+        return None
+    if catch_up(index, timetable_version()):
+        return index
+    if not _rebuilding.is_set():
+        _rebuilding.set()
+        threading.Thread(target=rebuild_in_background, daemon=True).start()
+    return None
+
+
+def rebuild_in_background() -> None:
+    global _timetable
+    try:
+        index = TimetableIndex.from_db()
+        with _timetable_lock:
+            _timetable = index
+        invalidate_planner()
+    except DatabaseError:
+        logger.exception("Timetable index rebuild failed")
+    finally:
+        _rebuilding.clear()
+        # The thread's own connection
+        connections.close_all()
+
+
+def warm_timetable() -> None:
+    try:
+        get_timetable()
+    except DatabaseError:
+        logger.warning(
+            "Timetable index is not built, journey search uses the database"
+        )
+
+
+def peek_timetable() -> TimetableIndex | None:
+    return _timetable
+
+
+def set_timetable(index: TimetableIndex | None) -> None:
+    global _timetable
+    _timetable = index
+    drop_planner()
+
+
+def get_planner() -> ConnectionScanPlanner:
+    """
+    Planner over the index. Only the first plan of a process builds it in
+    the request, afterwards a stale or patched index gets a new planner
+    built in the background and the previous one keeps serving meanwhile.
+    """
+    planned = _planner
+    index = current_timetable()
+    if planned is None:
+        return build_planner(index or get_timetable())
+    if index is not None and (
+        planned[0] is not index or planned[1] != _planner_generation
+    ):
+        if not _planning.is_set():
+            _planning.set()
+            threading.Thread(
+                target=build_planner_in_background, args=(index,), daemon=True
+            ).start()
+    return planned[2]
+
+
+def build_planner(index: TimetableIndex) -> ConnectionScanPlanner:
+    global _planner
+    generation = _planner_generation
+    planner = ConnectionScanPlanner(index.connections())
+    with _planner_lock:
+        if _planner is None or _planner[1] <= generation:
+            _planner = (index, generation, planner)
+    return planner
+
+
+def build_planner_in_background(index: TimetableIndex) -> None:
+    try:
+        build_planner(index)
+    finally:
+        _planning.clear()
+
+
+def invalidate_planner() -> None:
+    """Make the planner stale, it is replaced on the next plan"""
+    global _planner_generation
+    _planner_generation += 1
+
+
+def drop_planner() -> None:
+    global _planner
+    _planner = None
@@ -9,6 +9,7 @@ from station.views import (
     RouteViewSet,
     JourneyViewSet,
     OrderViewSet,
+    TimetableBundleView,
 )
 
 router = DefaultRouter()
@@ -20,6 +21,9 @@ router.register("route", RouteViewSet, basename="route")
 router.register("journey", JourneyViewSet, basename="journey")
 router.register("order", OrderViewSet, basename="order")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("timetable/", TimetableBundleView.as_view(), name="timetable"),
+]
 
 app_name = "station"
@@ -0,0 +1,98 @@
+from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from station.fieldsets import FieldsetMixin
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer over values_list() rows, for list actions
+    where building model instances and running a field per value costs
+    more than the query.
+
+    columns maps output keys, in output order, to queryset lookups and
+    representations holds DRF fields for the columns that need their
+    to_representation(), so the data matches the model serializer it
+    stands in for. Subclasses fill extra_fields, which follow the
+    columns, themselves. fields narrows the output to some of the keys.
+    """
+
+    columns = {}
+    extra_fields = ()
+    representations = {}
+
+    def __init__(self, instance, many=True, context=None, fields=None):
+        self.instance = instance
+        self.context = context or {}
+        self.fields = (
+            [*self.columns, *self.extra_fields]
+            if fields is None
+            else list(fields)
+        )
+
+    @classmethod
+    def rows(cls, queryset, fields=None, ordering=()):
+        """Rows with the columns of fields, ordering and the primary key"""
+        lookups = [
+            cls.columns[name]
+            for name in (cls.columns if fields is None else fields)
+            if name in cls.columns
+        ]
+        return queryset.prefetch_related(None).values_list(
+            *dict.fromkeys(["id", *ordering, *lookups]), named=True
+        )
+
+    def to_representation(self, row) -> dict:
+        columns = self.columns
+        representations = self.representations
+        data = {}
+        for name in self.fields:
+            if name not in columns:
+                continue
+            value = getattr(row, columns[name])
+            field = representations.get(name)
+            data[name] = (
+                value
+                if field is None or value is None
+                else field.to_representation(value)
+            )
+        return data
+
+    @property
+    def data(self):
+        return ReturnList(
+            [self.to_representation(row) for row in self.instance],
+            serializer=self,
+        )
+
+
+class ValuesListMixin(FieldsetMixin):
+    """
+    list() of values_serializer_class over values_list() rows, narrowed
+    to the fields ?fields= leaves in the model serializer
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        fields = None
+        if self.get_fieldset() is not None:
+            fields = list(self.get_serializer().fields)
+        # Keyset pages read their cursor from the last row
+        ordering = [
+            field.lstrip("-")
+            for field in getattr(self.paginator, "ordering", ())
+        ]
+        queryset = serializer_class.rows(
+            self.filter_queryset(self.get_queryset()), fields, ordering
+        )
+        options = {"context": self.get_serializer_context(), "fields": fields}
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = serializer_class(page, many=True, **options)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = serializer_class(queryset, many=True, **options)
+        return Response(serializer.data)
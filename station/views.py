@@ -1,11 +1,24 @@
-from django.db.models import F, Count
+from datetime import date, datetime, time, timedelta, UTC
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db.models import F, Case, When, Value, Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiParameter,
+)
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
 from station.models import (
@@ -16,6 +29,7 @@ from station.models import (
     RouteModel,
     JourneyModel,
     OrderModel,
+    TicketModel,
 )
 from station.serializers import (
     TrainTypeSerializer,
@@ -26,16 +40,160 @@ from station.serializers import (
     StationSerializer,
     RouteSerializer,
     RouteListSerializer,
+    RouteListValuesSerializer,
     RouteDetailSerializer,
     JourneySerializer,
     JourneyListSerializer,
+    JourneyListValuesSerializer,
     JourneyDetailSerializer,
     OrderSerializer,
     TrainImageSerializer,
     StationImageSerializer,
+    StationAutocompleteSerializer,
+    StationNearbySerializer,
+    StationDistanceSerializer,
     OrderListSerializer,
+    JourneyPlanSerializer,
+    ItinerarySerializer,
+    SeatMapSerializer,
+    SeatHoldSerializer,
+)
+from station.bundles import TimetableBundle
+from station.geo import get_station_grid
+from station.holds import hold_seats, release_holds
+from station.fieldsets import FieldsetMixin
+from station.exports import (
+    JOURNEY_EXPORT_COLUMNS,
+    TICKET_EXPORT_COLUMNS,
+    export_response,
+)
+from station.idempotency import IDEMPOTENCY_HEADER, idempotent
+from station.matcher import get_station_matcher
+from station.conditional import ConditionalGetMixin
+from station.response_cache import CachedResponseMixin
+from station.pagination import (
+    JourneyKeysetPagination,
+    OrderKeysetPagination,
+    SelectablePaginationMixin,
+)
+from station.renderers import (
+    CSVRenderer,
+    NDJSONRenderer,
+    ZstdNDJSONRenderer,
+)
+from station.seatmap import get_seat_map
+from station.timetable import current_timetable, get_planner
+from station.values import ValuesListMixin
+
+
+TICKETS_AVAILABLE = F("seats_capacity") - F("seats_sold") - F("seats_held")
+
+PAGINATION_PARAMETER = OpenApiParameter(
+    name="pagination",
+    description=(
+        "cursor switches to keyset pages: no count, follow the next link"
+    ),
+    required=False,
+    type=str,
+    enum=["page", "cursor"],
 )
 
+JOURNEY_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="from",
+        description=(
+            "Filter by route_from, typos are tolerated "
+            "(ex. ?from='Dnipro')"
+        ),
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="to",
+        description=(
+            "Filter by route_to, typos are tolerated (ex. ?to='Kyiv')"
+        ),
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="date",
+        description="Filter by date (ex. ?date='2023-06-12')",
+        required=False,
+        type=OpenApiTypes.DATE,
+    ),
+    OpenApiParameter(
+        name="date_from",
+        description="Departures from this date (ex. ?date_from=...)",
+        required=False,
+        type=OpenApiTypes.DATE,
+    ),
+    OpenApiParameter(
+        name="date_to",
+        description="Departures up to this date inclusive",
+        required=False,
+        type=OpenApiTypes.DATE,
+    ),
+]
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        description=(
+            "Only these fields, dotted paths pick fields of nested objects "
+            "(ex. ?fields=id,route.source)"
+        ),
+        required=False,
+        type=str,
+    ),
+    OpenApiParameter(
+        name="expand",
+        description=(
+            "Nested objects sent in full, the others are sent as ids "
+            "(ex. ?expand=route,route.source)"
+        ),
+        required=False,
+        type=str,
+    ),
+]
+# ?fields= and ?expand= of FieldsetMixin viewsets
+fieldset_schema = extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+
+EXPORT_PARAMETER = OpenApiParameter(
+    name="format",
+    description="ndjson (default) or csv, also chosen by the Accept header",
+    required=False,
+    type=str,
+    enum=["ndjson", "csv"],
+)
+EXPORT_RESPONSES = {
+    (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+    (200, CSVRenderer.media_type): OpenApiTypes.STR,
+}
+
+
+def stations_named(name: str):
+    """Station ids whose name contains name, served by station_name_trgm"""
+    return StationModel.objects.filter(name__icontains=name).values("id")
+
+
+def parse_day(name: str, value: str) -> date:
+    try:
+        day = parse_date(value)
+    except ValueError:
+        # Well formatted but not a calendar day, 2022-02-30
+        day = None
+    if day is None:
+        raise ValidationError({name: "Date has wrong format, use YYYY-MM-DD"})
+    return day
+
+
+def local_midnight(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 
 def image_upload(obj, serializer, data):
     train = obj
@@ -46,7 +204,10 @@ def image_upload(obj, serializer, data):
 
 
 @extend_schema(tags=["Train Type API"])
+@fieldset_schema
 class TrainTypeViewSet(
+    CachedResponseMixin,
+    FieldsetMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -55,10 +216,14 @@ class TrainTypeViewSet(
 ):
     queryset = TrainTypeModel.objects.all()
     serializer_class = TrainTypeSerializer
+    cache_models = (TrainTypeModel,)
 
 
 @extend_schema(tags=["Train API"])
+@fieldset_schema
 class TrainViewSet(
+    ConditionalGetMixin,
+    FieldsetMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -97,7 +262,10 @@ class TrainViewSet(
 
 
 @extend_schema(tags=["Crew API"])
+@fieldset_schema
 class CrewViewSet(
+    CachedResponseMixin,
+    FieldsetMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -106,10 +274,15 @@ class CrewViewSet(
 ):
     queryset = CrewModel.objects.all()
     serializer_class = CrewSerializer
+    cache_models = (CrewModel,)
 
 
 @extend_schema(tags=["Station API"])
+@fieldset_schema
 class StationViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    FieldsetMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -118,12 +291,100 @@ class StationViewSet(
 ):
     queryset = StationModel.objects.all()
     serializer_class = StationSerializer
+    cache_models = (StationModel,)
+    cached_actions = ("list", "retrieve", "autocomplete", "nearby")
 
     def get_serializer_class(self):
         if self.action == "upload_image":
             return StationImageSerializer
+        if self.action == "autocomplete":
+            return StationAutocompleteSerializer
         return StationSerializer
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                description="Part of station name (ex. ?q=dnip)",
+                required=True,
+                type=str,
+            ),
+            OpenApiParameter(
+                name="limit",
+                description="Number of suggestions, 10 by default",
+                required=False,
+                type=int,
+            ),
+        ]
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="autocomplete",
+        pagination_class=None,
+    )
+    def autocomplete(self, request):
+        """Top matching stations: prefix matches first, then similarity"""
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(int(request.query_params.get("limit", 10)), 50)
+        except ValueError:
+            limit = 10
+        if not query or limit < 1:
+            return Response([], status=status.HTTP_200_OK)
+
+        stations = (
+            StationModel.objects.filter(name__icontains=query)
+            .annotate(
+                is_prefix=Case(
+                    When(name__istartswith=query, then=Value(True)),
+                    default=Value(False),
+                ),
+                similarity=TrigramSimilarity("name", query),
+            )
+            .order_by("-is_prefix", "-similarity", "name")
+            .only("id", "name")[:limit]
+        )
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[StationNearbySerializer],
+        responses=StationDistanceSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="nearby",
+        pagination_class=None,
+    )
+    def nearby(self, request):
+        """Closest stations within radius (km) ordered by distance"""
+        params = StationNearbySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        stations = get_station_grid().nearby(
+            params.validated_data["lat"],
+            params.validated_data["lon"],
+            radius=params.validated_data["radius"],
+            limit=params.validated_data["limit"],
+        )
+        serializer = StationDistanceSerializer(
+            [
+                {
+                    "id": station_id,
+                    "name": name,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "distance": round(distance, 3),
+                }
+                for distance, (station_id, name, latitude, longitude)
+                in stations
+            ],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @action(
         methods=["POST"],
         detail=True,
@@ -139,6 +400,9 @@ class StationViewSet(
 
 @extend_schema(tags=["Route API"])
 class RouteViewSet(
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    ValuesListMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -147,18 +411,25 @@ class RouteViewSet(
 ):
     queryset = RouteModel.objects.all()
     serializer_class = RouteSerializer
+    values_serializer_class = RouteListValuesSerializer
+    etag_fields = (
+        "updated_at",
+        "source__updated_at",
+        "destination__updated_at",
+    )
+    cache_models = (RouteModel, StationModel)
 
     def get_queryset(self):
         queryset = self.queryset
 
         source = self.request.query_params.get("source")
         if source:
-            queryset = queryset.filter(source__name__icontains=source)
+            queryset = queryset.filter(source__in=stations_named(source))
 
         destination = self.request.query_params.get("destination")
         if destination:
             queryset = queryset.filter(
-                destination__name__icontains=destination
+                destination__in=stations_named(destination)
             )
 
         if self.action in ["list", "retrieve"]:
@@ -194,7 +465,11 @@ class RouteViewSet(
 
 
 @extend_schema(tags=["Journey API"])
+@fieldset_schema
 class JourneyViewSet(
+    ConditionalGetMixin,
+    SelectablePaginationMixin,
+    ValuesListMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -203,37 +478,101 @@ class JourneyViewSet(
 ):
     queryset = JourneyModel.objects.all()
     serializer_class = JourneySerializer
+    values_serializer_class = JourneyListValuesSerializer
+    conditional_actions = ("retrieve",)
+    etag_fields = (
+        "updated_at",
+        "train__updated_at",
+        "route__updated_at",
+        "route__source__updated_at",
+        "route__destination__updated_at",
+    )
+    keyset_pagination_class = JourneyKeysetPagination
 
     def get_queryset(self):
         queryset = self.queryset
-        if self.action == "list":
+        if self.action in ["list", "plan"]:
             queryset = queryset.annotate(
-                tickets_available=(
-                    F("train__cargo_num") * F("train__places_in_cargo")
-                    )
-                - Count("tickets")
+                tickets_available=TICKETS_AVAILABLE
             )
-
-        departure_time = self.request.query_params.get("date")
-        if departure_time:
-            queryset = queryset.filter(departure_time__date=departure_time)
-
+        if self.action == "plan":
+            return queryset.select_related(
+                "route__source", "route__destination", "train"
+            ).prefetch_related("crews")
+        if self.action in ["seats", "hold"]:
+            return queryset.select_related("train")
+
+        start, end = self.departure_bounds()
+        if start:
+            queryset = queryset.filter(departure_time__gte=start)
+        if end:
+            queryset = queryset.filter(departure_time__lt=end)
+
+        source_ids = destination_ids = None
         route_from = self.request.query_params.get("from")
         if route_from:
-            queryset = queryset.filter(
-                route__source__name__icontains=route_from
-            )
-
+            source_ids = get_station_matcher().resolve(route_from)
         route_to = self.request.query_params.get("to")
         if route_to:
-            queryset = queryset.filter(
-                route__destination__name__icontains=route_to
+            destination_ids = get_station_matcher().resolve(route_to)
+
+        journey_ids = None
+        # The index is keyed by source, without one the route join of
+        # the database is cheaper than walking every departure
+        if source_ids is not None:
+            journey_ids = self.search_timetable(
+                source_ids, destination_ids, start, end
             )
+        if journey_ids is not None:
+            queryset = queryset.filter(pk__in=journey_ids)
+        elif route_from or route_to:
+            routes = RouteModel.objects.all()
+            if source_ids is not None:
+                routes = routes.filter(source_id__in=source_ids)
+            if destination_ids is not None:
+                routes = routes.filter(destination_id__in=destination_ids)
+            queryset = queryset.filter(route__in=routes.values("id"))
 
         if self.action in ["list", "retrieve"]:
             queryset = queryset.select_related().prefetch_related("crews")
         return queryset
 
+    def departure_bounds(self):
+        """
+        Half-open [start, end) range of local days for ?date= or
+        ?date_from=&date_to=, so departure_time is compared directly
+        and the journey indexes can be used.
+        """
+        params = self.request.query_params
+        first = last = None
+        if params.get("date"):
+            first = last = parse_day("date", params["date"])
+        else:
+            if params.get("date_from"):
+                first = parse_day("date_from", params["date_from"])
+            if params.get("date_to"):
+                last = parse_day("date_to", params["date_to"])
+
+        start = local_midnight(first) if first else None
+        end = local_midnight(last + timedelta(days=1)) if last else None
+        return start, end
+
+    @staticmethod
+    def search_timetable(source_ids, destination_ids, start, end):
+        """
+        Journey ids from the in-memory timetable, None if it is not loaded
+        or may miss writes committed since it was built
+        """
+        timetable = current_timetable()
+        if timetable is None:
+            return None
+        return timetable.search(
+            source_ids,
+            destination_ids,
+            int(start.timestamp()) if start else None,
+            int(end.timestamp()) if end else None,
+        )
+
     def get_serializer_class(self):
         if self.action == "list":
             return JourneyListSerializer
@@ -241,41 +580,185 @@ class JourneyViewSet(
             return JourneyDetailSerializer
         return self.serializer_class
 
+    @extend_schema(
+        parameters=[*JOURNEY_FILTER_PARAMETERS, PAGINATION_PARAMETER]
+    )
+    def list(self, request, *args, **kwargs):
+        """List Journey with filter by route_from, route_to and date"""
+        return super().list(request, *args, **kwargs)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
-                name="from",
-                description="Filter by route_from (ex. ?from='Dnipro')",
-                required=False,
-                type=str,
-            ),
-            OpenApiParameter(
-                name="to",
-                description="Filter by route_to (ex. ?to='Kyiv')",
+                name="encoding",
+                description=(
+                    "binary returns the raw bitset of sold or held seats "
+                    "as application/octet-stream"
+                ),
                 required=False,
                 type=str,
+                enum=["json", "binary"],
             ),
-            OpenApiParameter(
-                name="date",
-                description="Filter by date (ex. ?date='2023-06-12')",
-                required=False,
-                type=OpenApiTypes.DATE,
-            ),
-        ]
+        ],
+        responses=SeatMapSerializer,
     )
-    def list(self, request, *args, **kwargs):
-        """List Journey with filter by route_from, route_to and date"""
-        return super().list(request, *args, **kwargs)
+    @action(methods=["GET"], detail=True, url_path="seats")
+    def seats(self, request, pk=None):
+        """Sold or held seats of the journey as a packed bitset"""
+        seat_map = get_seat_map(self.get_object())
+        if request.query_params.get("encoding") == "binary":
+            return HttpResponse(
+                bytes(seat_map.bits),
+                content_type="application/octet-stream",
+                headers={
+                    "X-Cargo-Num": seat_map.cargo_num,
+                    "X-Places-In-Cargo": seat_map.places_in_cargo,
+                },
+            )
+        serializer = SeatMapSerializer(seat_map)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(request=SeatHoldSerializer, responses=SeatHoldSerializer)
+    @action(
+        methods=["POST", "DELETE"],
+        detail=True,
+        url_path="hold",
+        permission_classes=[IsAuthenticated],
+    )
+    def hold(self, request, pk=None):
+        """
+        Hold seats for the user until SEAT_HOLD_TTL passes or they are
+        ordered, DELETE releases all holds of the user on the journey
+        """
+        journey = self.get_object()
+        if request.method == "DELETE":
+            release_holds(journey, request.user)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        serializer = SeatHoldSerializer(
+            data=request.data,
+            context={**self.get_serializer_context(), "journey": journey},
+        )
+        serializer.is_valid(raise_exception=True)
+        holds = hold_seats(
+            journey, request.user, serializer.validated_data["seats"]
+        )
+        serializer = SeatHoldSerializer(
+            {"seats": holds, "expires_at": holds[0].expires_at}
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        parameters=[JourneyPlanSerializer],
+        responses=ItinerarySerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="plan")
+    def plan(self, request):
+        """Plan multi-leg trips: earliest arrival for each transfer count"""
+        params = JourneyPlanSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        departure = params.validated_data.get("departure", timezone.now())
+
+        itineraries = get_planner().plan(
+            origin=params.validated_data["source"],
+            destination=params.validated_data["destination"],
+            departure=int(departure.timestamp()),
+            max_transfers=params.validated_data["max_transfers"],
+            min_transfer=params.validated_data["min_transfer"] * 60,
+            horizon=int(settings.JOURNEY_PLAN_HORIZON.total_seconds()),
+        )
+        journeys = self.get_queryset().in_bulk(
+            {leg.journey_id for itinerary in itineraries
+             for leg in itinerary.legs}
+        )
+        serializer = ItinerarySerializer(
+            [
+                {
+                    "departure_time": datetime.fromtimestamp(
+                        itinerary.legs[0].departure, tz=UTC
+                    ),
+                    "arrival_time": datetime.fromtimestamp(
+                        itinerary.arrival, tz=UTC
+                    ),
+                    "transfers": itinerary.transfers,
+                    "journeys": [
+                        journeys[leg.journey_id] for leg in itinerary.legs
+                    ],
+                }
+                for itinerary in itineraries
+                # The index may still hold journeys deleted meanwhile
+                if all(leg.journey_id in journeys for leg in itinerary.legs)
+            ],
+            many=True,
+        )
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def export_filename(self, name: str) -> str:
+        day = self.request.query_params.get("date")
+        return f"{name}-{day}" if day else name
+
+    @extend_schema(
+        parameters=[*JOURNEY_FILTER_PARAMETERS, EXPORT_PARAMETER],
+        responses=EXPORT_RESPONSES,
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="export",
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """Stream all journeys matching the list filters as NDJSON or CSV"""
+        journeys = (
+            self.get_queryset()
+            .annotate(tickets_available=TICKETS_AVAILABLE)
+            .order_by("departure_time", "id")
+        )
+        return export_response(
+            request.accepted_renderer,
+            JOURNEY_EXPORT_COLUMNS,
+            journeys,
+            self.export_filename("journeys"),
+        )
+
+    @extend_schema(
+        parameters=[*JOURNEY_FILTER_PARAMETERS, EXPORT_PARAMETER],
+        responses=EXPORT_RESPONSES,
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="manifest",
+        permission_classes=[IsAdminUser],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def manifest(self, request):
+        """
+        Stream the tickets of all journeys matching the list filters with
+        their passengers, ?date= gives a day's manifest
+        """
+        tickets = TicketModel.objects.filter(
+            journey__in=self.get_queryset().values("id")
+        ).order_by("journey__departure_time", "journey_id", "cargo", "seat")
+        return export_response(
+            request.accepted_renderer,
+            TICKET_EXPORT_COLUMNS,
+            tickets,
+            self.export_filename("manifest"),
+        )
 
 
 class OrderSetPagination(PageNumberPagination):
     page_size = 3
     page_size_query_param = "page_size"
-    max_page_size = 1000
+    max_page_size = 100
 
 
 @extend_schema(tags=["Order API"])
+@fieldset_schema
 class OrderViewSet(
+    SelectablePaginationMixin,
+    FieldsetMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -285,6 +768,7 @@ class OrderViewSet(
     queryset = OrderModel.objects.all()
     serializer_class = OrderSerializer
     pagination_class = OrderSetPagination
+    keyset_pagination_class = OrderKeysetPagination
     permission_classes = [
         IsAuthenticated,
     ]
@@ -292,7 +776,23 @@ class OrderViewSet(
     def get_queryset(self):
         queryset = self.queryset.filter(user=self.request.user)
         if self.action in ["list", "retrieve"]:
-            queryset = queryset.prefetch_related("tickets__journey__crews")
+            # Four queries per page however many tickets and journeys:
+            # orders, tickets, their distinct journeys, crews
+            journeys = (
+                JourneyModel.objects.select_related(
+                    "train", "route__source", "route__destination"
+                )
+                .annotate(tickets_available=TICKETS_AVAILABLE)
+                .prefetch_related("crews")
+            )
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "tickets",
+                    queryset=TicketModel.objects.prefetch_related(
+                        Prefetch("journey", queryset=journeys)
+                    ),
+                )
+            )
         return queryset
 
     def get_serializer_class(self):
@@ -300,5 +800,91 @@ class OrderViewSet(
             return OrderListSerializer
         return self.serializer_class
 
+    @extend_schema(parameters=[PAGINATION_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        """List orders of the user, newest first"""
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=IDEMPOTENCY_HEADER,
+                location=OpenApiParameter.HEADER,
+                description=(
+                    "Unique key per order attempt, retries with the same "
+                    "key replay the first response instead of ordering again"
+                ),
+                required=False,
+                type=str,
+            ),
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        return idempotent(
+            request, lambda: super(OrderViewSet, self).create(
+                request, *args, **kwargs
+            )
+        )
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+@extend_schema(tags=["Timetable API"])
+class TimetableBundleView(APIView):
+    renderer_classes = [ZstdNDJSONRenderer, NDJSONRenderer]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                description=(
+                    "version header of an earlier bundle, only changes "
+                    "since it are sent"
+                ),
+                required=False,
+                type=int,
+            ),
+            OpenApiParameter(
+                name="format",
+                description="ndjson skips compression",
+                required=False,
+                type=str,
+                enum=["zst", "ndjson"],
+            ),
+        ],
+        responses={
+            (200, ZstdNDJSONRenderer.media_type): OpenApiTypes.BINARY,
+            (200, NDJSONRenderer.media_type): OpenApiTypes.STR,
+        },
+    )
+    def get(self, request):
+        """
+        Stream the timetable for offline use as zstd-compressed NDJSON:
+        a header with the version, then stations, trains, routes and
+        journeys from today on
+        """
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ValidationError(
+                    {"since": "Expected the version of an earlier bundle"}
+                )
+        bundle = TimetableBundle(since)
+        renderer = request.accepted_renderer
+        filename = bundle.filename
+        if renderer.format == ZstdNDJSONRenderer.format:
+            chunks = bundle.compressed_chunks()
+            filename += ".zst"
+        else:
+            chunks = bundle.chunks()
+        return StreamingHttpResponse(
+            chunks,
+            content_type=renderer.media_type,
+            headers={
+                "X-Timetable-Version": bundle.version,
+                "Content-Disposition": f'attachment; filename="{filename}"',
+            },
+        )